@@ -0,0 +1,73 @@
+# Compare the two ways PathSolver checks a query (SOLVER_ASSUMPTIONS = 0 / 1)
+# on a corpus of runtime bytecode files (hex, one contract per file).
+#
+#   python solver-bench.py [-glt SECONDS] contracts/*.evm
+#
+# Every contract runs in a fresh process per mode, the table lists the time of
+# both modes and whether they found the same issues.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+OYENTE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "oyente")
+MODES = (("scopes", 0), ("assumptions", 1))
+
+
+def run_one(path, assumptions, global_timeout):
+    sys.path.insert(0, OYENTE_DIR)
+    import global_params
+    import symExec
+
+    global_params.SOLVER_ASSUMPTIONS = assumptions
+    global_params.GLOBAL_TIMEOUT = global_timeout
+    with open(path) as f:
+        bytecode = f.read().strip()
+    begin = time.time()
+    symExec.run(disasm_file=path + ".disasm", bytecode=bytecode)
+    issues = dict((name, len(pcs)) for name, pcs in symExec.global_problematic_pcs.items())
+    print(json.dumps({"time": time.time() - begin, "paths": symExec.total_no_of_paths, "issues": issues}))
+
+
+def bench(path, assumptions, global_timeout):
+    out = subprocess.check_output([sys.executable, os.path.abspath(__file__), "--run", str(assumptions),
+                                   "-glt", str(global_timeout), path], cwd=OYENTE_DIR)
+    return json.loads(out.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("files", nargs="+", help="runtime bytecode files")
+    parser.add_argument("-glt", "--global-timeout", type=int, default=50, dest="global_timeout")
+    parser.add_argument("--run", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run is not None:
+        run_one(args.files[0], args.run, args.global_timeout)
+        return
+
+    totals = dict.fromkeys([name for name, _ in MODES], 0.0)
+    print("%-40s %12s %12s  %s" % ("contract", "scopes", "assumptions", "same issues"))
+    for path in args.files:
+        results = {}
+        for name, assumptions in MODES:
+            try:
+                results[name] = bench(os.path.abspath(path), assumptions, args.global_timeout)
+            except subprocess.CalledProcessError:
+                results[name] = None
+        if None in results.values():
+            print("%-40s %12s" % (os.path.basename(path), "failed"))
+            continue
+        for name in totals:
+            totals[name] += results[name]["time"]
+        same = results["scopes"]["issues"] == results["assumptions"]["issues"]
+        print("%-40s %11.2fs %11.2fs  %s" % (os.path.basename(path), results["scopes"]["time"],
+                                             results["assumptions"]["time"], "yes" if same else "NO"))
+    print("%-40s %11.2fs %11.2fs" % ("total", totals["scopes"], totals["assumptions"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -53,13 +53,13 @@ def check_reentrancy_bug(path_conditions_and_vars, stack, global_state):
             # check if a var is global
             # 检查变量是否是全局变量
             if is_storage_var(var):
-                pos = get_storage_position(var)
+                pos = global_state['Ia'].slot(var)
                 if pos in global_state['Ia']:
                     # 转出金额 等于 转入金额 
                     new_path_condition.append(var == global_state['Ia'][pos])
-    transfer_amount = stack[2]
+    transfer_amount = stack.peek(2)
     if isSymbolic(transfer_amount) and is_storage_var(transfer_amount):
-        pos = get_storage_position(transfer_amount)
+        pos = global_state['Ia'].slot(transfer_amount)
         if pos in global_state['Ia']:
             # 转账金额不能为 0
             new_path_condition.append(global_state['Ia'][pos] != 0)
@@ -74,10 +74,10 @@ def check_reentrancy_bug(path_conditions_and_vars, stack, global_state):
     # If outgas > 2300 when using call.gas.value then the contract will be considered to contain reentrancy bug
     # 2300 是 transfer 和 send 使用的 outgas。
     # 如果使用 call.gas.value 时 outgas > 2300 那么合约将被认为包含重入错误
-    solver.add(stack[0] > 2300)
+    solver.add(stack.peek(0) > 2300)
     # transfer_amount > deposit_amount => reentrancy
     # 转移的金额 大于 存储的金额，则是重入
-    solver.add(stack[2] > BitVec('Iv', 256))
+    solver.add(stack.peek(2) > BitVec('Iv', 256))
     # if it is not feasible to re-execute the call, its not a bug
     # 如果重新执行调用不可行，则不是 bug
     ret_val = not (solver.check() == unsat)
@@ -95,79 +95,62 @@ def calculate_gas(opcode, stack, mem, global_state, analysis, solver):
     # 对于符号变量，为了简单起见，我们只添加基本成本部分
     if opcode in ("LOG0", "LOG1", "LOG2", "LOG3", "LOG4") and len(stack) > 1:
         # 判断是否是 int 类型
-        if isReal(stack[1]):
-            gas_increment += GCOST["Glogdata"] * stack[1]
+        if isReal(stack.peek(1)):
+            gas_increment += GCOST["Glogdata"] * stack.peek(1)
     elif opcode == "EXP" and len(stack) > 1:
-        if isReal(stack[1]) and stack[1] > 0:
-            gas_increment += GCOST["Gexpbyte"] * (1 + math.floor(math.log(stack[1], 256)))
+        if isReal(stack.peek(1)) and stack.peek(1) > 0:
+            gas_increment += GCOST["Gexpbyte"] * (1 + math.floor(math.log(stack.peek(1), 256)))
     elif opcode == "EXTCODECOPY" and len(stack) > 2:
-        if isReal(stack[2]):
-            gas_increment += GCOST["Gcopy"] * math.ceil(stack[2] / 32)
+        if isReal(stack.peek(2)):
+            gas_increment += GCOST["Gcopy"] * math.ceil(stack.peek(2) / 32)
     elif opcode in ("CALLDATACOPY", "CODECOPY") and len(stack) > 3:
-        if isReal(stack[3]):
-            gas_increment += GCOST["Gcopy"] * math.ceil(stack[3] / 32)
+        if isReal(stack.peek(3)):
+            gas_increment += GCOST["Gcopy"] * math.ceil(stack.peek(3) / 32)
     elif opcode == "SSTORE" and len(stack) > 1:
-        if isReal(stack[1]):
+        if isReal(stack.peek(1)):
             try:
-                try:
-                    storage_value = global_state["Ia"][int(stack[0])]
-                except:
-                    storage_value = global_state["Ia"][str(stack[0])]
+                storage_value = global_state["Ia"][stack.peek(0)]
                 # when we change storage value from zero to non-zero
-                if storage_value == 0 and stack[1] != 0:
+                if storage_value == 0 and stack.peek(1) != 0:
                     gas_increment += GCOST["Gsset"]
                 else:
                     gas_increment += GCOST["Gsreset"]
             except: # when storage address at considered key is empty
-                if stack[1] != 0:
+                if stack.peek(1) != 0:
                     gas_increment += GCOST["Gsset"]
-                elif stack[1] == 0:
+                elif stack.peek(1) == 0:
                     gas_increment += GCOST["Gsreset"]
         else:   # 符号(非 int)
             try:
-                try:
-                    storage_value = global_state["Ia"][int(stack[0])]
-                except:
-                    storage_value = global_state["Ia"][str(stack[0])]
-                solver.push()
-                solver.add(Not( And(storage_value == 0, stack[1] != 0) ))
-                if solver.check() == unsat:
+                storage_value = global_state["Ia"][stack.peek(0)]
+                if solver.check(Not( And(storage_value == 0, stack.peek(1) != 0) )) == unsat:
                     gas_increment += GCOST["Gsset"]
                 else:
                     gas_increment += GCOST["Gsreset"]
-                solver.pop()
             except Exception as e:
-                if str(e) == "canceled":
-                    solver.pop()
-                solver.push()
-                solver.add(Not( stack[1] != 0 ))
-                if solver.check() == unsat:
+                if solver.check(Not( stack.peek(1) != 0 )) == unsat:
                     gas_increment += GCOST["Gsset"]
                 else:
                     gas_increment += GCOST["Gsreset"]
-                solver.pop()
     elif opcode == "SUICIDE" and len(stack) > 1:
-        if isReal(stack[1]):
-            address = stack[1] % 2**160
+        if isReal(stack.peek(1)):
+            address = stack.peek(1) % 2**160
             if address not in global_state:
                 gas_increment += GCOST["Gnewaccount"]
         else:
-            address = str(stack[1])
+            address = str(stack.peek(1))
             if address not in global_state:
                 gas_increment += GCOST["Gnewaccount"]
     elif opcode in ("CALL", "CALLCODE", "DELEGATECALL") and len(stack) > 2:
         # Not fully correct yet
         gas_increment += GCOST["Gcall"]
-        if isReal(stack[2]):
-            if stack[2] != 0:
+        if isReal(stack.peek(2)):
+            if stack.peek(2) != 0:
                 gas_increment += GCOST["Gcallvalue"]
         else:
-            solver.push()
-            solver.add(Not (stack[2] != 0))
-            if check_sat(solver) == unsat:
+            if check_sat(solver, Not (stack.peek(2) != 0)) == unsat:
                 gas_increment += GCOST["Gcallvalue"]
-            solver.pop()
-    elif opcode == "SHA3" and isReal(stack[1]):
+    elif opcode == "SHA3" and isReal(stack.peek(1)):
         pass # Not handle
 
 
@@ -187,8 +170,8 @@ def update_analysis(analysis, opcode, stack, mem, global_state, path_conditions_
 
     # 重入检测
     if opcode == "CALL":
-        recipient = stack[1]
-        transfer_amount = stack[2]
+        recipient = stack.peek(1)
+        transfer_amount = stack.peek(2)
         if isReal(transfer_amount) and transfer_amount == 0:
             return
         if isSymbolic(recipient):
@@ -201,7 +184,7 @@ def update_analysis(analysis, opcode, stack, mem, global_state, path_conditions_
         analysis["money_concurrency_bug"].append(global_state["pc"])
         analysis["money_flow"].append( ("Ia", str(recipient), str(transfer_amount)))
     elif opcode == "SUICIDE":
-        recipient = stack[0]
+        recipient = stack.peek(0)
         if isSymbolic(recipient):
             recipient = simplify(recipient)
         analysis['money_concurrency_bug'].append(global_state['pc'])
@@ -209,16 +192,16 @@ def update_analysis(analysis, opcode, stack, mem, global_state, path_conditions_
 
 # Check if it is possible to execute a path after a previous path
 # Previous path has prev_pc (previous path condition) and set global state variables as in gstate (only storage values)
-# Current path has curr_pc
+# Current path has curr_pc, curr_storage resolves its storage variables to slots
 # 检查是否可以在上一个路径之后执行一个路径
 # 前一个路径有 prev_pc（previous path condition）并设置全局状态变量如 gstate（仅存储值）
 # 当前路径有 curr_pc
-def is_feasible(prev_pc, gstate, curr_pc):
+def is_feasible(prev_pc, gstate, curr_pc, curr_storage):
     curr_pc = list(curr_pc)
     new_pc = []
     for var in get_all_vars(curr_pc):
         if is_storage_var(var):
-            pos = get_storage_position(var)
+            pos = curr_storage.slot(var)
             if pos in gstate:
                 new_pc.append(var == gstate[pos])
     curr_pc += new_pc
@@ -252,7 +235,7 @@ def is_false_positive(i, j, all_gs, path_conditions):
     set_of_pcs, statei = rename_vars(pathi, statei)
     log.debug("Set of PCs after renaming global vars" + str(set_of_pcs))
     log.debug("Global state values in path " + str(i) + " after renaming: " + str(statei))
-    if is_feasible(set_of_pcs, statei, pathj):
+    if is_feasible(set_of_pcs, statei, pathj, all_gs[j]):
         return False
     else:
         return True
@@ -4,7 +4,7 @@ class BasicBlock:
     def __init__(self, start_address, end_address):
         self.start = start_address
         self.end = end_address
-        self.instructions = []  # each instruction is a string
+        self.instructions = []  # decoded instructions, see instruction.py
         self.jump_target = 0
 
     def get_start_address(self):
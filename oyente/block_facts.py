@@ -0,0 +1,59 @@
+# 基本块的静态事实(含有哪些操作码、是否 REVERT/CALL/SSTORE/TIMESTAMP、静态后继)，
+# 在 construct_bb 之后计算一次，执行指令和调度状态时 O(1) 查询，不必在每条路径上重新扫描指令。
+# Static facts of the basic blocks, computed once after the CFG is built. The
+# jump target of a JUMP/JUMPI is only known when it runs, so the successor
+# summary covers the falls_to edge only.
+
+from instruction import opcode_values
+
+CALL_OPCODES = ("CALL", "CALLCODE", "DELEGATECALL")
+# blocks the coverage guided search strategy runs first
+INTERESTING_OPCODES = CALL_OPCODES + ("SSTORE", "SUICIDE")
+
+
+def opcode_mask(names):
+    mask = 0
+    for name in names:
+        mask |= 1 << opcode_values[name]
+    return mask
+
+
+REVERT_MASK = opcode_mask(["REVERT"])
+CALL_MASK = opcode_mask(CALL_OPCODES)
+SSTORE_MASK = opcode_mask(["SSTORE"])
+TIMESTAMP_MASK = opcode_mask(["TIMESTAMP"])
+INTERESTING_MASK = opcode_mask(INTERESTING_OPCODES)
+
+
+class BlockFacts(object):
+    __slots__ = ("opcodes", "has_revert", "has_call", "has_sstore", "has_timestamp", "interesting",
+                 "falls_to", "falls_to_reverts")
+
+    def __init__(self, block):
+        # bit n is set when the block contains opcode n
+        opcodes = 0
+        for instr in block.get_instructions():
+            opcodes |= 1 << instr.opcode
+        self.opcodes = opcodes
+        self.has_revert = bool(opcodes & REVERT_MASK)
+        self.has_call = bool(opcodes & CALL_MASK)
+        self.has_sstore = bool(opcodes & SSTORE_MASK)
+        self.has_timestamp = bool(opcodes & TIMESTAMP_MASK)
+        self.interesting = bool(opcodes & INTERESTING_MASK)
+        self.falls_to = None
+        self.falls_to_reverts = False
+
+    def has(self, name):
+        return bool(self.opcodes >> opcode_values[name] & 1)
+
+
+def build_block_facts(vertices, jump_type):
+    facts = {}
+    for start, block in vertices.items():
+        facts[start] = BlockFacts(block)
+    for start, block_facts in facts.items():
+        if jump_type[start] in ("falls_to", "conditional") and hasattr(vertices[start], "falls_to"):
+            block_facts.falls_to = vertices[start].get_falls_to()
+            successor = facts.get(block_facts.falls_to)
+            block_facts.falls_to_reverts = successor is not None and successor.has_revert
+    return facts
@@ -0,0 +1,104 @@
+# 基本块摘要: 一个块开头只操作栈的纯指令(算术、比较、位运算、PUSH/DUP/SWAP/POP)的效果
+# 只取决于它读到的栈顶若干项。第一次执行时记录结果(栈输出、gas、ADD/SUB 的溢出检查)，
+# 之后以相同输入(具体值相同，符号值是同一个 z3 项)到达这个块的路径直接套用摘要，
+# 不再逐条解释这些指令。SafeMath 之类被很多路径共享的块从中受益最多。
+# Summaries of the pure prefix of a basic block, keyed by the block and the
+# stack items the prefix reads. z3 shares structurally equal terms, so an AST
+# id identifies a symbolic input; the entry holds the inputs so that the ids
+# are not reused while they are keys.
+
+from collections import OrderedDict
+
+from z3 import ExprRef
+
+from opcodes import get_opcode
+
+# instructions whose result only depends on the stack; BYTE asks the solver
+# for symbolic operands and is not one of them
+PURE_OPCODES = set(["ADD", "MUL", "SUB", "LT", "GT", "SLT", "SGT", "EQ", "ISZERO",
+                    "AND", "OR", "XOR", "NOT", "POP", "JUMPDEST"]
+                   + ["PUSH%d" % n for n in range(1, 33)]
+                   + ["DUP%d" % n for n in range(1, 17)]
+                   + ["SWAP%d" % n for n in range(1, 17)])
+# these report overflow obligations, whether they do depends on branch_reverts()
+CHECKED_OPCODES = ("ADD", "SUB")
+
+
+class BlockPrefix(object):
+    __slots__ = ("length", "depth", "checked", "pcs")
+
+    def __init__(self, instructions):
+        length = 0
+        height = 0
+        lowest = 0
+        for instr in instructions:
+            if instr.name not in PURE_OPCODES:
+                break
+            _, removed, added = get_opcode(instr.name)
+            height -= removed
+            lowest = min(lowest, height)
+            height += added
+            length += 1
+        self.length = length
+        # number of stack items the prefix reads
+        self.depth = -lowest
+        self.checked = any(instr.name in CHECKED_OPCODES for instr in instructions[:length])
+        self.pcs = [instr.pc for instr in instructions[:length]]
+
+
+class BlockSummary(object):
+    __slots__ = ("outputs", "gas", "obligations", "end_pc")
+
+    def __init__(self, outputs, gas, obligations, end_pc):
+        # the stack items that replace the `depth` items read by the prefix
+        self.outputs = outputs
+        # base gas of the prefix, without the memory part
+        self.gas = gas
+        # (kind, pc, expr) passed to add_obligation
+        self.obligations = obligations
+        self.end_pc = end_pc
+
+
+class BlockSummaries(object):
+    def __init__(self, max_size, min_length=2):
+        self.max_size = max_size
+        self.min_length = min_length
+        # block -> BlockPrefix
+        self.prefixes = {}
+        # key -> (inputs, BlockSummary), least recently used first
+        self.entries = OrderedDict()
+        self.stats = {"hit": 0, "miss": 0}
+
+    def prefix(self, block, instructions):
+        prefix = self.prefixes.get(block)
+        if prefix is None:
+            prefix = BlockPrefix(instructions)
+            self.prefixes[block] = prefix
+        return prefix
+
+    # 栈中有 int 和 z3 项以外的值时返回 None，这样的块照常解释执行
+    @staticmethod
+    def key(block, inputs, reverts):
+        key = [block, reverts]
+        for value in inputs:
+            if type(value) is int:
+                key.append(value)
+            elif isinstance(value, ExprRef):
+                key.append((value.get_id(),))
+            else:
+                return None
+        return tuple(key)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.stats["miss"] += 1
+            return None
+        self.entries.move_to_end(key)
+        self.stats["hit"] += 1
+        return entry[1]
+
+    def put(self, key, inputs, summary):
+        self.entries[key] = (inputs, summary)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
@@ -0,0 +1,122 @@
+# 具体值快速路径: 操作数都是 Python int 的算术/比较/位运算以及栈操作直接在原生整数上执行，
+# 跳过 update_analysis、日志和 simplify。遇到符号操作数、栈不够或不在表中的指令时返回 False，
+# 由 sym_exec_ins 按原来的方式执行这一条指令，所以覆盖率和结果不变。
+# Native int interpreter for the instructions whose result and gas only depend
+# on concrete stack items. Every entry mirrors the concrete branch of its
+# exec_* handler in symExec.
+
+from instruction import opcode_values
+from opcodes import GCOST, get_ins_cost
+from utils import to_signed, to_unsigned
+
+UNSIGNED_BOUND_NUMBER = 2 ** 256 - 1
+
+
+def _binary(compute):
+    def run(stack, instr):
+        if len(stack) < 2:
+            return False
+        first = stack[-1]
+        second = stack[-2]
+        if not (isinstance(first, int) and isinstance(second, int)):
+            return False
+        stack.pop()
+        stack[-1] = compute(first, second)
+        return True
+    return run
+
+
+def _unary(compute):
+    def run(stack, instr):
+        if not stack or not isinstance(stack[-1], int):
+            return False
+        stack[-1] = compute(stack[-1])
+        return True
+    return run
+
+
+def _byte(first, second):
+    if first >= 32 or first < 0:
+        return 0
+    byte_index = 32 - first - 1
+    return (second & (255 << (8 * byte_index))) >> (8 * byte_index)
+
+
+def _push(stack, instr):
+    stack.append(instr.arg)
+    return True
+
+
+def _pop(stack, instr):
+    if not stack:
+        return False
+    stack.pop()
+    return True
+
+
+def _dup(stack, instr):
+    position = instr.opcode - 0x7f
+    if len(stack) < position:
+        return False
+    stack.dup(position)
+    return True
+
+
+def _swap(stack, instr):
+    position = instr.opcode - 0x8f
+    if len(stack) <= position:
+        return False
+    stack.swap(position)
+    return True
+
+
+def _jumpdest(stack, instr):
+    return True
+
+
+handlers = {
+    "ADD": _binary(lambda a, b: (a + b) % (2 ** 256)),
+    "MUL": _binary(lambda a, b: a * b & UNSIGNED_BOUND_NUMBER),
+    "SUB": _binary(lambda a, b: (a - b) % (2 ** 256)),
+    "LT": _binary(lambda a, b: 1 if to_unsigned(a) < to_unsigned(b) else 0),
+    "GT": _binary(lambda a, b: 1 if to_unsigned(a) > to_unsigned(b) else 0),
+    "SLT": _binary(lambda a, b: 1 if to_signed(a) < to_signed(b) else 0),
+    "SGT": _binary(lambda a, b: 1 if to_signed(a) > to_signed(b) else 0),
+    "EQ": _binary(lambda a, b: 1 if a == b else 0),
+    "ISZERO": _unary(lambda a: 1 if a == 0 else 0),
+    "AND": _binary(lambda a, b: a & b),
+    "OR": _binary(lambda a, b: a | b),
+    "XOR": _binary(lambda a, b: a ^ b),
+    "NOT": _unary(lambda a: (~a) & UNSIGNED_BOUND_NUMBER),
+    "BYTE": _binary(_byte),
+    "POP": _pop,
+    "JUMPDEST": _jumpdest,
+}
+for _n in range(1, 33):
+    handlers["PUSH%d" % _n] = _push
+for _n in range(1, 17):
+    handlers["DUP%d" % _n] = _dup
+    handlers["SWAP%d" % _n] = _swap
+
+# opcode -> (handler, base gas)
+concrete_ops = [None] * 256
+for _name, _run in handlers.items():
+    concrete_ops[opcode_values[_name]] = (_run, get_ins_cost(_name))
+
+
+# 执行成功时返回 True，调用者负责 visited_pcs；pc 和 gas 的更新与 sym_exec_ins 相同
+def exec_concrete(instr, stack, mem, global_state, analysis):
+    entry = concrete_ops[instr.opcode] if instr.opcode < 256 else None
+    if entry is None or not entry[0](stack, instr):
+        return False
+    global_state["pc"] += instr.size
+    charge_gas(analysis, mem, entry[1])
+    return True
+
+
+# analysis.calculate_gas: base cost plus the change of the memory cost
+def charge_gas(analysis, mem, base):
+    length = len(mem)
+    gas_memory = GCOST["Gmemory"] * length + (length ** 2) // 512
+    analysis["gas"] += base + gas_memory - analysis["gas_mem"]
+    analysis["gas_mem"] = gas_memory
@@ -0,0 +1,53 @@
+# 在进程内把运行时字节码解码成指令，代替原来的 `evm disasm` + change_format + tokenize，
+# 不再为每个合约启动外部进程和读写临时文件。
+# In-process disassembler. One linear pass over the runtime bytecode gives the
+# decoded instructions that collect_vertices used to rebuild from the listing
+# of `evm disasm`.
+
+import binascii
+
+from instruction import INVALID, Instruction, opcode_names
+
+
+# 十六进制字符串(可以带 0x 前缀和首尾空白)或字节串 -> bytes
+def to_bytes(bytecode):
+    if isinstance(bytecode, (bytes, bytearray, memoryview)):
+        return bytes(bytecode)
+    bytecode = bytecode.strip()
+    if bytecode.startswith("0x"):
+        bytecode = bytecode[2:]
+    return binascii.unhexlify(bytecode)
+
+
+def disassemble(bytecode):
+    code = memoryview(to_bytes(bytecode))
+    length = len(code)
+    instrs = []
+    pc = 0
+    while pc < length:
+        opcode = code[pc]
+        name = opcode_names.get(opcode)
+        if name is None:
+            # bytes that are not an instruction, "Missing opcode" in evm disasm
+            instrs.append(Instruction(pc, INVALID, "INVALID"))
+            pc += 1
+        elif 0x60 <= opcode <= 0x7f:
+            size = opcode - 0x5e
+            if pc + size > length:
+                # like evm disasm, an incomplete PUSH at the end is dropped
+                break
+            arg = int.from_bytes(code[pc + 1:pc + size], "big")
+            instrs.append(Instruction(pc, opcode, name, arg, size))
+            pc += size
+        else:
+            instrs.append(Instruction(pc, opcode, name))
+            pc += 1
+    return instrs
+
+
+# 生成与 evm disasm 相同格式的文本，只在使用 -e 保留中间文件时写出
+def format_disasm(bytecode, instrs):
+    lines = [binascii.hexlify(to_bytes(bytecode)).decode()]
+    for instr in instrs:
+        lines.append("%06d: %s" % (instr.pc, instr))
+    return "\n".join(lines) + "\n"
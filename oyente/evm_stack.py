@@ -0,0 +1,22 @@
+# EVM 的栈。栈顶在列表的末尾，push/pop/dup/swap 都是 O(1)，
+# 原来栈顶在下标 0，每次 pop(0)/insert(0, x) 都要移动整个列表。
+# The EVM stack. The top is at the end of the list so that push, pop, dup and
+# swap do not shift the whole stack, peek(i) reads the i-th item from the top.
+
+
+class Stack(list):
+    def push(self, value):
+        self.append(value)
+
+    # pop() of list already takes the last item, i.e. the top
+
+    def peek(self, i=0):
+        return self[-1 - i]
+
+    # DUPn: push a copy of the n-th item (1 is the top)
+    def dup(self, n):
+        self.append(self[-n])
+
+    # SWAPn: exchange the top with the (n+1)-th item
+    def swap(self, n):
+        self[-1], self[-1 - n] = self[-1 - n], self[-1]
@@ -0,0 +1,59 @@
+# 表达式驻留(hash-consing)与 simplify() 结果缓存。
+# z3 在同一个 context 中让结构相同的项共享同一个 AST，所以 AST id 就是项的结构 key。
+# 同一个存储槽、calldata 字在不同路径上被重新构建，simplify 的结果直接从缓存取出，
+# 得到的是同一个 Python 对象，不再重复分配。
+# Interning of z3 terms and a bounded memo of simplify(). The cache holds the
+# terms it maps, so an AST id cannot be reused by z3 while it is a key.
+
+from collections import OrderedDict
+
+from z3 import BitVecVal, is_expr, simplify
+
+# 256 位常量，最常用的几个值共享同一个对象
+_bv_values = {}
+MAX_BV_VALUES = 4096
+
+
+def bv_val(value):
+    value &= 2 ** 256 - 1
+    expr = _bv_values.get(value)
+    if expr is None:
+        if len(_bv_values) >= MAX_BV_VALUES:
+            _bv_values.clear()
+        expr = BitVecVal(value, 256)
+        _bv_values[value] = expr
+    return expr
+
+
+BV_ZERO = bv_val(0)
+BV_ONE = bv_val(1)
+
+
+class SimplifyCache(object):
+    def __init__(self, max_size):
+        self.max_size = max_size
+        # AST id -> (term, simplified term), least recently used first
+        self.entries = OrderedDict()
+        self.stats = {"hit": 0, "miss": 0}
+
+    # 与 simplify(expr) if is_expr(expr) else expr 相同
+    def simplify(self, expr):
+        if not is_expr(expr):
+            return expr
+        if self.max_size <= 0:
+            return simplify(expr)
+        key = expr.get_id()
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.stats["hit"] += 1
+            return entry[1]
+        self.stats["miss"] += 1
+        result = simplify(expr)
+        self.entries[key] = (expr, result)
+        # a simplified term simplifies to itself
+        if result.get_id() not in self.entries:
+            self.entries[result.get_id()] = (result, result)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return result
@@ -39,6 +39,19 @@ GAS_LIMIT = 4000000
 
 LOOP_LIMIT = 10
 
+# Iterations a path runs through a loop before the values it changes are
+# widened to symbols, 0 only stops the path at LOOP_LIMIT
+LOOP_WIDENING = 0
+
+# Order in which the explorer picks pending paths: dfs, bfs, random or coverage
+SEARCH_STRATEGY = "dfs"
+
+# 1 merges the two sides of a JUMPI when they reach the same block again
+STATE_MERGING = 0
+
+# Number of blocks after a JUMPI within which its two sides wait for each other
+MERGE_DISTANCE = 8
+
 # Use a public blockchain to speed up the symbolic execution
 USE_GLOBAL_BLOCKCHAIN = 0
 
@@ -55,5 +68,38 @@ GENERATE_TEST_CASES = 0
 # Run Oyente in parallel
 PARALLEL = 0
 
+# Number of worker processes in parallel mode, 0 means one per CPU
+PARALLEL_WORKERS = 0
+
+# Run one symbolic execution per public function in parallel
+PARALLEL_FUNCTIONS = 0
+
+# timeout to run symbolic execution of one function (in secs), 0 splits GLOBAL_TIMEOUT between the functions
+FUNCTION_TIMEOUT = 0
+
+# Number of solver results kept in the query cache, 0 disables the cache
+QUERY_CACHE_SIZE = 4096
+
+# Number of simplify() results kept in memory, 0 disables the cache
+SIMPLIFY_CACHE_SIZE = 65536
+
+# Number of terms whose variables are kept in memory for constraint slicing
+VAR_CACHE_SIZE = 65536
+
+# Number of basic block summaries kept in memory, 0 interprets every block
+BLOCK_SUMMARY_SIZE = 65536
+
+# SQLite file keeping solver results across runs, None disables it
+SOLVER_CACHE = None
+
+# Maximum number of results kept in the solver cache file, 0 means no limit
+SOLVER_CACHE_SIZE = 1000000
+
+# 1 checks solver queries under tracked assumption literals, 0 in a push/pop scope
+# Experimental: the implications of the literals pile up at every prefix scope, which
+# slows the solver down until queries hit TIMEOUT and findings are lost. Not exposed
+# on the command line until misc_utils/solver-bench.py shows the same issues in both modes
+SOLVER_ASSUMPTIONS = 0
+
 # Iterable of targeted smart contract names
 TARGET_CONTRACTS = None
@@ -0,0 +1,66 @@
+# 解码后的指令记录，由 disassembler 从字节码生成一次，
+# 符号执行时按 opcode 查表分派，不再反复拆分字符串。
+# Decoded instructions. The disassembler builds one Instruction per opcode of
+# the bytecode, sym_exec_ins dispatches on its opcode.
+
+# Opcode id of the bytes that are not an instruction ("Missing opcode 0x.."
+# in evm disasm). They are not a byte of their own, the dispatch table has one
+# extra slot for them.
+INVALID = 0x100
+
+opcode_values = {
+    "STOP": 0x00, "ADD": 0x01, "MUL": 0x02, "SUB": 0x03, "DIV": 0x04,
+    "SDIV": 0x05, "MOD": 0x06, "SMOD": 0x07, "ADDMOD": 0x08, "MULMOD": 0x09,
+    "EXP": 0x0a, "SIGNEXTEND": 0x0b,
+    "LT": 0x10, "GT": 0x11, "SLT": 0x12, "SGT": 0x13, "EQ": 0x14,
+    "ISZERO": 0x15, "AND": 0x16, "OR": 0x17, "XOR": 0x18, "NOT": 0x19,
+    "BYTE": 0x1a, "SHL": 0x1b, "SHR": 0x1c, "SAR": 0x1d,
+    "SHA3": 0x20, "KECCAK256": 0x20,
+    "ADDRESS": 0x30, "BALANCE": 0x31, "ORIGIN": 0x32, "CALLER": 0x33,
+    "CALLVALUE": 0x34, "CALLDATALOAD": 0x35, "CALLDATASIZE": 0x36,
+    "CALLDATACOPY": 0x37, "CODESIZE": 0x38, "CODECOPY": 0x39, "GASPRICE": 0x3a,
+    "EXTCODESIZE": 0x3b, "EXTCODECOPY": 0x3c, "RETURNDATASIZE": 0x3d,
+    "RETURNDATACOPY": 0x3e, "EXTCODEHASH": 0x3f,
+    "BLOCKHASH": 0x40, "COINBASE": 0x41, "TIMESTAMP": 0x42, "NUMBER": 0x43,
+    "DIFFICULTY": 0x44, "PREVRANDAO": 0x44, "GASLIMIT": 0x45, "CHAINID": 0x46,
+    "SELFBALANCE": 0x47, "BASEFEE": 0x48, "BLOBHASH": 0x49, "BLOBBASEFEE": 0x4a,
+    "POP": 0x50, "MLOAD": 0x51, "MSTORE": 0x52, "MSTORE8": 0x53, "SLOAD": 0x54,
+    "SSTORE": 0x55, "JUMP": 0x56, "JUMPI": 0x57, "PC": 0x58, "MSIZE": 0x59,
+    "GAS": 0x5a, "JUMPDEST": 0x5b, "TLOAD": 0x5c, "TSTORE": 0x5d, "MCOPY": 0x5e,
+    "PUSH0": 0x5f,
+    "CREATE": 0xf0, "CALL": 0xf1, "CALLCODE": 0xf2, "RETURN": 0xf3,
+    "DELEGATECALL": 0xf4, "CREATE2": 0xf5, "STATICCALL": 0xfa, "REVERT": 0xfd,
+    "ASSERTFAIL": 0xfe, "SUICIDE": 0xff, "SELFDESTRUCT": 0xff,
+    "INVALID": INVALID,
+}
+for i in range(32):
+    opcode_values["PUSH%d" % (i + 1)] = 0x60 + i
+for i in range(16):
+    opcode_values["DUP%d" % (i + 1)] = 0x80 + i
+    opcode_values["SWAP%d" % (i + 1)] = 0x90 + i
+for i in range(5):
+    opcode_values["LOG%d" % i] = 0xa0 + i
+
+# byte -> 名字。别名只保留 oyente 使用的名字(SHA3、DIFFICULTY、SUICIDE)
+opcode_names = dict((value, name) for name, value in opcode_values.items()
+                    if name not in ("KECCAK256", "PREVRANDAO", "SELFDESTRUCT", "INVALID"))
+
+
+class Instruction(object):
+    __slots__ = ("pc", "opcode", "name", "arg", "size")
+
+    def __init__(self, pc, opcode, name, arg=None, size=1):
+        self.pc = pc
+        self.opcode = opcode
+        self.name = name
+        self.arg = arg    # the immediate of a PUSH, as an integer
+        self.size = size  # number of bytes, the next instruction is at pc + size
+
+    def __str__(self):
+        if self.arg is None:
+            return self.name
+        return "%s 0x%0*x" % (self.name, 2 * (self.size - 1), self.arg)
+
+    def __repr__(self):
+        return "<Instruction %d %s>" % (self.pc, self)
+
@@ -0,0 +1,97 @@
+# Keccak-256(以太坊的 SHA3，填充方式与 NIST 的 SHA3-256 不同，hashlib.sha3_256 不能用)。
+# 输入完全是具体值的 SHA3 直接算出哈希值，mapping 的存储位置因此是具体的。
+# 输入中有符号值时 SHA3 是一个未解释函数的应用，参数是输入的各个字。
+# Keccak-256 as used by the EVM, in pure Python: the Keccak-f[1600]
+# permutation on 25 64-bit lanes, rate 136 bytes, padding 0x01 ... 0x80.
+# Symbolic inputs are modeled by one uninterpreted function per input length,
+# with an inverse function per argument as the injectivity hint.
+
+from functools import lru_cache
+
+from z3 import BitVecSort, Function
+
+RATE = 136
+LANE_MASK = 2 ** 64 - 1
+
+ROUND_CONSTANTS = [
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+]
+
+
+def _rho_pi():
+    # (lane index in the state, lane index it moves to, rotation)
+    steps = []
+    x, y = 1, 0
+    for t in range(24):
+        steps.append((x + 5 * y, y + 5 * ((2 * x + 3 * y) % 5), ((t + 1) * (t + 2) // 2) % 64))
+        x, y = y, (2 * x + 3 * y) % 5
+    steps.append((0, 0, 0))
+    return steps
+
+
+RHO_PI = _rho_pi()
+
+
+def keccak_f(state):
+    for round_constant in ROUND_CONSTANTS:
+        # theta
+        c = [state[x] ^ state[x + 5] ^ state[x + 10] ^ state[x + 15] ^ state[x + 20] for x in range(5)]
+        d = [c[x - 1] ^ (((c[(x + 1) % 5] << 1) | (c[(x + 1) % 5] >> 63)) & LANE_MASK) for x in range(5)]
+        state = [lane ^ d[i % 5] for i, lane in enumerate(state)]
+        # rho and pi
+        b = [0] * 25
+        for source, target, rotation in RHO_PI:
+            lane = state[source]
+            b[target] = ((lane << rotation) | (lane >> (64 - rotation))) & LANE_MASK if rotation else lane
+        # chi
+        state = [b[i] ^ (~b[i - i % 5 + (i + 1) % 5] & b[i - i % 5 + (i + 2) % 5]) for i in range(25)]
+        # iota
+        state[0] ^= round_constant
+    return state
+
+
+# 海绵结构，suffix 是填充的第一个字节: Keccak 为 0x01，NIST 的 SHA3 为 0x06
+def sponge256(data, suffix):
+    padded = bytearray(data)
+    padded.append(suffix)
+    padded.extend(bytes(-len(padded) % RATE))
+    padded[-1] |= 0x80
+    state = [0] * 25
+    for offset in range(0, len(padded), RATE):
+        for i in range(RATE // 8):
+            state[i] ^= int.from_bytes(padded[offset + 8 * i: offset + 8 * i + 8], "little")
+        state = keccak_f(state)
+    return b"".join(lane.to_bytes(8, "little") for lane in state[:4])
+
+
+# 返回 256 位的整数，与 EVM 的 SHA3 压入栈中的值相同。同一个 mapping 的位置在很多路径上重复计算
+@lru_cache(maxsize=65536)
+def keccak256(data):
+    return int.from_bytes(sponge256(data, 0x01), "big")
+
+
+# input length -> (function, inverse functions)
+_functions = {}
+
+
+def _hash_function(words):
+    length = sum(word.size() for word in words) // 8
+    if length not in _functions:
+        name = "keccak256_%d" % length
+        sorts = [BitVecSort(word.size()) for word in words]
+        function = Function(name, *(sorts + [BitVecSort(256)]))
+        inverses = [Function("%s_arg%d" % (name, i), BitVecSort(256), sort) for i, sort in enumerate(sorts)]
+        _functions[length] = (function, inverses)
+    return _functions[length]
+
+
+# words: 输入的各个字(z3 项)。返回 (哈希值, 约束)，约束由哈希值得到每个参数，所以不同的输入哈希值不同
+def hash_term(words):
+    function, inverses = _hash_function(words)
+    value = function(*words)
+    return value, [inverse(value) == word for inverse, word in zip(inverses, words)]
@@ -0,0 +1,94 @@
+# 循环加宽(LOOP_WIDENING): 一条路径第 k+1 次到达循环头时，比较每次到达时的栈、内存和存储。
+# 每次迭代增加同一个常数的值是归纳变量，变为 初值 + 步长 * N，N 是新的符号(迭代次数，k <= N <= GAS_LIMIT)；
+# 其它变化了的值变为新的符号。加宽后的状态再执行一次循环体，走出循环的分支覆盖循环后面的代码，
+# 回到循环头的路径就不再继续了。
+# 只加宽每次到达循环头时都存在的内存和存储的键；在循环内第一次写入的键保留最后一次迭代的具体值，不加宽。
+# Loop widening. A snapshot of the stack, the memory and the storage is taken
+# every time a path reaches a loop header. After k iterations the values that
+# changed are generalized: an induction variable to base + step * N with a
+# symbolic trip count N, any other value to a fresh symbol.
+# Memory and storage keys first written inside the loop are not widened: they
+# keep the concrete value of the last unrolled iteration. This is a known gap,
+# a key whose address depends on the iteration (e.g. array[i]) only covers the
+# slots written by the unrolled iterations.
+
+from z3 import BitVec, UGE, ULE, is_bv_value, simplify
+
+from expr_cache import bv_val
+from state_merging import is_word, same_value
+
+UINT_MASK = 2 ** 256 - 1
+
+
+def take_snapshot(params):
+    return (tuple(params.stack), dict(params.mem), dict(params.global_state.get("Ia", {})))
+
+
+def to_word(value):
+    return bv_val(value) if type(value) is int else value
+
+
+# 两次迭代之间的差是常数时返回这个常数
+def constant_step(a, b):
+    if type(a) is int and type(b) is int:
+        return (b - a) & UINT_MASK
+    step = simplify(to_word(b) - to_word(a))
+    if is_bv_value(step):
+        return step.as_long()
+    return None
+
+
+class LoopWidener(object):
+    def __init__(self, new_name, max_iterations):
+        # new_name() gives the name of a fresh variable
+        self.new_name = new_name
+        self.max_iterations = max_iterations
+        self.variables = {}
+        self.constraints = []
+        self.trip_count = None
+
+    def fresh(self):
+        name = self.new_name()
+        var = BitVec(name, 256)
+        self.variables[name] = var
+        return var
+
+    def count(self, iterations):
+        if self.trip_count is None:
+            self.trip_count = self.fresh()
+            self.constraints.append(UGE(self.trip_count, iterations))
+            # every iteration costs gas
+            self.constraints.append(ULE(self.trip_count, self.max_iterations))
+        return self.trip_count
+
+    # series: 每次到达循环头时的值，最后一个是现在的值
+    def widen_value(self, series):
+        current = series[-1]
+        if all(same_value(value, current) for value in series):
+            return current
+        if not all(is_word(value) for value in series):
+            return self.fresh()
+        steps = [constant_step(a, b) for a, b in zip(series, series[1:])]
+        if steps[0] is not None and all(step == steps[0] for step in steps):
+            return to_word(series[0]) + bv_val(steps[0]) * self.count(len(series) - 1)
+        return self.fresh()
+
+    def widen_dict(self, snapshots):
+        current = snapshots[-1]
+        widened = {}
+        for key, value in current.items():
+            if all(key in snapshot for snapshot in snapshots):
+                widened[key] = self.widen_value([snapshot[key] for snapshot in snapshots])
+            else:
+                widened[key] = value
+        return widened
+
+    # 返回加宽后的 (栈的各项, 内存, 存储)，栈的深度在迭代之间变化时返回 None
+    def widen(self, snapshots):
+        stacks = [snapshot[0] for snapshot in snapshots]
+        if any(len(stack) != len(stacks[-1]) for stack in stacks):
+            return None
+        stack = [self.widen_value([s[i] for s in stacks]) for i in range(len(stacks[-1]))]
+        mem = self.widen_dict([snapshot[1] for snapshot in snapshots])
+        storage = self.widen_dict([snapshot[2] for snapshot in snapshots])
+        return stack, mem, storage
@@ -40,17 +40,6 @@ def has_dependencies_installed():
         logging.critical(e)
         logging.critical("Z3 is not available. Please install z3 from https://github.com/Z3Prover/z3.")
         return False
-        # 实验
-    if not cmd_exists("evm"):
-        logging.critical("Please install evm from go-ethereum and make sure it is in the path.")
-        return False
-    else:
-        cmd = "evm --version"
-        out = run_command(cmd).strip()
-        evm_version = re.findall(r"evm version (\d*.\d*.\d*)", out)[0]
-        tested_evm_version = '1.7.3'
-        if compare_versions(evm_version, tested_evm_version) > 0:
-            logging.warning("You are using evm version %s. The supported version is %s" % (evm_version, tested_evm_version))
 
     if not cmd_exists("solc"):
         logging.critical("solc is missing. Please install the solidity compiler and make sure solc is in the path.")
@@ -77,7 +66,9 @@ def run_solidity_analysis(inputs):
     inputs (list): 一个字典列表，每个字典代表一个要分析的合约，
                    包含分析所需的信息，例如：
                    - 'contract': 合约的完全限定名称 (e.g., "path/to/file.sol:MyContract")
-                   - 'disasm_file': 反汇编后的EVM字节码文件路径
+                   - 'disasm_file': 反汇编文件路径，用作结果文件名的前缀
+                   - 'bytecode': 去掉结尾 hash 的运行时字节码
+                   - 'contracts': 同一次编译得到的所有合约的运行时字节码
                    - 'source_map': SourceMap对象，用于字节码到源代码的映射
                    - 'source_file': 原始Solidity源文件路径
                    - 'c_source': 合约所属的源文件路径
@@ -100,11 +91,13 @@ def run_solidity_analysis(inputs):
         logging.info("contract %s:", inp['contract'])
 
         # 调用核心符号执行引擎 symExec.run 进行分析
-        # 传入反汇编文件路径、源代码映射对象和源文件路径
+        # 传入反汇编文件路径、源代码映射对象、源文件路径和字节码
         result, return_code = symExec.run(
             disasm_file=inp['disasm_file'],
             source_map=inp['source_map'],
-            source_file=inp['source']
+            source_file=inp['source'],
+            bytecode=inp['bytecode'],
+            contracts=inp['contracts']
         )
 
         # 尝试将当前合约的分析结果 (result) 添加到总结果字典 (results) 中
@@ -185,11 +178,19 @@ def main():
     parser.add_argument("-gl",  "--gaslimit",       help="Limit Gas", action="store", dest="gas_limit", type=int)
     parser.add_argument("-rp",   "--root-path",     help="Root directory path used for the online version", action="store", dest="root_path", type=str)
     parser.add_argument("-ll",  "--looplimit",      help="Limit number of loops", action="store", dest="loop_limit", type=int)
+    parser.add_argument("-lw",  "--loop-widening",  help="Widen the values a loop changes after this many iterations", action="store", dest="loop_widening", type=int)
     parser.add_argument("-dl",  "--depthlimit",     help="Limit DFS depth", action="store", dest="depth_limit", type=int)
     parser.add_argument("-ap",  "--allow-paths",    help="Allow a given path for imports", action="store", dest="allow_paths", type=str)
     parser.add_argument("-glt", "--global-timeout", help="Timeout for symbolic execution", action="store", dest="global_timeout", type=int)
-
-    parser.add_argument( "-e",   "--evm",                    help="Do not remove the .evm file.", action="store_true")
+    parser.add_argument("-pw",  "--parallel-workers", help="Number of worker processes in parallel mode", action="store", dest="parallel_workers", type=int)
+    parser.add_argument("-ft",  "--function-timeout", help="Timeout for the symbolic execution of one function in per-function mode", action="store", dest="function_timeout", type=int)
+    parser.add_argument("-qcs", "--query-cache-size", help="Number of solver results kept in the query cache, 0 disables it", action="store", dest="query_cache_size", type=int)
+    parser.add_argument("-sc",  "--solver-cache", help="SQLite file that keeps solver results across runs", action="store", dest="solver_cache", type=str)
+    parser.add_argument("-scs", "--solver-cache-size", help="Maximum number of results kept in the solver cache file, 0 means no limit", action="store", dest="solver_cache_size", type=int)
+    parser.add_argument("-ss",  "--search-strategy", help="Order in which paths are explored", action="store", dest="search_strategy", choices=["dfs", "bfs", "random", "coverage"])
+    parser.add_argument("-md",  "--merge-distance", help="Number of blocks after a branch within which its two sides wait to be merged", action="store", dest="merge_distance", type=int)
+
+    parser.add_argument( "-e",   "--evm",                    help="Do not remove the .evm and .evm.disasm files.", action="store_true")
     parser.add_argument( "-w",   "--web",                    help="Run Oyente for web service", action="store_true")
     parser.add_argument( "-j",   "--json",                   help="Redirect results to a json file.", action="store_true")
     parser.add_argument( "-p",   "--paths",                  help="Print path condition information.", action="store_true")
@@ -197,7 +198,9 @@ def main():
     parser.add_argument( "-st",  "--state",                  help="Get input state from state.json", action="store_true")
     parser.add_argument( "-r",   "--report",                 help="Create .report file.", action="store_true")
     parser.add_argument( "-v",   "--verbose",                help="Verbose output, print everything.", action="store_true")
-    parser.add_argument( "-pl",  "--parallel",               help="Run Oyente in parallel. Note: The performance may depend on the contract", action="store_true")
+    parser.add_argument( "-pl",  "--parallel",               help="Explore the paths of a contract in a pool of worker processes", action="store_true")
+    parser.add_argument( "-pf",  "--parallel-functions",     help="Analyze every public function in its own worker process", action="store_true")
+    parser.add_argument( "-sm",  "--state-merging",          help="Merge the two sides of a branch when they reach the same block", action="store_true")
     parser.add_argument( "-b",   "--bytecode",               help="read bytecode in source instead of solidity file.", action="store_true")
     parser.add_argument( "-a",   "--assertion",              help="Check assertion failures.", action="store_true")
     parser.add_argument( "-sj",  "--standard-json",          help="Support Standard JSON input", action="store_true")
@@ -240,6 +243,8 @@ def main():
     global_params.DEBUG_MODE = 1 if args.debug else 0
     global_params.GENERATE_TEST_CASES = 1 if args.generate_test_cases else 0
     global_params.PARALLEL = 1 if args.parallel else 0
+    global_params.PARALLEL_FUNCTIONS = 1 if args.parallel_functions else 0
+    global_params.STATE_MERGING = 1 if args.state_merging else 0
     
     if args.target_contracts and args.bytecode:
         parser.error('Targeted contracts cannot be specifed when the bytecode is provided (Instead of Solidity source code).')
@@ -251,6 +256,22 @@ def main():
         global_params.GAS_LIMIT = args.gas_limit
     if args.loop_limit:
         global_params.LOOP_LIMIT = args.loop_limit
+    if args.loop_widening is not None:
+        global_params.LOOP_WIDENING = args.loop_widening
+    if args.parallel_workers:
+        global_params.PARALLEL_WORKERS = args.parallel_workers
+    if args.function_timeout:
+        global_params.FUNCTION_TIMEOUT = args.function_timeout
+    if args.search_strategy:
+        global_params.SEARCH_STRATEGY = args.search_strategy
+    if args.merge_distance is not None:
+        global_params.MERGE_DISTANCE = args.merge_distance
+    if args.query_cache_size is not None:
+        global_params.QUERY_CACHE_SIZE = args.query_cache_size
+    if args.solver_cache:
+        global_params.SOLVER_CACHE = args.solver_cache
+    if args.solver_cache_size is not None:
+        global_params.SOLVER_CACHE_SIZE = args.solver_cache_size
     if global_params.WEB:
         if args.global_timeout and args.global_timeout < global_params.GLOBAL_TIMEOUT:
             global_params.GLOBAL_TIMEOUT = args.global_timeout
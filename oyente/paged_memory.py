@@ -0,0 +1,205 @@
+# 字节级的 EVM 内存(SHA3 的输入从这里取): 按 4 KiB 的页存放在 bytearray 中，分叉时两个状态共享所有的页，
+# 哪一方写一页时才复制这一页(写时复制)。具体值用 int.to_bytes 一次写入一个字，
+# 符号值的字节不能放进 bytearray，记录在 overlay 中，对应的页里写 0。
+# Byte-addressed memory of a path, the input of SHA3. Pages are shared between
+# the copies made at a fork and copied by the first copy that writes them.
+# overlay maps the address of a byte of a symbolic word to (word, byte index),
+# byte 0 being the most significant one as in MSTORE. unknown holds the
+# ranges written by instructions that are not simulated (CALLDATACOPY,
+# RETURNDATACOPY, the output of CALL, ...), SHA3 of those bytes has no value.
+
+from z3 import BitVecVal, Concat, Extract
+
+from utils import ceil32
+
+PAGE_SIZE = 4096
+WORD_SIZE = 32
+UINT_MASK = 2 ** 256 - 1
+
+
+class PagedMemory(object):
+    def __init__(self, pages=None, overlay=None, size=0, unknown=None):
+        # page index -> bytearray of PAGE_SIZE bytes, missing pages are zero
+        self.pages = pages if pages is not None else {}
+        # the pages only this object refers to, the others are copied before a write
+        self.owned = set(self.pages)
+        self.overlay = overlay if overlay is not None else {}
+        # bytes up to the end of the highest word written, len() of the old list
+        self.size = size
+        # [(start, end)] of the bytes with unknown content, end None is unbounded
+        self.unknown = unknown if unknown is not None else []
+
+    def __len__(self):
+        return self.size
+
+    def __eq__(self, other):
+        if not isinstance(other, PagedMemory):
+            return NotImplemented
+        if self.size != other.size or self.unknown != other.unknown or len(self.overlay) != len(other.overlay):
+            return False
+        for address, (word, index) in self.overlay.items():
+            entry = other.overlay.get(address)
+            if entry is None or entry[1] != index or not word.eq(entry[0]):
+                return False
+        for index in set(self.pages) | set(other.pages):
+            page = self.pages.get(index)
+            other_page = other.pages.get(index)
+            if page is not other_page and self._page(index) != other._page(index):
+                return False
+        return True
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def copy(self):
+        # both sides now share every page
+        self.owned = set()
+        memory = PagedMemory(dict(self.pages), dict(self.overlay), self.size, list(self.unknown))
+        memory.owned = set()
+        return memory
+
+    def _page(self, index):
+        page = self.pages.get(index)
+        return page if page is not None else bytearray(PAGE_SIZE)
+
+    def _writable_page(self, index):
+        if index not in self.owned:
+            self.pages[index] = bytearray(self._page(index))
+            self.owned.add(index)
+        return self.pages[index]
+
+    def _write(self, address, data):
+        offset = 0
+        while offset < len(data):
+            index, start = divmod(address + offset, PAGE_SIZE)
+            length = min(PAGE_SIZE - start, len(data) - offset)
+            self._writable_page(index)[start:start + length] = data[offset:offset + length]
+            offset += length
+
+    def read(self, address, length):
+        chunks = []
+        end = address + length
+        while address < end:
+            index, start = divmod(address, PAGE_SIZE)
+            length = min(PAGE_SIZE - start, end - address)
+            page = self.pages.get(index)
+            chunks.append(bytes(page[start:start + length]) if page is not None else bytes(length))
+            address += length
+        return b"".join(chunks)
+
+    def _overwrite(self, address, length):
+        self.size = max(self.size, ceil32(address + length))
+        if self.overlay:
+            for byte_address in range(address, address + length):
+                self.overlay.pop(byte_address, None)
+        if self.unknown:
+            self._mark_known(address, address + length)
+
+    # MSTORE: value 是 int 或者 256 位的 z3 表达式
+    def store_word(self, address, value):
+        self._overwrite(address, WORD_SIZE)
+        if isinstance(value, int):
+            self._write(address, (value & UINT_MASK).to_bytes(WORD_SIZE, "big"))
+        else:
+            self._write(address, bytes(WORD_SIZE))
+            for i in range(WORD_SIZE):
+                self.overlay[address + i] = (value, i)
+
+    # MSTORE8: 字的最低字节
+    def store_byte(self, address, value):
+        self._overwrite(address, 1)
+        if isinstance(value, int):
+            self._write(address, bytes([value & 0xff]))
+        else:
+            self._write(address, bytes(1))
+            self.overlay[address] = (value, WORD_SIZE - 1)
+
+    # CODECOPY
+    def store_bytes(self, address, data):
+        self._overwrite(address, len(data))
+        self._write(address, data)
+
+    # 没有模拟的写入: start 或 length 是符号值时整个内存都未知
+    def forget(self, start, length):
+        if not isinstance(start, int):
+            self.unknown = [(0, None)]
+        elif not isinstance(length, int):
+            self.unknown.append((start, None))
+        elif length > 0:
+            self.unknown.append((start, start + length))
+
+    def _mark_known(self, start, end):
+        ranges = []
+        for low, high in self.unknown:
+            if (high is not None and high <= start) or low >= end:
+                ranges.append((low, high))
+                continue
+            if low < start:
+                ranges.append((low, start))
+            if high is None or high > end:
+                ranges.append((end, high))
+        self.unknown = ranges
+
+    def is_known(self, start, end):
+        return not any((high is None or high > start) and low < end for low, high in self.unknown)
+
+    # SHA3 的输入: 全是具体值时返回 bytes，有符号值时返回各个字(最后一个可能不满 32 字节)的 z3 项，
+    # 有未知的字节或者超出已写入的内存时返回 None
+    def hash_input(self, start, length):
+        end = start + length
+        if length and end > self.size or not self.is_known(start, end):
+            return None
+        data = self.read(start, length)
+        if not any(start <= address < end for address in self.overlay):
+            return data
+        return [self._word_term(offset, data[offset - start: min(offset + WORD_SIZE, end) - start])
+                for offset in range(start, end, WORD_SIZE)]
+
+    # 连续的具体字节合并为一个常量，同一个符号字中连续的字节合并为一个 Extract
+    def _word_term(self, address, chunk):
+        pieces = []
+        for i in range(len(chunk)):
+            entry = self.overlay.get(address + i)
+            source, index = entry if entry is not None else (None, i)
+            last = pieces[-1] if pieces else None
+            if last is not None and last[0] is source and last[1] + last[2] == index:
+                last[2] += 1
+            else:
+                pieces.append([source, index, 1])
+        terms = []
+        for source, index, count in pieces:
+            if source is None:
+                terms.append(BitVecVal(int.from_bytes(chunk[index: index + count], "big"), 8 * count))
+            elif count == WORD_SIZE:
+                terms.append(source)
+            else:
+                terms.append(Extract(8 * (WORD_SIZE - index) - 1, 8 * (WORD_SIZE - index - count), source))
+        return terms[0] if len(terms) == 1 else Concat(terms)
+
+    # SHA3 的输入 memory[start: start + length] 的标识: 内容相同的输入得到相等的 key。
+    # 与列表的切片一样，超出 size 的部分被截掉
+    def key(self, start, length):
+        end = min(start + length, self.size)
+        if end <= start:
+            return b""
+        data = self.read(start, end - start)
+        if not self.overlay:
+            return data
+        symbolic = tuple((address - start,) + self.overlay[address]
+                         for address in sorted(self.overlay) if start <= address < end)
+        return (data, symbolic) if symbolic else data
+
+    # 进程之间传递时的形式，z3 表达式由 serialization 处理
+    def dump(self):
+        return {"size": self.size,
+                "pages": dict((index, bytes(page)) for index, page in self.pages.items()),
+                "overlay": dict(self.overlay),
+                "unknown": list(self.unknown)}
+
+    @classmethod
+    def load(cls, data):
+        pages = dict((index, bytearray(page)) for index, page in data["pages"].items())
+        return cls(pages, dict(data["overlay"]), data["size"], list(data["unknown"]))
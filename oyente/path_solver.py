@@ -0,0 +1,277 @@
+# 约束独立性切分(constraint independence，与 KLEE 相同)：
+# 一次查询只与路径条件中和它(传递地)共享变量的约束有关。路径条件本身是可满足的，
+# 与查询没有共同变量的约束不会改变结果，所以只把相关的连通分量发给 z3。
+# Constraint independence slicing. PathSolver keeps the path condition of the
+# running state, a query is checked as assumptions on top of it. A check sends
+# only the part of the path condition connected to the query through shared
+# variables, which is enough because the path condition itself is satisfiable.
+
+import itertools
+from collections import OrderedDict
+
+from z3 import (Bool, BoolVal, Implies, Model, Solver, Z3_OP_UNINTERPRETED, is_app,
+                is_expr, sat, unsat)
+
+
+# 表达式中的变量名，cache 以 AST id 为 key 并持有表达式，避免 id 被 z3 回收后重用
+def expr_vars(expr, cache):
+    entry = cache.get(expr.get_id())
+    if entry is not None:
+        return entry[1]
+    todo = [expr]
+    while todo:
+        e = todo[-1]
+        if e.get_id() in cache:
+            todo.pop()
+            continue
+        if not is_app(e):
+            cache[e.get_id()] = (e, frozenset())
+            todo.pop()
+            continue
+        if e.num_args() == 0:
+            if e.decl().kind() == Z3_OP_UNINTERPRETED:
+                cache[e.get_id()] = (e, frozenset([e.decl().name()]))
+            else:
+                cache[e.get_id()] = (e, frozenset())
+            todo.pop()
+            continue
+        children = [e.arg(i) for i in range(e.num_args())]
+        missing = [c for c in children if c.get_id() not in cache]
+        if missing:
+            todo.extend(missing)
+            continue
+        names = frozenset()
+        # constraints on the same uninterpreted function (the SHA3 model) are
+        # not independent even without common variables
+        if e.decl().kind() == Z3_OP_UNINTERPRETED:
+            names = frozenset([e.decl().name()])
+        for c in children:
+            names = names | cache[c.get_id()][1]
+        cache[e.get_id()] = (e, names)
+        todo.pop()
+    return cache[expr.get_id()][1]
+
+
+# expr_vars 的结果，最近最少使用的先删除。路径条件的子项很多，不限大小时整个运行中的约束都留在内存里
+class VarCache(object):
+    def __init__(self, max_size):
+        self.max_size = max_size
+        # AST id -> (term, variable names), least recently used first
+        self.entries = OrderedDict()
+
+    def vars(self, expr):
+        key = expr.get_id()
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            return entry[1]
+        # the subterms are added before expr, they go first
+        names = expr_vars(expr, self.entries)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return names
+
+
+def _find(parent, name):
+    root = parent.setdefault(name, name)
+    while root != parent[root]:
+        parent[root] = parent[parent[root]]
+        root = parent[root]
+    return root
+
+
+# 返回 constraints 中与 query 连通的约束(保持原来的顺序)，
+# 没有变量的约束总是保留
+def slice_constraints(constraints, query, var_cache):
+    parent = {}
+    constraint_vars = []
+    for constraint in constraints:
+        names = var_cache.vars(constraint) if is_expr(constraint) else frozenset()
+        constraint_vars.append(names)
+        first = None
+        for name in names:
+            root = _find(parent, name)
+            if first is None:
+                first = root
+            elif root != first:
+                parent[root] = first
+    wanted = set()
+    for expr in query:
+        if is_expr(expr):
+            for name in var_cache.vars(expr):
+                wanted.add(_find(parent, name))
+    sliced = []
+    for constraint, names in zip(constraints, constraint_vars):
+        if not names or _find(parent, next(iter(names))) in wanted:
+            sliced.append(constraint)
+    return sliced
+
+
+# 查询约束作为 assumptions 交给 PathSolver.check()，调用者不再 push()/add()/pop()。
+# 求解器内部有两种方式：
+#   scopes：在 z3 中 push 一个 scope 加入查询约束，下一次查询前 pop；
+#   assumptions：每个查询约束 e 对应一个跟踪文字 b，只断言一次 Implies(b, e)，
+#   然后 check(b)，z3 学到的子句在查询之间保留。
+# Queries are checked either in a scope of their own or under tracking
+# literals, each literal implying one query constraint. The implication is
+# asserted once at the scope of the path prefix, so the clauses z3 learns
+# survive from one query to the next.
+LITERAL_PREFIX = "track!"
+
+
+def strip_literals(model):
+    decls = [d for d in model.decls() if not d.name().startswith(LITERAL_PREFIX)]
+    if len(decls) == len(model):
+        return model
+    stripped = Model()
+    for decl in decls:
+        stripped.update_value(decl, model[decl])
+    return stripped
+
+
+# z3 求解器加上已加载的约束列表，每个约束一个 scope，
+# load() 只替换与已加载约束不同的后缀，保持增量求解
+class ScopedSolver(object):
+    def __init__(self, timeout, assumptions=False):
+        self.solver = Solver()
+        self.solver.set("timeout", timeout)
+        self.loaded = []
+        self.assumptions = assumptions
+        # the scope of the last query stays open so that its model can be read
+        self.query_open = False
+        # ast id -> (expr, literal), and (scope, id) in the order they were asserted
+        self.literals = {}
+        self.literal_scopes = []
+
+    def load(self, constraints):
+        self.close_query()
+        common = 0
+        for loaded, expr in zip(self.loaded, constraints):
+            if loaded is not expr:
+                break
+            common += 1
+        if len(self.loaded) > common:
+            self.solver.pop(len(self.loaded) - common)
+            # the implications asserted in the popped scopes are gone
+            while self.literal_scopes and self.literal_scopes[-1][0] > common:
+                del self.literals[self.literal_scopes.pop()[1]]
+        del self.loaded[common:]
+        for expr in constraints[common:]:
+            self.append(expr)
+
+    def append(self, expr):
+        self.close_query()
+        self.solver.push()
+        self.solver.add(expr)
+        self.loaded.append(expr)
+
+    def literal(self, expr):
+        if not is_expr(expr):
+            expr = BoolVal(expr)
+        entry = self.literals.get(expr.get_id())
+        if entry is None:
+            literal = Bool("%s%d" % (LITERAL_PREFIX, next(_literal_ids)))
+            self.solver.add(Implies(literal, expr))
+            entry = (expr, literal)
+            self.literals[expr.get_id()] = entry
+            self.literal_scopes.append((len(self.loaded), expr.get_id()))
+        return entry[1]
+
+    def check(self, query):
+        self.close_query()
+        if self.assumptions:
+            return self.solver.check(*[self.literal(expr) for expr in query])
+        self.solver.push()
+        self.solver.add(*query)
+        self.query_open = True
+        return self.solver.check()
+
+    def close_query(self):
+        if self.query_open:
+            self.solver.pop()
+            self.query_open = False
+
+
+_literal_ids = itertools.count()
+
+
+class PathSolver(object):
+    def __init__(self, timeout, cache=None, disk_cache=None, assumptions=False, var_cache_size=65536):
+        # the whole path condition
+        self.full = ScopedSolver(timeout, assumptions)
+        # the slice of the path condition used by the last query, consecutive
+        # queries of a path mostly share it
+        self.sliced = ScopedSolver(timeout, assumptions)
+        self.var_cache = VarCache(var_cache_size)
+        self.last = self.full.solver
+        # QueryCache shared by all checks, None disables it
+        self.cache = cache
+        self.last_key = []
+        # SolverCache kept on disk across runs, asked after the in-memory cache
+        self.disk_cache = disk_cache
+        self.cached_model = None
+
+    # 把求解器恢复为某个状态的路径条件
+    def load(self, path_condition):
+        self.full.load(path_condition)
+
+    # 添加的约束属于路径条件(调用者同时把它加入 path_condition)
+    def add(self, *exprs):
+        for expr in exprs:
+            self.full.append(expr)
+
+    # 检查路径条件加上 assumptions 是否可满足，assumptions 不会留在求解器中
+    def check(self, *assumptions):
+        query = list(assumptions)
+        path_condition = self.full.loaded
+        if query:
+            constraints = slice_constraints(path_condition, query, self.var_cache)
+        else:
+            # e.g. the model of a test case, the whole path condition is needed
+            constraints = path_condition
+        self.cached_model = None
+        key = constraints + query
+        self.last_key = key
+        for cache in (self.cache, self.disk_cache):
+            if cache is None:
+                continue
+            cached = cache.lookup(key)
+            if cached is not None:
+                result, self.cached_model = cached
+                if cache is self.disk_cache and self.cache is not None:
+                    self.cache.store(key, result, self.cached_model)
+                return result
+        result = self._check(constraints, query)
+        if result == sat or result == unsat:
+            # only sat and unsat are cached, unknown depends on the timeout
+            model = self.model() if result == sat else None
+            for cache in (self.cache, self.disk_cache):
+                if cache is not None:
+                    cache.store(key, result, model)
+        return result
+
+    def _check(self, constraints, query):
+        if len(constraints) == len(self.full.loaded):
+            target = self.full
+        else:
+            target = self.sliced
+            target.load(constraints)
+        self.last = target.solver
+        return target.check(query)
+
+    # the model of a sliced query only assigns the variables of its slice
+    def model(self):
+        if self.cached_model is not None:
+            return self.cached_model
+        return strip_literals(self.last.model())
+
+    # 上一次查询涉及的变量名，model() 只保证这些变量的值满足那次查询
+    def query_vars(self):
+        names = set()
+        for expr in self.last_key:
+            if is_expr(expr):
+                names |= self.var_cache.vars(expr)
+        return names
+
+    def reason_unknown(self):
+        return self.last.reason_unknown()
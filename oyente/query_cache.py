@@ -0,0 +1,125 @@
+# 求解结果缓存(与 KLEE 的 counterexample cache 相同)：
+# 以约束集合为 key 记录 sat(连同 model)或 unsat。
+#   1. 一个 unsat 集合的超集也是 unsat；
+#   2. 一个 sat 集合的子集也是 sat，它的 model 同样适用；
+#   3. 其他 sat 集合的 model 如果恰好满足新的约束，就不必调用 z3。
+# Cache of solver results keyed by the set of constraints of a query. The
+# z3 AST ids identify the constraints, z3 shares structurally equal terms so
+# the same constraint built twice has the same id while the cache holds it.
+
+from collections import OrderedDict, deque
+
+from z3 import is_expr, is_true, sat, unsat
+
+STATS = ("hit", "unsat_subset", "sat_superset", "model_reuse", "miss")
+
+
+def _key(constraints):
+    return frozenset(c.get_id() if is_expr(c) else ("value", c) for c in constraints)
+
+
+# 约束 id 与 ("value", c) 之间的顺序，z3 的 id 越大越晚创建
+def _order(element):
+    return (1, element) if isinstance(element, int) else (0, 0)
+
+
+def satisfies(model, constraints):
+    if not hasattr(model, "eval"):
+        # a ModelSnapshot read from the disk cache cannot evaluate expressions
+        return False
+    for c in constraints:
+        if is_expr(c):
+            if not is_true(model.eval(c, model_completion=True)):
+                return False
+        elif not c:
+            return False
+    return True
+
+
+# 未命中时不扫描全部条目，由索引找出候选:
+#   unsat 条目按其中 id 最大的约束(通常是最后加入路径的分支条件)索引，它是查询的子集时这个约束在查询中；
+#   sat 条目按每个约束索引，它是查询的超集时包含查询的每个约束，取其中条目最少的一个约束；
+#   model 只尝试最近的 model_tries 个 sat 条目。
+# Misses are answered from indexes instead of a scan of every entry: an unsat
+# subset of the query is found through its largest constraint id, a sat
+# superset through the query constraint that appears in the fewest entries.
+class QueryCache(object):
+    def __init__(self, max_size, model_tries=4):
+        self.max_size = max_size
+        # number of cached models tried on a new query
+        self.model_tries = model_tries
+        # key -> (constraints, result, model), least recently used first
+        self.entries = OrderedDict()
+        # largest element of an unsat key -> keys
+        self.unsat_index = {}
+        # element of a sat key -> keys
+        self.sat_index = {}
+        # the latest sat keys, most recent last
+        self.recent_sat = deque(maxlen=model_tries)
+        self.stats = dict.fromkeys(STATS, 0)
+
+    # 返回 (result, model)，缓存不能回答时返回 None
+    def lookup(self, constraints):
+        key = _key(constraints)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.stats["hit"] += 1
+            return entry[1], entry[2]
+        for element in key:
+            for other in self.unsat_index.get(element, ()):
+                if other <= key:
+                    self.stats["unsat_subset"] += 1
+                    return unsat, None
+        if key:
+            candidates = min((self.sat_index.get(element, ()) for element in key), key=len)
+            for other in candidates:
+                if key <= other:
+                    self.stats["sat_superset"] += 1
+                    return sat, self.entries[other][2]
+        for other in reversed(list(self.recent_sat)):
+            entry = self.entries.get(other)
+            if entry is not None and satisfies(entry[2], constraints):
+                self.stats["model_reuse"] += 1
+                self.store(constraints, sat, entry[2])
+                return sat, entry[2]
+        self.stats["miss"] += 1
+        return None
+
+    # only sat and unsat are cached, unknown depends on the timeout
+    def store(self, constraints, result, model=None):
+        if self.max_size <= 0:
+            return
+        key = _key(constraints)
+        if key in self.entries:
+            self._unindex(key)
+        self.entries[key] = (list(constraints), result, model)
+        self.entries.move_to_end(key)
+        self._index(key)
+        if len(self.entries) > self.max_size:
+            self._unindex(next(iter(self.entries)))
+            self.entries.popitem(last=False)
+
+    def _index(self, key):
+        if self.entries[key][1] == unsat:
+            if key:
+                self.unsat_index.setdefault(max(key, key=_order), set()).add(key)
+        else:
+            for element in key:
+                self.sat_index.setdefault(element, set()).add(key)
+            self.recent_sat.append(key)
+
+    def _unindex(self, key):
+        if self.entries[key][1] == unsat:
+            if key:
+                self._discard(self.unsat_index, max(key, key=_order), key)
+        else:
+            for element in key:
+                self._discard(self.sat_index, element, key)
+
+    @staticmethod
+    def _discard(index, element, key):
+        keys = index[element]
+        keys.discard(key)
+        if not keys:
+            del index[element]
@@ -0,0 +1,114 @@
+# 符号执行的搜索策略：决定工作表(worklist)中下一个要执行的状态。
+# Search strategies for the worklist explorer in symExec. Each strategy owns the
+# pending states and decides which one is executed next.
+
+import heapq
+import random
+from collections import deque
+
+
+class SearchStrategy(object):
+    def __init__(self):
+        self.states = []
+
+    def push(self, state):
+        self.states.append(state)
+
+    def push_all(self, states):
+        for state in states:
+            self.push(state)
+
+    def pop(self):
+        raise NotImplementedError
+
+    def __len__(self):
+        return len(self.states)
+
+
+# 深度优先，与原来的递归顺序一致：先走跳转目标，再走 falls_to
+class DepthFirstSearch(SearchStrategy):
+    def push_all(self, states):
+        # successors come in [jump target, falls_to] order, the last pushed
+        # state is executed first
+        for state in reversed(states):
+            self.push(state)
+
+    def pop(self):
+        return self.states.pop()
+
+
+class BreadthFirstSearch(SearchStrategy):
+    def __init__(self):
+        self.states = deque()
+
+    def pop(self):
+        return self.states.popleft()
+
+
+# 随机路径：与 KLEE 的 random-path 一样偏向分叉少的浅层状态
+class RandomPathSearch(SearchStrategy):
+    def __init__(self, seed=None):
+        SearchStrategy.__init__(self)
+        self.random = random.Random(seed)
+
+    def pop(self):
+        # a state that went through n forks is picked with weight 2^-n, which is
+        # the probability of reaching it by a random walk from the root
+        weights = [2.0 ** -state.forks for state in self.states]
+        point = self.random.random() * sum(weights)
+        idx = len(self.states) - 1
+        for i, weight in enumerate(weights):
+            point -= weight
+            if point <= 0:
+                idx = i
+                break
+        self.states[idx], self.states[-1] = self.states[-1], self.states[idx]
+        return self.states.pop()
+
+
+# 覆盖率引导：优先执行访问次数最少的块，其中含有 CALL/SSTORE 等指令的块优先
+class CoverageGuidedSearch(SearchStrategy):
+    def __init__(self, interesting_blocks=()):
+        SearchStrategy.__init__(self)
+        self.interesting_blocks = set(interesting_blocks)
+        self.block_visits = {}
+        self.counter = 0
+
+    def _priority(self, state):
+        visits = self.block_visits.get(state.block, 0)
+        interesting = 0 if state.block in self.interesting_blocks else 1
+        return (visits, interesting, state.depth)
+
+    def push(self, state):
+        self.counter += 1
+        heapq.heappush(self.states, (self._priority(state), self.counter, state))
+
+    def pop(self):
+        while True:
+            priority, counter, state = heapq.heappop(self.states)
+            current = self._priority(state)
+            # the block may have been visited since the state was queued,
+            # requeue it with its up to date priority
+            if current != priority and self.states and current > self.states[0][0]:
+                heapq.heappush(self.states, (current, counter, state))
+                continue
+            self.block_visits[state.block] = self.block_visits.get(state.block, 0) + 1
+            return state
+
+
+STRATEGIES = {
+    "dfs": DepthFirstSearch,
+    "bfs": BreadthFirstSearch,
+    "random": RandomPathSearch,
+    "coverage": CoverageGuidedSearch,
+}
+
+
+def get_strategy(name, **kwargs):
+    try:
+        strategy = STRATEGIES[name]
+    except KeyError:
+        raise ValueError("Unknown search strategy: %s" % name)
+    if strategy is CoverageGuidedSearch:
+        return strategy(kwargs.get("interesting_blocks", ()))
+    return strategy()
@@ -0,0 +1,105 @@
+# 把符号执行的状态转换成可以在进程之间传递(pickle)的形式。
+# z3 的表达式不能 pickle，所以所有表达式被收集起来写成一个 SMT-LIB 脚本，
+# 其余部分(栈、内存、存储里的具体值)保持原样，表达式的位置用 Z3Ref 占位。
+# Serialization of symbolic states for the process pool. z3 expressions cannot
+# be pickled, they are written out as one SMT-LIB script of (= __k<i> expr)
+# assertions and replaced by Z3Ref placeholders in the rest of the structure.
+
+from collections import namedtuple
+
+from z3 import Const, ExprRef, ModelRef, Solver, is_const, parse_smt2_string
+
+Z3Ref = namedtuple("Z3Ref", ["index"])
+
+KEY_PREFIX = "__k"
+
+
+# z3 的 model 只保留变量名和值的字符串，vulnerability 中生成警告时只用到这些
+class ModelSnapshot(object):
+    def __init__(self, assignments):
+        self.assignments = assignments
+
+    @classmethod
+    def from_model(cls, model):
+        return cls([(str(decl), str(model[decl])) for decl in model.decls()])
+
+    def decls(self):
+        return [name for name, _ in self.assignments]
+
+    def __getitem__(self, name):
+        return dict(self.assignments)[str(name)]
+
+
+def dumps(obj):
+    exprs = []
+    structure = _replace_exprs(obj, exprs, {})
+    s = Solver()
+    for i, expr in enumerate(exprs):
+        s.add(Const(KEY_PREFIX + str(i), expr.sort()) == expr)
+    return structure, s.to_smt2()
+
+
+def loads(data):
+    structure, smt2 = data
+    exprs = {}
+    for assertion in parse_smt2_string(smt2):
+        # z3 orders the arguments of = by itself, the key is not always on the left
+        key, expr = assertion.arg(0), assertion.arg(1)
+        if not _is_key(key):
+            key, expr = expr, key
+        exprs[int(str(key)[len(KEY_PREFIX):])] = expr
+    return _restore_exprs(structure, exprs)
+
+
+def _is_key(expr):
+    return is_const(expr) and expr.decl().name().startswith(KEY_PREFIX)
+
+
+def _replace_exprs(obj, exprs, indexes):
+    if isinstance(obj, ExprRef):
+        # the same AST can appear many times (e.g. in the path condition and on
+        # the stack), it is written to the script only once
+        ast_id = obj.get_id()
+        if ast_id not in indexes:
+            indexes[ast_id] = len(exprs)
+            exprs.append(obj)
+        return Z3Ref(indexes[ast_id])
+    if isinstance(obj, ModelRef):
+        return ModelSnapshot.from_model(obj)
+    if isinstance(obj, dict):
+        items = ((_replace_exprs(k, exprs, indexes), _replace_exprs(v, exprs, indexes)) for k, v in obj.items())
+        return _copy_dict(obj, items, lambda value: _replace_exprs(value, exprs, indexes))
+    if isinstance(obj, list):
+        # keeps list subclasses such as the EVM Stack
+        return type(obj)(_replace_exprs(item, exprs, indexes) for item in obj)
+    if isinstance(obj, tuple):
+        items = [_replace_exprs(item, exprs, indexes) for item in obj]
+        return type(obj)(*items) if hasattr(obj, "_fields") else tuple(items)
+    if isinstance(obj, (set, frozenset)):
+        return type(obj)(_replace_exprs(item, exprs, indexes) for item in obj)
+    return obj
+
+
+def _restore_exprs(obj, exprs):
+    if isinstance(obj, Z3Ref):
+        return exprs[obj.index]
+    if isinstance(obj, dict):
+        items = ((_restore_exprs(k, exprs), _restore_exprs(v, exprs)) for k, v in obj.items())
+        return _copy_dict(obj, items, lambda value: _restore_exprs(value, exprs))
+    if isinstance(obj, list):
+        return type(obj)(_restore_exprs(item, exprs) for item in obj)
+    if isinstance(obj, tuple):
+        items = [_restore_exprs(item, exprs) for item in obj]
+        return type(obj)(*items) if hasattr(obj, "_fields") else tuple(items)
+    if isinstance(obj, (set, frozenset)):
+        return type(obj)(_restore_exprs(item, exprs) for item in obj)
+    return obj
+
+
+# keeps dict subclasses such as StorageMap together with their attributes
+def _copy_dict(obj, items, convert):
+    if type(obj) is dict:
+        return dict(items)
+    copied = type(obj)(items)
+    copied.__dict__.update(convert(obj.__dict__))
+    return copied
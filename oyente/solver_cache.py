@@ -0,0 +1,128 @@
+# 跨运行保存求解结果的 SQLite 缓存，重复扫描同一批合约(或它们的克隆)时不必重新求解。
+# key 是查询的规范化 SMT-LIB(各约束的 s-expression 排序后连接)加上 TIMEOUT 的哈希，
+# 保存 sat/unsat 和 sat 时的 model。
+# Persistent cache of solver results. A query is identified by the SHA-256 of
+# its sorted SMT-LIB assertions and the solver timeout. Models are stored as
+# (name, value) strings and come back as serialization.ModelSnapshot.
+
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+
+from z3 import is_expr, sat, unsat
+
+from serialization import ModelSnapshot
+
+RESULTS = {"sat": sat, "unsat": unsat}
+# last_used of the hits is written in batches of this many keys
+TOUCH_BATCH = 256
+
+
+class SolverCache(object):
+    def __init__(self, path, max_entries, timeout, max_sexprs=65536):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        # the connection is opened lazily, a worker of the process pool must
+        # not use the connection of its parent
+        self.path = path
+        self.db = None
+        # ast id -> (expr, s-expression), holds the expr so that its id is not reused,
+        # least recently used first
+        self.sexprs = OrderedDict()
+        self.max_sexprs = max_sexprs
+        # rows in the table, read when the connection is opened and kept up to date
+        # by store(); other processes writing the file make it an estimate
+        self.count = 0
+        # key -> time of the hits whose last_used is not written yet
+        self.touched = {}
+        self.stats = {"hit": 0, "miss": 0}
+
+    def _connect(self):
+        if self.db is None:
+            self.db = sqlite3.connect(self.path, timeout=30)
+            # a lost entry only costs a solver call, no need to sync every write
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS results ("
+                            "key TEXT PRIMARY KEY, result TEXT, model TEXT, last_used REAL)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+            self.count = self.db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return self.db
+
+    def _sexpr(self, expr):
+        if not is_expr(expr):
+            return str(expr)
+        key = expr.get_id()
+        entry = self.sexprs.get(key)
+        if entry is not None:
+            self.sexprs.move_to_end(key)
+            return entry[1]
+        entry = (expr, expr.sexpr())
+        self.sexprs[key] = entry
+        while len(self.sexprs) > self.max_sexprs:
+            self.sexprs.popitem(last=False)
+        return entry[1]
+
+    def key(self, constraints):
+        text = "\n".join(sorted(set(self._sexpr(c) for c in constraints)))
+        text = "timeout %s\n%s" % (self.timeout, text)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    # 返回 (result, model)，没有记录时返回 None
+    def lookup(self, constraints):
+        db = self._connect()
+        key = self.key(constraints)
+        row = db.execute("SELECT result, model FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.stats["miss"] += 1
+            return None
+        self.stats["hit"] += 1
+        self.touched[key] = time.time()
+        if len(self.touched) >= TOUCH_BATCH:
+            self._flush_touched(db)
+        result, model = row
+        if model is not None:
+            model = ModelSnapshot([tuple(assignment) for assignment in json.loads(model)])
+        return RESULTS[result], model
+
+    def store(self, constraints, result, model=None):
+        db = self._connect()
+        if model is not None:
+            if not isinstance(model, ModelSnapshot):
+                model = ModelSnapshot.from_model(model)
+            model = json.dumps(model.assignments)
+        row = (self.key(constraints), str(result), model, time.time())
+        cursor = db.execute("INSERT OR IGNORE INTO results VALUES (?, ?, ?, ?)", row)
+        if cursor.rowcount:
+            self.count += 1
+        else:
+            db.execute("UPDATE results SET result = ?, model = ?, last_used = ? WHERE key = ?", row[1:] + row[:1])
+        if self.max_entries > 0 and self.count > self.max_entries:
+            self._evict(db)
+        db.commit()
+
+    # 超出 max_entries 时删除最久没有使用的记录，每次多删 10% 以免频繁删除。
+    # 只在这时数一次表中的行数，其它进程也可能写了这个文件
+    def _evict(self, db):
+        self._flush_touched(db)
+        self.count = db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        if self.count > self.max_entries:
+            excess = self.count - self.max_entries + self.max_entries // 10
+            cursor = db.execute("DELETE FROM results WHERE key IN "
+                                "(SELECT key FROM results ORDER BY last_used LIMIT ?)", (excess,))
+            self.count -= cursor.rowcount
+
+    def _flush_touched(self, db):
+        if self.touched:
+            db.executemany("UPDATE results SET last_used = ? WHERE key = ?",
+                           [(used, key) for key, used in self.touched.items()])
+            db.commit()
+            self.touched = {}
+
+    def close(self):
+        if self.db is not None:
+            self._flush_touched(self.db)
+            self.db.close()
+            self.db = None
@@ -6,12 +6,102 @@ import re  # 正则表达式库
 import six  # Python 2/3 兼容性库
 import ast  # 抽象语法树库 (用于解析变量名)
 import json # JSON 数据处理库
+from array import array # 紧凑的整数数组
+from bisect import bisect_left # 在有序的 PC 数组中二分查找
 
 import global_params # 导入全局参数
 
 from utils import run_command # 导入执行外部命令的工具函数
 from ast_helper import AstHelper # 导入处理Solidity AST的辅助类
 
+# SLOAD 的变量名是源代码片段中第一个运算符之前的部分
+OPERATORS = re.compile('[-+*/%|&^!><=]')
+
+# solc asm 中的指令名与反汇编器的指令名不同的情况
+ASM_NAME_ALIASES = {"ASSERTFAIL": "INVALID", "SHA3": "KECCAK256", "SUICIDE": "SELFDESTRUCT"}
+
+class SourceMapError(Exception):
+    """
+    反汇编的指令与 solc asm 对不上，源码映射不可用，整个分析要终止。
+    """
+    pass
+
+class InstructionPositions:
+    """
+    PC 到源代码位置的映射，按需计算。
+    指令与 solc asm 的 positions 按顺序对齐(跳过 tag 和空项)，只在查询某个 PC 时对齐到这条指令为止，
+    对齐的结果是一个整数数组: 第 i 条指令对应的 positions 下标，没有对应项时为 -1。
+    只出现在报告中的 PC 才会被查询，大部分指令不需要对齐。
+    对不上时记录 SourceMapError，之后查询这条指令及以后的 PC 都抛出同一个错误。
+    """
+    def __init__(self, positions, instrs=()):
+        """
+        :param positions: solc asm 的指令位置列表。
+        :param instrs: 反汇编得到的指令列表，按 PC 升序。
+        """
+        self.positions = positions
+        self.instrs = instrs
+        self.pcs = array('q', (instr.pc for instr in instrs)) # 第 i 条指令的 PC
+        self.indexes = array('i') # 已对齐的指令的 positions 下标
+        self.next_idx = 0 # 下一条指令从 positions 的这个下标开始对齐
+        self.error = None # 对齐失败时的 SourceMapError
+
+    def _align_next(self):
+        """
+        对齐下一条指令，与 solc asm 不一致时抛出 SourceMapError。
+        """
+        instr = self.instrs[len(self.indexes)]
+        positions = self.positions
+        idx = self.next_idx
+        found = -1
+        while idx < len(positions):
+            if not positions[idx]:
+                idx += 1
+                break
+            name = positions[idx]['name']
+            if name.startswith("tag"):
+                idx += 1
+                continue
+            if instr.arg is not None:
+                # PUSH 的值要相同，PUSH [tag] 等没有 value 的只比较名字
+                if not name.startswith("PUSH") or name == "PUSH" and int(positions[idx]['value'], 16) != instr.arg:
+                    self.error = SourceMapError("Source map error at pc %d" % instr.pc)
+                    raise self.error
+            elif name != instr.name and name != ASM_NAME_ALIASES.get(instr.name):
+                self.error = SourceMapError(F"Source map error, unknown name({name}) or instr_name({instr.name})")
+                raise self.error
+            found = idx
+            idx += 1
+            break
+        self.next_idx = idx
+        self.indexes.append(found)
+
+    def _index(self, pc):
+        """
+        :return: pc 对应的 positions 下标，没有时返回 -1。
+        """
+        i = bisect_left(self.pcs, pc)
+        if i == len(self.pcs) or self.pcs[i] != pc:
+            return -1
+        while len(self.indexes) <= i:
+            if self.error is not None:
+                raise self.error
+            self._align_next()
+        return self.indexes[i]
+
+    def __getitem__(self, pc):
+        idx = self._index(pc)
+        if idx < 0:
+            raise KeyError(pc)
+        return self.positions[idx]
+
+    def __contains__(self, pc):
+        return self._index(pc) >= 0
+
+    def get(self, pc, default=None):
+        idx = self._index(pc)
+        return self.positions[idx] if idx >= 0 else default
+
 class Source:
     """
     表示单个Solidity源文件及其内容。
@@ -48,8 +138,14 @@ class Source:
 
         :return: 包含所有换行符索引的列表。
         """
-        # 列表推导式，遍历文件内容，记录每个'\n'的索引
-        return [i for i, letter in enumerate(self.content) if letter == '\n']
+        # str.find 在 C 中扫描到下一个换行符，循环次数是行数而不是字符数
+        positions = []
+        find = self.content.find
+        i = find('\n')
+        while i != -1:
+            positions.append(i)
+            i = find('\n', i + 1)
+        return positions
 
 # SourceMap 类用于管理和查询源代码映射信息
 # ast_helper: AstHelper类的实例，存储着合约的各种索引和输出合约索引和状态的辅助类函数。
@@ -115,10 +211,15 @@ class SourceMap:
         self.source = self._get_source()
         # 获取当前合约编译后的指令位置列表 [{'begin': 25, 'end': 692, 'name': 'PUSH', 'value': '60'} ...]
         self.positions = self._get_positions()
-        # 指令PC到源代码位置信息的映射 {pc: {'begin': offset, 'end': offset}}
-        self.instr_positions = {} # 这个字典会在符号执行过程中填充
+        # 指令PC到源代码位置信息的映射 pc -> {'begin': offset, 'end': offset}，
+        # set_instructions() 之后按需对齐，见 InstructionPositions
+        self.instr_positions = InstructionPositions(self.positions)
         # 获取当前合约的状态变量名称集合
         self.var_names = self._get_var_names()
+        # var_names 的集合，用于 O(1) 查找，参数名在执行 CALLDATALOAD 时加入
+        self.var_name_set = set(self.var_names)
+        # 变量名 -> 在 var_names 中查找的标识符，见 _get_var_lookup_key
+        self.var_lookup_keys = {}
         # 获取当前合约中函数调用的源代码字符串列表 ['bytes32(11111)', 'owner.send(reward)', ...]
         self.func_call_names = self._get_func_call_names()
         # 获取当前合约中外部调用(call, delegatecall, callcode)的目标合约及源代码位置对
@@ -127,8 +228,33 @@ class SourceMap:
         self.func_name_to_params = self._get_func_name_to_params()
         # 获取当前合约的函数签名(hash)到函数名的映射 {'a0d7afb7': 'diff()', ...}
         self.sig_to_func = self._get_sig_to_func()
+        # 函数签名(hash)到不带参数列表的函数名的映射 {'a0d7afb7': 'diff', ...}
+        self.sig_to_func_name = self._get_sig_to_func_name()
+        # 参数名在 calldata 中的位置只取决于函数的参数列表
+        self.param_names = self._get_param_names() # {函数名: {参数在 calldata 中的位置: 参数名}}
+        self.func_call_name_set = set(self.func_call_names) # func_call_names 的集合，用于 O(1) 查找
+        # --- 以下按 PC 的表在第一次查询某个 PC 时填充 ---
+        self.source_codes = {} # {pc: 源代码片段}
+        self.storage_vars = {} # {pc: (变量名, 查找的标识符)}
         # --- ---
 
+    def set_instructions(self, instrs):
+        """
+        记录反汇编得到的指令，PC 到源代码位置的对齐在查询时才进行。
+
+        :param instrs: 按 PC 升序的指令列表。
+        """
+        self.instr_positions = InstructionPositions(self.positions, instrs)
+        self.source_codes = {}
+        self.storage_vars = {}
+
+    def is_func_call(self, pc):
+        """
+        :param pc: EVM指令的程序计数器。
+        :return: pc 处的源代码是否是一个函数调用。
+        """
+        return self.get_source_code(pc) in self.func_call_name_set
+
     def get_source_code(self, pc):
         """
         根据程序计数器(PC)获取对应的源代码片段。
@@ -136,16 +262,14 @@ class SourceMap:
         :param pc: EVM指令的程序计数器。
         :return: 对应的源代码字符串，如果找不到则返回空字符串。
         """
-        try:
-            # 从instr_positions获取PC对应的源代码偏移量
-            pos = self.instr_positions[pc]
-        except KeyError:
-            # 如果PC不在映射中，返回空字符串
-            return ""
-        begin = pos['begin'] # 开始偏移量
-        end = pos['end'] # 结束偏移量
-        # 从源代码内容中截取对应片段
-        return self.source.content[begin:end+1] # 注意：结束索引需要+1
+        source_code = self.source_codes.get(pc)
+        if source_code is None:
+            # 从instr_positions获取PC对应的源代码偏移量，PC不在映射中时为空字符串
+            pos = self.instr_positions.get(pc)
+            # 从源代码内容中截取对应片段，注意：结束索引需要+1
+            source_code = self.source.content[pos['begin']:pos['end'] + 1] if pos else ""
+            self.source_codes[pc] = source_code
+        return source_code
 
     def get_source_code_from_src(self, src):
         """
@@ -265,6 +389,20 @@ class SourceMap:
         :param var_name: 需要检查的变量名字符串 (可能包含点号或索引，如 "balances[msg.sender]").
         :return: 如果是参数或状态变量，返回原始变量名字符串；否则返回None。
         """
+        key = self._get_var_lookup_key(var_name)
+        if key is not None and key in self.var_name_set:
+            return var_name # 如果是，返回原始名称
+        return None # 如果不是参数或状态变量，返回None
+
+    def _get_var_lookup_key(self, var_name):
+        """
+        返回判断 var_name 是否是参数或状态变量时在已知变量名中查找的标识符，结果按变量名缓存。
+
+        :param var_name: 变量名字符串。
+        :return: 第一个标识符；无法被ast解析时是原始名称；没有标识符或者解析出错时返回None。
+        """
+        if var_name in self.var_lookup_keys:
+            return self.var_lookup_keys[var_name]
         try:
             # 使用ast库解析变量名字符串，提取其中的标识符(Name)
             # 例如 "balances[msg.sender]" 会提取出 "balances" 和 "msg", "sender"
@@ -272,18 +410,54 @@ class SourceMap:
                 node.id for node in ast.walk(ast.parse(var_name))
                 if isinstance(node, ast.Name)
             ]
-            # 检查第一个提取到的标识符 (通常是变量的根名称) 是否在已知变量名集合中
-            if names and names[0] in self.var_names:
-                return var_name # 如果是，返回原始名称
+            # 第一个提取到的标识符通常是变量的根名称
+            key = names[0] if names else None
         except SyntaxError:
-            # 如果变量名无法被ast解析 (可能不是有效的Python标识符或表达式)
-            # 直接检查原始名称是否在已知变量名中
-            if var_name in self.var_names:
-                return var_name
+            # 如果变量名无法被ast解析 (可能不是有效的Python标识符或表达式)，直接查找原始名称
+            key = var_name
         except Exception:
             # 捕获其他可能的解析错误
+            key = None
+        self.var_lookup_keys[var_name] = key
+        return key
+
+    def add_var_name(self, var_name):
+        """
+        把参数名加入已知变量名。
+
+        :param var_name: 参数名。
+        """
+        if var_name not in self.var_name_set:
+            self.var_names.append(var_name)
+            self.var_name_set.add(var_name)
+
+    def get_storage_var_name(self, pc):
+        """
+        SLOAD 读取的变量名: pc 处源代码中第一个运算符之前的部分。结果按 PC 缓存。
+
+        :param pc: SLOAD 指令的程序计数器。
+        :return: 是参数或状态变量时返回变量名，否则返回None。
+        """
+        entry = self.storage_vars.get(pc)
+        if entry is None:
+            var_name = OPERATORS.split(self.get_source_code(pc))[0].strip()
+            entry = (var_name, self._get_var_lookup_key(var_name))
+            self.storage_vars[pc] = entry
+        var_name, key = entry
+        return var_name if key is not None and key in self.var_name_set else None
+
+    def get_parameter_name(self, pc, func_name, param_idx):
+        """
+        CALLDATALOAD 读取的参数名。
+
+        :param pc: CALLDATALOAD 指令的程序计数器，它的源代码要以 "function" 开头。
+        :param func_name: 当前函数名。
+        :param param_idx: 参数在 calldata 中的位置 ((offset - 4) // 32)。
+        :return: 参数名，找不到时返回None。
+        """
+        if not self.get_source_code(pc).startswith("function"):
             return None
-        return None # 如果不是参数或状态变量，返回None
+        return self.param_names.get(func_name, {}).get(param_idx)
 
     def _convert_src_to_pos(self, src):
         """
@@ -315,6 +489,19 @@ class SourceMap:
             # 如果当前合约没有函数签名信息 (可能是接口或库)
             return {}
 
+    def _get_sig_to_func_name(self):
+        """
+        获取函数签名(hash)到函数名的映射，函数名去掉了参数列表。
+        例如: {'a0d7afb7': 'diff', ...}
+
+        :return: 签名到函数名的字典。
+        """
+        sig_to_func_name = {}
+        for sig, func in six.iteritems(self.sig_to_func):
+            match = re.match(r'(\w[\w\d_]*)\((.*)\)$', func)
+            sig_to_func_name[sig] = match.group(1) if match else func
+        return sig_to_func_name
+
     def _get_func_name_to_params(self):
         """
         获取当前合约的函数名到参数详细信息的映射。
@@ -342,6 +529,16 @@ class SourceMap:
                     calldataload_position += 1
         return func_name_to_params
 
+    def _get_param_names(self):
+        """
+        按函数名和参数在 calldata 中的位置查找参数名的表。
+
+        :return: 字典 {函数名: {参数在 calldata 中的位置: 参数名}}。
+        """
+        # 位置相同时后面的参数优先，与逐个比较时一样
+        return dict((func_name, dict((param['position'], param['name']) for param in params))
+                    for func_name, params in six.iteritems(self.func_name_to_params))
+
     def _get_source(self):
         """
         获取当前合约对应的Source对象。
@@ -0,0 +1,186 @@
+# 状态合并(STATE_MERGING): 同一个 JUMPI 分出的两个状态经过一个短的菱形(三元表达式、if 没有 else 等)
+# 到达同一个块时合并为一个状态，不同的栈/内存/存储值变为 If(cond, a, b)，路径条件变为析取，
+# 这样连续的分支不会让路径数翻倍。
+# State merging for the worklist explorer. MergingWorklist wraps a search
+# strategy: the states forked at a JUMPI wait for each other at the blocks they
+# reach, and two of them at the same block are merged by the callback given
+# by symExec. Forked states that drift more than `distance` blocks away from
+# the fork run on their own.
+
+from z3 import BitVecRef, If, is_expr
+
+from expr_cache import bv_val
+
+# values that may differ between two merged states, more would make every query
+# on the merged path as hard as the paths it replaces
+MAX_MERGED_VALUES = 16
+
+
+class CannotMerge(Exception):
+    pass
+
+
+def same_value(a, b):
+    if a is b:
+        return True
+    if is_expr(a) or is_expr(b):
+        return is_expr(a) and is_expr(b) and a.eq(b)
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        return len(a) == len(b) and all(key in b and same_value(value, b[key]) for key, value in a.items())
+    if isinstance(a, (list, tuple)):
+        return len(a) == len(b) and all(same_value(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def is_word(value):
+    if type(value) is int:
+        return True
+    return isinstance(value, BitVecRef) and value.size() == 256
+
+
+# 合并两个状态中对应的值，cond 成立时取 a 的值
+class ValueMerger(object):
+    def __init__(self, cond, max_values=MAX_MERGED_VALUES):
+        self.cond = cond
+        self.max_values = max_values
+        self.merged = 0
+
+    def merge(self, a, b):
+        if same_value(a, b):
+            return a
+        if isinstance(a, dict) and type(a) is type(b):
+            if len(a) != len(b) or any(key not in b for key in a):
+                raise CannotMerge()
+            return type(a)((key, self.merge(value, b[key])) for key, value in a.items())
+        if isinstance(a, list) and type(a) is type(b):
+            if len(a) != len(b):
+                raise CannotMerge()
+            return type(a)(self.merge(x, y) for x, y in zip(a, b))
+        if is_word(a) and is_word(b):
+            self.merged += 1
+            if self.merged > self.max_values:
+                raise CannotMerge()
+            if type(a) is int:
+                a = bv_val(a)
+            if type(b) is int:
+                b = bv_val(b)
+            return If(self.cond, a, b)
+        raise CannotMerge()
+
+
+# 一次分叉产生的状态，live 是还在执行的后代数(一个子分叉算一个)
+class ForkPoint(object):
+    __slots__ = ("parent", "depth", "live", "parked")
+
+    def __init__(self, parent, depth):
+        self.parent = parent
+        self.depth = depth
+        self.live = 2
+        # block -> state waiting there for a sibling
+        self.parked = {}
+
+
+class MergingWorklist(object):
+    def __init__(self, strategy, merge, distance):
+        self.strategy = strategy
+        # merge(a, b) returns the merged state or None
+        self.merge = merge
+        self.distance = distance
+        # id(state) -> ForkPoint of the pending states
+        self.fork_points = {}
+        self.waiting = set()
+        self.current = None
+        self.stats = {"merged": 0, "failed": 0}
+
+    def __len__(self):
+        return len(self.strategy) + sum(len(fork.parked) for fork in self.waiting)
+
+    def pop(self):
+        if not len(self.strategy):
+            # nothing else runs, a waiting state will not meet its sibling
+            self._release(next(iter(self.waiting)))
+        state = self.strategy.pop()
+        self.current = self.fork_points.pop(id(state), None)
+        return state
+
+    def push(self, state):
+        self.push_all([state])
+
+    # 后继状态: 没有后继时这条路径结束，两个后继时开始一个新的分叉
+    def push_all(self, states):
+        fork = self.current
+        self.current = None
+        if not states:
+            self._leave(fork)
+            return
+        if len(states) > 1:
+            parent = fork
+            fork = ForkPoint(parent, states[0].depth)
+            fork.live = len(states)
+        runnable = []
+        for state in states:
+            state = self._arrive(state, fork)
+            if state is not None:
+                runnable.append(state)
+        self.strategy.push_all(runnable)
+
+    # 返回可以执行的状态，状态等待兄弟状态或者被合并时返回 None
+    def _arrive(self, state, fork):
+        while True:
+            # the other side of a fork ended, the state goes on as its parent
+            while fork is not None and fork.live == 1 and not fork.parked:
+                fork = fork.parent
+            if fork is not None and state.depth - fork.depth > self.distance:
+                self._leave(fork)
+                fork = None
+            if fork is None or fork.live < 2:
+                self._track(state, fork)
+                return state
+
+            other = fork.parked.pop(state.block, None)
+            if other is None:
+                fork.parked[state.block] = state
+                self.waiting.add(fork)
+                self._track(state, fork)
+                if len(fork.parked) == fork.live:
+                    self._release(fork)
+                return None
+
+            merged = self.merge(other, state)
+            if merged is None:
+                self.stats["failed"] += 1
+                if not fork.parked:
+                    self.waiting.discard(fork)
+                self._track(other, fork)
+                self._track(state, fork)
+                self.strategy.push_all([other, state])
+                return None
+            self.stats["merged"] += 1
+            if not fork.parked:
+                self.waiting.discard(fork)
+            self.fork_points.pop(id(other), None)
+            fork.live -= 1
+            state = merged
+
+    def _track(self, state, fork):
+        if fork is not None:
+            self.fork_points[id(state)] = fork
+
+    def _leave(self, fork):
+        while fork is not None:
+            fork.live -= 1
+            if fork.live > 0:
+                if fork.parked and len(fork.parked) >= fork.live:
+                    self._release(fork)
+                return
+            fork = fork.parent
+
+    # 所有后代都在等待时，先执行块地址最小的一个(菱形的分支在汇合块之前)
+    def _release(self, fork):
+        block = min(fork.parked)
+        state = fork.parked.pop(block)
+        if not fork.parked:
+            self.waiting.discard(fork)
+        self.strategy.push(state)
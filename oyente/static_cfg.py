@@ -0,0 +1,216 @@
+# 符号执行之前的静态跳转目标分析: 对每个基本块做栈的抽象解释(常量传播)，栈中每一项是
+# 可能的常量集合或者未知。PUSH tag JUMP、内部函数调用时压入返回地址再跳转等常见模式的
+# 跳转目标都能解析出来，得到完整的 CFG(跳转目标来自栈上未知的值时除外)。
+# Static jump target resolution. Every stack item is the set of constants it
+# may hold (at most MAX_VALUES of them) or None when it is unknown. Stacks are
+# aligned at the top when two of them meet at a block, so a block entered with
+# different return addresses gets all of them.
+
+from opcodes import get_opcode
+
+MAX_VALUES = 32
+# items below the stack of the block entry are unknown
+UNKNOWN = None
+
+UINT_MASK = 2 ** 256 - 1
+
+
+def _bool(test):
+    return lambda a, b: 1 if test(a, b) else 0
+
+
+# the operations that appear on the way of a jump target, e.g. tag & 0xffffffff
+BINARY = {
+    "ADD": lambda a, b: (a + b) & UINT_MASK,
+    "SUB": lambda a, b: (a - b) & UINT_MASK,
+    "MUL": lambda a, b: (a * b) & UINT_MASK,
+    "AND": lambda a, b: a & b,
+    "OR": lambda a, b: a | b,
+    "XOR": lambda a, b: a ^ b,
+    "EQ": _bool(lambda a, b: a == b),
+    "LT": _bool(lambda a, b: a < b),
+    "GT": _bool(lambda a, b: a > b),
+}
+UNARY = {
+    "ISZERO": lambda a: 1 if a == 0 else 0,
+    "NOT": lambda a: ~a & UINT_MASK,
+}
+
+
+def join_values(a, b):
+    if a is UNKNOWN or b is UNKNOWN:
+        return UNKNOWN
+    values = a | b
+    return values if len(values) <= MAX_VALUES else UNKNOWN
+
+
+# 两个栈按栈顶对齐，取公共的部分
+def join_stacks(a, b):
+    length = min(len(a), len(b))
+    return tuple(join_values(x, y) for x, y in zip(a[len(a) - length:], b[len(b) - length:]))
+
+
+class AbstractStack(object):
+    def __init__(self, items):
+        self.items = list(items)
+
+    def pop(self):
+        if self.items:
+            return self.items.pop()
+        return UNKNOWN
+
+    def push(self, value):
+        self.items.append(value)
+
+    def peek(self, i):
+        if i < len(self.items):
+            return self.items[-1 - i]
+        return UNKNOWN
+
+    def swap(self, n):
+        while len(self.items) <= n:
+            self.items.insert(0, UNKNOWN)
+        self.items[-1], self.items[-1 - n] = self.items[-1 - n], self.items[-1]
+
+
+def apply(compute, *operands):
+    if any(values is UNKNOWN for values in operands):
+        return UNKNOWN
+    if len(operands) == 1:
+        return frozenset(compute(a) for a in operands[0])
+    if len(operands[0]) * len(operands[1]) > MAX_VALUES:
+        return UNKNOWN
+    return frozenset(compute(a, b) for a in operands[0] for b in operands[1])
+
+
+# 执行一个块，返回 (出口的栈, 跳转目标)。跳转目标是常量集合、None(未知)，没有跳转时为空
+def exec_block(block, entry):
+    stack = AbstractStack(entry)
+    targets = frozenset()
+    for instr in block.get_instructions():
+        name = instr.name
+        if name.startswith("PUSH"):
+            stack.push(frozenset([instr.arg]))
+        elif name.startswith("DUP"):
+            stack.push(stack.peek(instr.opcode - 0x80))
+        elif name.startswith("SWAP"):
+            stack.swap(instr.opcode - 0x8f)
+        elif name in BINARY:
+            first = stack.pop()
+            second = stack.pop()
+            stack.push(apply(BINARY[name], first, second))
+        elif name in UNARY:
+            stack.push(apply(UNARY[name], stack.pop()))
+        elif name == "JUMP":
+            targets = stack.pop()
+        elif name == "JUMPI":
+            targets = stack.pop()
+            stack.pop()
+        else:
+            try:
+                _, removed, added = get_opcode(name)
+            except ValueError:
+                # INVALID, ASSERTFAIL and unknown bytes end the block
+                break
+            for _ in range(removed):
+                stack.pop()
+            for _ in range(added):
+                stack.push(UNKNOWN)
+    return tuple(stack.items), targets
+
+
+class StaticCFG(object):
+    def __init__(self, vertices, jump_type):
+        self.vertices = vertices
+        self.jump_type = jump_type
+        # block -> stack at the block entry, for the blocks reached from 0
+        self.entry_stacks = {}
+        # block -> frozenset of jump targets, None when a target is unknown
+        self.targets = {}
+        self.successors = {}
+        self.predecessors = {}
+        self.loop_headers = set()
+        # loop header -> the blocks of its loop, including the header
+        self.loop_bodies = {}
+        self._resolve()
+        self._find_loops()
+
+    def is_jumpdest(self, address):
+        block = self.vertices.get(address)
+        return block is not None and block.get_instructions()[0].name == "JUMPDEST"
+
+    def _resolve(self):
+        if 0 not in self.vertices:
+            return
+        self.entry_stacks[0] = ()
+        todo = [0]
+        queued = set(todo)
+        while todo:
+            block = todo.pop()
+            queued.discard(block)
+            exit_stack, targets = exec_block(self.vertices[block], self.entry_stacks[block])
+            successors = []
+            if self.jump_type[block] in ("unconditional", "conditional"):
+                self.targets[block] = targets
+                if targets is not UNKNOWN:
+                    successors.extend(sorted(t for t in targets if self.is_jumpdest(t)))
+            if self.jump_type[block] in ("falls_to", "conditional") and hasattr(self.vertices[block], "falls_to"):
+                successors.append(self.vertices[block].get_falls_to())
+            self.successors[block] = successors
+            for successor in successors:
+                if successor not in self.vertices:
+                    continue
+                old = self.entry_stacks.get(successor)
+                new = exit_stack if old is None else join_stacks(old, exit_stack)
+                if new != old:
+                    self.entry_stacks[successor] = new
+                    if successor not in queued:
+                        queued.add(successor)
+                        todo.append(successor)
+
+    # 深度优先遍历中指向栈中的块的边是回边，它的目标是循环头
+    def _find_loops(self):
+        if 0 not in self.successors:
+            return
+        for block, successors in self.successors.items():
+            for successor in successors:
+                self.predecessors.setdefault(successor, []).append(block)
+        on_path = set([0])
+        done = set()
+        todo = [(0, iter(self.successors[0]))]
+        while todo:
+            block, successors = todo[-1]
+            successor = next(successors, None)
+            if successor is None:
+                todo.pop()
+                on_path.discard(block)
+                done.add(block)
+            elif successor in on_path:
+                self.loop_headers.add(successor)
+                self._add_loop_body(successor, block)
+            elif successor not in done and successor in self.successors:
+                on_path.add(successor)
+                todo.append((successor, iter(self.successors[successor])))
+
+    # 回边 tail -> header 的循环体: 不经过 header 可以到达 tail 的块
+    def _add_loop_body(self, header, tail):
+        body = self.loop_bodies.setdefault(header, set([header]))
+        todo = [tail]
+        while todo:
+            block = todo.pop()
+            if block not in body:
+                body.add(block)
+                todo.extend(self.predecessors.get(block, ()))
+
+    def resolved(self, block):
+        return block in self.targets and self.targets[block] is not UNKNOWN
+
+    def has_edge(self, block, target):
+        targets = self.targets.get(block)
+        return bool(targets) and target in targets
+
+    def unresolved_jumps(self):
+        return [block for block, targets in self.targets.items() if targets is UNKNOWN]
+
+    def reachable_instructions(self):
+        return sum(len(self.vertices[block].get_instructions()) for block in self.entry_stacks)
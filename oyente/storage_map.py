@@ -0,0 +1,28 @@
+# 合约存储 global_state["Ia"]: 键是 int 或者 z3 表达式本身。z3 按结构计算表达式的哈希，
+# 两个表达式的 == 在字典查找时比较结构，所以不需要把每次 SLOAD/SSTORE 的位置打印成字符串。
+# names 记录 SLOAD 生成的 Ia_store 变量是从哪个位置读出来的，分析时由变量找到它的位置。
+# Contract storage keyed by slot, an int or a z3 term. Terms are hashed by
+# their structure and compared with .eq() when their hashes meet, which is
+# what the str() keys used to approximate.
+
+from utils import get_storage_position
+
+
+class StorageMap(dict):
+    def __init__(self, items=(), names=None):
+        dict.__init__(self, items)
+        # Ia_store variable name -> slot
+        self.names = dict(names) if names else {}
+
+    def copy(self):
+        return StorageMap(self, self.names)
+
+    def add_name(self, name, slot):
+        self.names[name] = slot
+
+    # var 是 Ia_store 变量或者它的名字
+    def slot(self, var):
+        name = var if isinstance(var, str) else var.decl().name()
+        if name in self.names:
+            return self.names[name]
+        return get_storage_position(name)
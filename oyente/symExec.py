@@ -4,9 +4,6 @@
 #   3. 深度优先遍历 CFG，获取整一个逻辑框架所有的可能性。
 #   4. 对所有的可能性方案用 z3 求解器进行验算，对于位置的形参，使用 symbolic execution 的方式。
 
-import tokenize
-import zlib, base64
-from tokenize import NUMBER, NAME, NEWLINE
 import re
 import math
 import sys
@@ -17,15 +14,35 @@ import signal
 import time
 import logging
 import six
+import multiprocessing
 from collections import namedtuple
 from z3 import *
 
 from vargenerator import *
 from ethereum_data import *
 from basicblock import BasicBlock
+from instruction import INVALID, opcode_values
+from evm_stack import Stack
+from disassembler import disassemble, to_bytes
+from path_solver import PathSolver
+from query_cache import QueryCache, satisfies
+from solver_cache import SolverCache
 from analysis import *
 from test_evm.global_test_params import (TIME_OUT, UNKNOWN_INSTRUCTION,
                                          EXCEPTION, PICKLE_PATH)
+from search_strategy import get_strategy
+from block_facts import build_block_facts
+from static_cfg import StaticCFG
+from loop_widening import LoopWidener, take_snapshot
+from concrete_exec import charge_gas, exec_concrete
+from block_summary import BlockSummaries, BlockSummary
+from paged_memory import PagedMemory
+from storage_map import StorageMap
+from source_map import SourceMapError
+from keccak import hash_term, keccak256
+from state_merging import MergingWorklist, ValueMerger, CannotMerge, same_value
+from expr_cache import BV_ONE, BV_ZERO, SimplifyCache, bv_val
+import serialization
 from vulnerability import CallStack, TimeDependency, MoneyConcurrency, Reentrancy, AssertionFailure, ParityMultisigBug2, IntegerUnderflow, IntegerOverflow
 import global_params
 
@@ -37,15 +54,20 @@ CONSTANT_ONES_159 = BitVecVal((1 << 160) - 1, 256)
 Assertion = namedtuple('Assertion', ['pc', 'model'])
 Underflow = namedtuple('Underflow', ['pc', 'model'])
 Overflow = namedtuple('Overflow', ['pc', 'model'])
+Edge = namedtuple("Edge", ["v1", "v2"]) # 具名元组 Factory Function for tuples is used as dictionary key
 
 class Parameter:
     def __init__(self, **kwargs):
         attr_defaults = {
-            "stack": [],
+            "stack": Stack(),
             "calls": [],
-            "memory": [],
+            "memory": PagedMemory(),
             "visited": [],
             "overflow_pcs": [],
+            # overflow/underflow conditions proven unsat on this path, AST id -> expr
+            "safe_obligations": {},
+            # loop header -> snapshots of the iterations, see widen_loop
+            "loops": {},
             "mem": {},
             "analysis": {},
             "sha3_list": {},
@@ -54,50 +76,124 @@ class Parameter:
         }
         for (attr, default) in six.iteritems(attr_defaults):
             setattr(self, attr, kwargs.get(attr, default))
+        # number of pending states that share this object, see State.take_params
+        self.refs = 0
 
     def copy(self):
         _kwargs = custom_deepcopy(self.__dict__)
+        # the pages are copied by the first copy that writes them
+        _kwargs["memory"] = self.memory.copy()
         return Parameter(**_kwargs)
 
+# 工作表中的一个待执行状态：EVM 状态 (Parameter) 加上它在 CFG 中的位置
+# A pending path of the explorer: the EVM state plus its position in the CFG.
+# visited_edges counts how many times each edge into a JUMPI block was taken on
+# this path, LOOP_LIMIT is checked against it.
+# The successors of a block share the parent's Parameter, which is copied only
+# when a successor starts running while another one still holds it. The branch
+# taken at a JUMPI is kept in branch/branch_pc until then.
+# model satisfies the first model_checked constraints of the path condition,
+# it settles the branches it takes without a solver call.
+# 后继状态共享父状态的 Parameter，只有在执行时仍与其他状态共享才复制(写时复制)
+class State:
+    def __init__(self, params, block, pre_block=0, depth=0, func_call=-1, current_func_name='fallback', visited_edges=None, forks=0, branch=None, branch_pc=None, model=None, model_checked=0):
+        self.params = params
+        self.block = block
+        self.pre_block = pre_block
+        self.depth = depth
+        self.func_call = func_call
+        self.current_func_name = current_func_name
+        self.visited_edges = visited_edges if visited_edges is not None else {}
+        self.forks = forks
+        self.branch = branch
+        self.branch_pc = branch_pc
+        self.model = model
+        self.model_checked = model_checked
+        params.refs += 1
+
+    # 取得这个状态可以修改的 Parameter
+    def take_params(self):
+        params = self.params
+        params.refs -= 1
+        if params.refs > 0:
+            params = params.copy()
+            self.params = params
+        params.refs = 0
+        params.global_state["pc"] = self.block
+        if self.branch is not None:
+            path_condition = params.path_conditions_and_vars["path_condition"]
+            path_condition.append(self.branch)
+            params.analysis["time_dependency_bug"][len(path_condition) - 1] = self.branch_pc
+            self.branch = None
+        return params
+
+    # 放弃这个状态，不再占用共享的 Parameter
+    def discard(self):
+        self.params.refs -= 1
+
+def new_query_cache():
+    if global_params.QUERY_CACHE_SIZE > 0:
+        return QueryCache(global_params.QUERY_CACHE_SIZE)
+    return None
+
+# 每个进程使用自己的 SQLite 连接，worker 进程里重新创建
+def new_solver_cache():
+    if global_params.SOLVER_CACHE:
+        return SolverCache(global_params.SOLVER_CACHE, global_params.SOLVER_CACHE_SIZE, global_params.TIMEOUT)
+    return None
+
 # 初始化全局变量
 def initGlobalVars():
     global g_src_map
     global solver
-    # Z3 solver
-    # Run Oyente in parallel
-    if global_params.PARALLEL:
-        t2 = Then('simplify', 'solve-eqs', 'smt')
-        _t = Then('tseitin-cnf-core', 'split-clause')
-        t1 = ParThen(_t, t2)
-        solver = OrElse(t1, t2).solver()
-    else:
-        solver = Solver()
+    # Z3 solver, checks are sliced to the constraints related to the query
+    solver = PathSolver(global_params.TIMEOUT, new_query_cache(), new_solver_cache(),
+                        global_params.SOLVER_ASSUMPTIONS, global_params.VAR_CACHE_SIZE)
 
-    solver.set("timeout", global_params.TIMEOUT)
+    # simplify() of the handlers, shared by all paths
+    global simplifier
+    simplifier = SimplifyCache(global_params.SIMPLIFY_CACHE_SIZE)
+
+    # effect of the pure prefix of the blocks, shared by all paths
+    global block_summaries
+    block_summaries = BlockSummaries(global_params.BLOCK_SUMMARY_SIZE)
+    # add_obligation() calls of the prefix being summarized
+    global summary_obligations
+    summary_obligations = None
 
     global MSIZE
     MSIZE = False
 
-    global revertible_overflow_pcs
-    revertible_overflow_pcs = set()
+    global global_visited_edges
+    global_visited_edges = {}
 
-    global g_disasm_file
-    with open(g_disasm_file, 'r') as f:
-        disasm = f.read()
-    if 'MSIZE' in disasm:
-        MSIZE = True
+    # prefix of the generated test case files, set by the workers of the parallel mode
+    global test_case_prefix
+    test_case_prefix = ""
+
+    # function selector fixed by the per-function mode, or the selectors the
+    # fallback shard must not match
+    global fixed_selector
+    fixed_selector = None
+    global excluded_selectors
+    excluded_selectors = []
+
+    # seconds each shard of the per-function mode may run, see explore_functions_in_parallel
+    global function_timeout
+    function_timeout = 0
+
+    # overflow/underflow checks of the running block, see add_obligation
+    global pending_obligations
+    pending_obligations = []
 
     global g_timeout
     g_timeout = False
 
-    global visited_pcs
-    visited_pcs = set()
+    global start_block_to_func_sig
+    start_block_to_func_sig = {}
 
     global results
     if g_src_map:
-        global start_block_to_func_sig
-        start_block_to_func_sig = {}
-
         results = {
             'evm_code_coverage': '',
             'vulnerabilities': {
@@ -124,9 +220,6 @@ def initGlobalVars():
             }
         }
 
-    global calls_affect_state
-    calls_affect_state = {}
-
     # capturing the last statement of each basic block
     # 捕获每个基本块的最后一条语句
     global end_ins_dict
@@ -145,11 +238,48 @@ def initGlobalVars():
     global vertices
     vertices = {}
 
+    # static facts of every block, see block_facts.py
+    global block_facts
+    block_facts = {}
+
+    # jump targets found before the symbolic execution
+    global static_cfg
+    static_cfg = StaticCFG({}, {})
+
     global edges
     edges = {}
 
-    global visited_edges
-    visited_edges = {}
+    init_path_results()
+
+    # to generate names for symbolic variables
+    # 为符号变量生成名称
+    global gen
+    gen = Generator()
+
+    global data_source
+    if global_params.USE_GLOBAL_BLOCKCHAIN:
+        data_source = EthereumData()
+
+    global rfile
+    if global_params.REPORT_MODE:
+        rfile = open(g_disasm_file + '.report', 'w')
+
+# 初始化路径执行过程中收集的结果，并行模式下每个 worker 在执行子树前也会重新初始化
+# Results collected while paths are explored. Workers of the parallel mode reset
+# them before each subtree and send them back to be merged.
+PATH_RESULTS = ["visited_pcs", "calls_affect_state", "revertible_overflow_pcs",
+                "money_flow_all_paths", "reentrancy_all_paths", "path_conditions",
+                "global_problematic_pcs", "all_gs", "total_no_of_paths", "no_of_test_cases"]
+
+def init_path_results():
+    global visited_pcs
+    visited_pcs = set()
+
+    global calls_affect_state
+    calls_affect_state = {}
+
+    global revertible_overflow_pcs
+    revertible_overflow_pcs = set()
 
     global money_flow_all_paths
     money_flow_all_paths = []
@@ -176,18 +306,33 @@ def initGlobalVars():
     global no_of_test_cases
     no_of_test_cases = 0
 
-    # to generate names for symbolic variables
-    # 为符号变量生成名称
-    global gen
-    gen = Generator()
+def get_path_results():
+    return dict((name, globals()[name]) for name in PATH_RESULTS)
 
-    global data_source
-    if global_params.USE_GLOBAL_BLOCKCHAIN:
-        data_source = EthereumData()
+# 合并一个 worker 的结果，与顺序执行时一样只保留 money_flow 不同的路径
+def merge_path_results(worker_results):
+    global total_no_of_paths
+    global no_of_test_cases
 
-    global rfile
-    if global_params.REPORT_MODE:
-        rfile = open(g_disasm_file + '.report', 'w')
+    visited_pcs.update(worker_results["visited_pcs"])
+    for pc, affects_state in six.iteritems(worker_results["calls_affect_state"]):
+        calls_affect_state[pc] = calls_affect_state.get(pc, False) or affects_state
+    revertible_overflow_pcs.update(worker_results["revertible_overflow_pcs"])
+    reentrancy_all_paths.extend(worker_results["reentrancy_all_paths"])
+    for bug in ["reentrancy_bug", "assertion_failure", "integer_underflow", "integer_overflow"]:
+        global_problematic_pcs[bug].extend(worker_results["global_problematic_pcs"][bug])
+
+    worker_pcs = worker_results["global_problematic_pcs"]
+    for i, money_flow in enumerate(worker_results["money_flow_all_paths"]):
+        if money_flow not in money_flow_all_paths:
+            global_problematic_pcs["money_concurrency_bug"].append(worker_pcs["money_concurrency_bug"][i])
+            money_flow_all_paths.append(money_flow)
+            path_conditions.append(worker_results["path_conditions"][i])
+            global_problematic_pcs["time_dependency_bug"].append(worker_pcs["time_dependency_bug"][i])
+            all_gs.append(worker_results["all_gs"][i])
+
+    total_no_of_paths += worker_results["total_no_of_paths"]
+    no_of_test_cases += worker_results["no_of_test_cases"]
 
 def is_testing_evm():
     return global_params.UNIT_TEST != 0
@@ -197,60 +342,23 @@ def compare_storage_and_gas_unit_test(global_state, analysis):
     test_status = unit_test.compare_with_symExec_result(global_state, analysis)
     exit(test_status)
 
-def change_format():
-    with open(g_disasm_file) as disasm_file:
-        file_contents = disasm_file.readlines()
-        i = 0
-        # 移除第一行字符串前后的换行符
-        firstLine = file_contents[0].strip('\n')
-        for line in file_contents:
-            line = line.replace('SELFDESTRUCT', 'SUICIDE')
-            line = line.replace('Missing opcode 0xfd', 'REVERT')
-            line = line.replace('Missing opcode 0xfe', 'ASSERTFAIL')
-            line = line.replace('Missing opcode', 'INVALID')
-            line = line.replace(':', '')
-            lineParts = line.split(' ')
-            try: # removing initial zeroes
-                lineParts[0] = str(int(lineParts[0]))
-
-            except:
-                lineParts[0] = lineParts[0]
-            lineParts[-1] = lineParts[-1].strip('\n')
-            try: # adding arrow if last is a number
-                lastInt = lineParts[-1]
-                if(int(lastInt, 16) or int(lastInt, 16) == 0) and len(lineParts) > 2:
-                    lineParts[-1] = "=>"
-                    lineParts.append(lastInt)
-            except Exception:
-                pass
-            file_contents[i] = ' '.join(lineParts)
-            i = i + 1
-        file_contents[0] = firstLine
-        file_contents[-1] += '\n'
-
-    with open(g_disasm_file, 'w') as disasm_file:
-        disasm_file.write("\n".join(file_contents))
-
-# tokenize 是一个词汇扫描器，你可以看到每个词或者字符是什么类型的
-#   其中所有的运算符，分隔符和 ellipsis 都会被标记成 OP 类型。
-#   下面的 generate_tokens() 接受的参数必须是一个 readline，生成器会生成 5 个元素的具名元祖，内容分别是：
-#       type：令牌类型
-#       string：被令牌的字符串
-#       指定令牌在源中开始的行和列的 2 元组 (srow, scol) 
-#       指定令牌在源中结束的行和列的 2 元组 (erow, ecol) ；
-#       line：所传递的行（最后一个元组项）是 实际的 行
-#   其中还有一个属性 exact_type 标记了类型为 OP 词的确切操作类型。
-#   可以在 collect_vertices 函数中看到对这个对象的调用。
+# 用进程内的反汇编器解码字节码，再构建 CFG 并进行符号执行
 def build_cfg_and_analyze():
-    change_format()
-    with open(g_disasm_file, 'r') as disasm_file:
-        disasm_file.readline()  # Remove first line
-        tokens = tokenize.generate_tokens(disasm_file.readline)
-        collect_vertices(tokens)
-        construct_bb()
-        construct_static_edges()
-        # 跳跃目标是动态构建的
-        full_sym_exec()  # jump targets are constructed on the fly
+    global MSIZE
+    instrs = disassemble(g_bytecode)
+    if any(instr.name == "MSIZE" for instr in instrs):
+        MSIZE = True
+    collect_vertices(instrs)
+    if g_src_map:
+        # PC 到源代码位置的对齐在查询时才进行，只有报告中的 PC 需要
+        g_src_map.set_instructions(instrs)
+    construct_bb()
+    construct_static_edges()
+    global block_facts
+    block_facts = build_block_facts(vertices, jump_type)
+    # 跳跃目标先静态解析，执行 JUMP/JUMPI 时只补上没有解析出来的
+    add_static_jumps()
+    full_sym_exec()
 
 
 def print_cfg():
@@ -259,157 +367,54 @@ def print_cfg():
     log.debug(str(edges))
 
 
-# positions 格式:{{'begin': 27, 'end': 141, 'name': 'DUP2'}, {'begin': 27, 'end': 141, 'name': 'SWAP1'}}
-# name 为 “PUSH”时 还有个 value {'begin': 27, 'end': 141, 'name': 'PUSH', 'value': '20'}
-def mapping_push_instruction(current_line_content, current_ins_address, idx, positions, length):
-    global g_src_map
-
-    while (idx < length):
-        if not positions[idx]:
-            return idx + 1
-        name = positions[idx]['name']
-        if name.startswith("tag"):
-            idx += 1
-        else:
-            if name.startswith("PUSH"):
-                if name == "PUSH":
-                    value = positions[idx]['value']
-                    instr_value = current_line_content.split(" ")[1]
-                    if int(value, 16) == int(instr_value, 16):
-                        g_src_map.instr_positions[current_ins_address] = g_src_map.positions[idx]
-                        idx += 1
-                        break;
-                    else:
-                        raise Exception("Source map error")
-                else:
-                    g_src_map.instr_positions[current_ins_address] = g_src_map.positions[idx]
-                    idx += 1
-                    break;
-            else:
-                raise Exception("Source map error")
-    return idx
-
-def mapping_non_push_instruction(current_line_content, current_ins_address, idx, positions, length):
-    global g_src_map
-
-    while (idx < length):
-        if not positions[idx]:
-            return idx + 1
-        name = positions[idx]['name']
-        if name.startswith("tag"):
-            idx += 1
-        else:
-            instr_name = current_line_content.split(" ")[0]
-            if name == instr_name or name == "INVALID" and instr_name == "ASSERTFAIL" or name == "KECCAK256" and instr_name == "SHA3" or name == "SELFDESTRUCT" and instr_name == "SUICIDE":
-                g_src_map.instr_positions[current_ins_address] = g_src_map.positions[idx]
-                idx += 1
-                break;
-            else:
-                raise RuntimeError(F"Source map error, unknown name({name}) or instr_name({instr_name})")
-    return idx
-
-# 1. Parse the disassembled file
+# 1. Walk the decoded instructions
 # 2. Then identify each basic block (i.e. one-in, one-out)
 # 3. Store them in vertices
 # 这个函数主要做的有：
-#   1. 解析汇编文件
+#   1. 遍历反汇编器解码出的指令
 #   2. 判断区分不同的基础区块
 #   3. 把他们存在顶点中
 # 这个循环的主要作用就是将 block 添加到顶点中[重要]:
-#   1. 通过解析出来的 token 类型，这个循环进行不同的操作；例如 tok_type 为 NAME 时，就把对 tok_string 做判断。解析出来是 PUSH 之后，则会让 wait_for_push 设置为 True。
-#   2. 当读取该行结束之后，会调用一个 mapping_push_instruction，把 g_src_map.position 内的指令放入 g_src_map.instr_positions。
-#   3. 同时全局变量 end_ins_dict 记录的是每个基本块的最后一条语句
-#   4. 全局变量 instructions 负责记录指令。
-#   5. 全局变量 jump_type 负责记录分支的类型和位置。
-def collect_vertices(tokens):
-    global g_src_map
-    if g_src_map:
-        idx = 0
-        positions = g_src_map.positions
-        length = len(positions)
+#   1. JUMPDEST 开始一个新块，JUMP/JUMPI 结束当前块，STOP/RETURN 等把当前块标记为 terminal。
+#   2. 同时全局变量 end_ins_dict 记录的是每个基本块的最后一条语句
+#   3. 全局变量 instructions 负责记录指令。
+#   4. 全局变量 jump_type 负责记录分支的类型和位置。
+#   源码映射由 g_src_map.set_instructions 在查询时对齐，不在这里进行。
+def collect_vertices(instrs):
     global end_ins_dict
     global instructions
     global jump_type
 
     current_ins_address = 0 # pc
     last_ins_address = 0
-    is_new_line = True  # 新行标识
     current_block = 0
-    current_line_content = ""
-    wait_for_push = False   # PUSH 后为 True
     is_new_block = False
 
-    # tok_type:'number' tok_string:'0000' 不是'0000c'，需在 change_format() 中更改
-    # NUMBER==2,NAME==1,NEWLINE==4
-    # 0 PUSH1 => 0x60
-    # 2 0 (1, 0) 0 PUSH1 => 0x60
-    # tok_type, tok_string, (srow, scol), _, line_number
-    for tok_type, tok_string, (srow, scol), _, line_number in tokens:
-        # 对 PUSH 后的值进行处理，向 instructions 中插入当前指令
-        if wait_for_push is True:
-            push_val = ""
-            for ptok_type, ptok_string, _, _, _ in tokens:
-                if ptok_type == NEWLINE:
-                    is_new_line = True
-                    current_line_content += push_val + ' '
-                    instructions[current_ins_address] = current_line_content
-                    idx = mapping_push_instruction(current_line_content, current_ins_address, idx, positions, length) if g_src_map else None
-                    log.debug(current_line_content)
-                    current_line_content = ""
-                    wait_for_push = False
-                    break
-                try:
-                    int(ptok_string, 16)
-                    push_val += ptok_string
-                except ValueError:
-                    pass
-
-            continue
-        # 寻找行号
-        elif is_new_line is True and tok_type == NUMBER:  # looking for a line number
-            last_ins_address = current_ins_address
-            try:
-                current_ins_address = int(tok_string)
-            except ValueError:
-                log.critical("ERROR when parsing row %d col %d", srow, scol)
-                quit()
-            is_new_line = False
-            if is_new_block:
-                current_block = current_ins_address # 新块的起始 pc
-                is_new_block = False
-            continue
-        elif tok_type == NEWLINE:   # /n
-            is_new_line = True
-            log.debug(current_line_content)
-            instructions[current_ins_address] = current_line_content
-            # if len(current_line_content.split(' ')) == 2:
-            #     current_line_content = current_line_content.split(' ')[1]
-            idx = mapping_non_push_instruction(current_line_content, current_ins_address, idx, positions, length) if g_src_map else None
-            current_line_content = ""
-            continue
-        elif tok_type == NAME:
-            if tok_string == "JUMPDEST":
-                if last_ins_address not in end_ins_dict:
-                    end_ins_dict[current_block] = last_ins_address
-                current_block = current_ins_address
-                is_new_block = False
-            elif tok_string == "STOP" or tok_string == "RETURN" or tok_string == "SUICIDE" or tok_string == "REVERT" or tok_string == "ASSERTFAIL":
-                jump_type[current_block] = "terminal"
-                end_ins_dict[current_block] = current_ins_address
-            elif tok_string == "JUMP":
-                jump_type[current_block] = "unconditional"
-                end_ins_dict[current_block] = current_ins_address
-                is_new_block = True
-            elif tok_string == "JUMPI":
-                jump_type[current_block] = "conditional"
-                end_ins_dict[current_block] = current_ins_address
-                is_new_block = True
-            elif tok_string.startswith('PUSH', 0):
-                wait_for_push = True
-            is_new_line = False
-        if tok_string != "=" and tok_string != ">":
-        # if tok_string != "=" and tok_string != ">" and not(tok_string >= "a" and tok_string <= "f"):
-            current_line_content += tok_string + " "
+    for instr in instrs:
+        last_ins_address = current_ins_address
+        current_ins_address = instr.pc
+        if is_new_block:
+            current_block = current_ins_address # 新块的起始 pc
+            is_new_block = False
+
+        name = instr.name
+        if name == "JUMPDEST":
+            if last_ins_address not in end_ins_dict:
+                end_ins_dict[current_block] = last_ins_address
+            current_block = current_ins_address
+        elif name in ("STOP", "RETURN", "SUICIDE", "REVERT", "ASSERTFAIL"):
+            jump_type[current_block] = "terminal"
+            end_ins_dict[current_block] = current_ins_address
+        elif name == "JUMP":
+            jump_type[current_block] = "unconditional"
+            end_ins_dict[current_block] = current_ins_address
+            is_new_block = True
+        elif name == "JUMPI":
+            jump_type[current_block] = "conditional"
+            end_ins_dict[current_block] = current_ins_address
+            is_new_block = True
+
+        instructions[current_ins_address] = instr
 
     # 结束时给最后一个赋值
     if current_block not in end_ins_dict:
@@ -460,6 +465,57 @@ def construct_static_edges():
     add_falls_to()  # these edges are static
 
 
+# 到达循环头时记录状态，第 LOOP_WIDENING + 1 次到达时把循环改变的值加宽。
+# 加宽后的路径再次回到循环头时返回 False，这条路径结束
+def widen_loop(params, block):
+    loops = params.loops
+    # an inner loop starts over in every iteration of this one
+    for inner in static_cfg.loop_bodies.get(block, ()):
+        if inner != block:
+            loops.pop(inner, None)
+    record = loops.setdefault(block, {"snapshots": [], "widened": False})
+    if record["widened"]:
+        return False
+    record["snapshots"].append(take_snapshot(params))
+    if len(record["snapshots"]) <= global_params.LOOP_WIDENING:
+        return True
+
+    snapshots = record["snapshots"]
+    record["snapshots"] = []
+    widener = LoopWidener(gen.gen_arbitrary_var, global_params.GAS_LIMIT)
+    widened = widener.widen(snapshots)
+    if widened is None:
+        # the loop keeps going until LOOP_LIMIT
+        return True
+    stack, mem, storage = widened
+    params.stack = Stack(stack)
+    # SHA3 reads the bytes, the words that were widened no longer hold what the last iteration wrote there
+    for address, value in mem.items():
+        if not same_value(value, params.mem.get(address)):
+            params.memory.forget(address, 32)
+    params.mem = mem
+    if "Ia" in params.global_state:
+        params.global_state["Ia"] = StorageMap(storage, params.global_state["Ia"].names)
+    path_conditions_and_vars = params.path_conditions_and_vars
+    path_conditions_and_vars.update(widener.variables)
+    path_conditions_and_vars["path_condition"].extend(widener.constraints)
+    record["widened"] = True
+    log.debug("Widened loop at %d: %d new variables", block, len(widener.variables))
+    return True
+
+# 静态解析跳转目标，放入 edges
+def add_static_jumps():
+    global static_cfg
+    static_cfg = StaticCFG(vertices, jump_type)
+    for block, targets in static_cfg.targets.items():
+        for target in sorted(targets or ()):
+            # the same targets StaticCFG follows, a jump anywhere else fails
+            if static_cfg.is_jumpdest(target) and target not in edges[block]:
+                edges[block].append(target)
+    log.debug("Static CFG: %d jumps, unresolved %s, loop headers %s, %d reachable instructions",
+              len(static_cfg.targets), static_cfg.unresolved_jumps(), sorted(static_cfg.loop_headers),
+              static_cfg.reachable_instructions())
+
 # 这个函数的作用就是在 jump_type 不是 terminal 或者 unconditional 的时候，把节点的 target 赋给 edges 和 vertices。
 def add_falls_to():
     global vertices
@@ -521,13 +577,13 @@ def get_init_global_state(path_conditions_and_vars):
     path_conditions_and_vars["Iv"] = deposited_value
 
     # 先设定约束，deposited_value 需要大于 0
-    constraint = (deposited_value >= BitVecVal(0, 256))
+    constraint = (deposited_value >= BV_ZERO)
     path_conditions_and_vars["path_condition"].append(constraint)
     # 发送者的余额要大于 deposited_value 才能发
     constraint = (init_is >= deposited_value)
     path_conditions_and_vars["path_condition"].append(constraint)
     # 接收者的值需要大于 0
-    constraint = (init_ia >= BitVecVal(0, 256))
+    constraint = (init_ia >= BV_ZERO)
     path_conditions_and_vars["path_condition"].append(constraint)
 
     # update the balances of the "caller" and "callee"
@@ -573,7 +629,7 @@ def get_init_global_state(path_conditions_and_vars):
 
     # the state of the current current contract
     if "Ia" not in global_state:
-        global_state["Ia"] = {}
+        global_state["Ia"] = StorageMap()
     global_state["miu_i"] = 0
     global_state["value"] = deposited_value
     global_state["sender_address"] = sender_address
@@ -596,16 +652,14 @@ def get_start_block_to_func_sig():
     state = 0
     func_sig = None
     for pc, instr in six.iteritems(instructions):
-        if state == 0 and instr.startswith('PUSH4'):
+        if state == 0 and instr.name == 'PUSH4':
             state += 1
-            func_sig = instr.split(' ')[1][2:]
-        elif state == 1 and instr.startswith('EQ'):
+            func_sig = "%08x" % instr.arg
+        elif state == 1 and instr.name == 'EQ':
             state += 1
-        elif state == 2 and instr.startswith('PUSH'):
+        elif state == 2 and instr.arg is not None:
             state = 0
-            pc = instr.split(' ')[1]
-            pc = int(pc, 16)
-            start_block_to_func_sig[pc] = func_sig
+            start_block_to_func_sig[instr.arg] = func_sig
         else:
             state = 0
     return start_block_to_func_sig
@@ -613,27 +667,288 @@ def get_start_block_to_func_sig():
 # 这一个函数涉及到的是 oyente 框架最关键的内容，就是对于合约安全的各种检测
 # 主要的步骤就是
 #   1. 获取全部参数，存入 param 变量。
-#   2. 使用 sym_exec_block 对所有的块进行深度优先遍历。
+#   2. 使用 explore 按照所选的搜索策略遍历所有的块。
 #   3. 进行 symbolic execution，对 EVM 的栈的内容进行模仿，并且使用求解器约束参数的范围。
 #   4. 对不同的可能出现的问题进行逻辑判断，返回不同的异常信息——例如求解器的约束对没有限制的整数进行范围的判定等。
 def full_sym_exec():
+    # 如果输入的是字节码就没有这个步骤，因为没有 g_src_map
+    if g_src_map:
+        get_start_block_to_func_sig() # 获取函数的 pc 和签名
+    if global_params.PARALLEL_FUNCTIONS and not is_testing_evm():
+        return explore_functions_in_parallel()
+    return explore(get_initial_state())  # 从起始地址开始符号执行
+
+def get_initial_state():
     # executing, starting from beginning 执行，从头开始
     path_conditions_and_vars = {"path_condition" : []}
     global_state = get_init_global_state(path_conditions_and_vars)
     analysis = init_analysis()
     params = Parameter(path_conditions_and_vars=path_conditions_and_vars, global_state=global_state, analysis=analysis)
-    # 如果输入的是字节码就没有这个步骤，因为没有 g_src_map
-    if g_src_map:
-        start_block_to_func_sig = get_start_block_to_func_sig() # 获取函数的 pc 和签名
-    return sym_exec_block(params, 0, 0, 0, -1, 'fallback')  # 从起始地址符号执行一个块，内含递归符号执行
+    return State(params, 0)
+
+# 收集含有 CALL/SSTORE 等指令的块，覆盖率引导的搜索策略会优先执行它们
+def get_interesting_blocks():
+    return set(block for block, facts in block_facts.items() if facts.interesting)
+
+# Explore the CFG with an explicit worklist instead of recursion. The search
+# strategy (global_params.SEARCH_STRATEGY) decides which pending state runs next.
+# 用显式的工作表代替递归遍历 CFG，由搜索策略决定下一个执行的状态
+def explore(initial_state):
+    if global_params.PARALLEL and not is_testing_evm():
+        explore_in_parallel(initial_state)
+    else:
+        explore_sequentially(initial_state)
+
+def explore_sequentially(initial_state):
+    worklist = get_strategy(global_params.SEARCH_STRATEGY, interesting_blocks=get_interesting_blocks())
+    if global_params.STATE_MERGING:
+        worklist = MergingWorklist(worklist, merge_states, global_params.MERGE_DISTANCE)
+    worklist.push(initial_state)
+    while worklist:
+        worklist.push_all(exec_state(worklist.pop()))
+    if global_params.STATE_MERGING:
+        log.debug("State merging: %s", worklist.stats)
+
+# 状态的路径条件，包括还没有加入的分支条件
+def pending_path_condition(state):
+    path_condition = state.params.path_conditions_and_vars["path_condition"]
+    if state.branch is None:
+        return path_condition
+    return path_condition + [state.branch]
+
+def pending_time_dependency(state):
+    time_dependency = state.params.analysis["time_dependency_bug"]
+    if state.branch is None:
+        return time_dependency
+    path_condition = state.params.path_conditions_and_vars["path_condition"]
+    time_dependency = dict(time_dependency)
+    time_dependency[len(path_condition)] = state.branch_pc
+    return time_dependency
+
+# 合并到达同一个块的两个状态：相同的前缀之后的路径条件变为 Or(A, B)，不同的栈、内存、
+# 存储值变为 If(A, a, b)，gas 取较大值。其它的分析结果必须相同，否则不合并，返回 None
+def merge_states(a, b):
+    if a.func_call != b.func_call or a.current_func_name != b.current_func_name:
+        return None
+    params_a = a.params
+    params_b = b.params
+    condition_a = pending_path_condition(a)
+    condition_b = pending_path_condition(b)
+    common = 0
+    while common < min(len(condition_a), len(condition_b)) and same_value(condition_a[common], condition_b[common]):
+        common += 1
+    rest_a = condition_a[common:]
+    rest_b = condition_b[common:]
+    if not rest_a or not rest_b:
+        return None
+
+    # the merged path condition has one constraint after the common prefix, it
+    # keeps the JUMPI of that index. The later branches are dropped, unless the
+    # timestamp check of detect_time_dependency would have reported them
+    time_dependency = {}
+    for state, condition in ((b, condition_b), (a, condition_a)):
+        for i, pc in pending_time_dependency(state).items():
+            if i > common:
+                if any("IH_s" in name for name in solver.var_cache.vars(condition[i])):
+                    return None
+            elif time_dependency.setdefault(i, pc) != pc:
+                return None
+    for name in ("calls", "memory", "overflow_pcs", "sha3_list"):
+        if not same_value(getattr(params_a, name), getattr(params_b, name)):
+            return None
+    for name, value in params_a.analysis.items():
+        if name not in ("gas", "time_dependency_bug") and not same_value(value, params_b.analysis.get(name)):
+            return None
+    variables = params_a.path_conditions_and_vars
+    other_variables = params_b.path_conditions_and_vars
+    if set(variables) != set(other_variables):
+        return None
+    for name, value in variables.items():
+        if name != "path_condition" and not same_value(value, other_variables[name]):
+            return None
+
+    cond_a = And(rest_a) if len(rest_a) > 1 else rest_a[0]
+    cond_b = And(rest_b) if len(rest_b) > 1 else rest_b[0]
+    merger = ValueMerger(cond_a)
+    try:
+        stack = merger.merge(params_a.stack, params_b.stack)
+        mem = merger.merge(params_a.mem, params_b.mem)
+        # pc is set to the block when the state runs
+        global_state = merger.merge(dict(params_a.global_state, pc=a.block), dict(params_b.global_state, pc=b.block))
+    except CannotMerge:
+        return None
+
+    gas = max(params_a.analysis["gas"], params_b.analysis["gas"])
+    safe_obligations = dict((key, expr) for key, expr in params_a.safe_obligations.items()
+                            if key in params_b.safe_obligations)
+    if "Ia" in global_state:
+        storage_names = dict(params_b.global_state["Ia"].names)
+        storage_names.update(params_a.global_state["Ia"].names)
+    params = a.take_params()
+    b.discard()
+    # the merged values may share lists and dicts with a Parameter another state holds
+    merged = custom_deepcopy({"stack": stack, "mem": mem, "global_state": global_state})
+    params.stack = merged["stack"]
+    params.mem = merged["mem"]
+    params.global_state = merged["global_state"]
+    if "Ia" in global_state:
+        params.global_state["Ia"].names = storage_names
+    params.analysis["gas"] = gas
+    params.safe_obligations = safe_obligations
+    params.analysis["time_dependency_bug"] = time_dependency
+    params.path_conditions_and_vars["path_condition"] = condition_a[:common] + [Or(cond_a, cond_b)]
+    visited_edges = dict(a.visited_edges)
+    for edge, count in b.visited_edges.items():
+        visited_edges[edge] = max(count, visited_edges.get(edge, 0))
+    return State(params, a.block, a.pre_block, max(a.depth, b.depth), a.func_call, a.current_func_name,
+                 visited_edges, min(a.forks, b.forks))
+
+# 执行一个状态，返回它的后继状态；出现异常时放弃这条路径
+def exec_state(state):
+    try:
+        return sym_exec_block(state)
+    except (TimeoutError, SourceMapError):
+        # a source map that does not match the bytecode ends the analysis, as
+        # it did when the whole map was built with the CFG
+        raise
+    except Exception as e:
+        if is_testing_evm():
+            raise
+        log.debug("This path results in an exception: %s", e)
+        if global_params.DEBUG_MODE:
+            traceback.print_exc()
+        return []
+
+# 并行模式：先在主进程中广度优先地展开状态树，待执行的状态足够多之后，把每个状态
+# (即以它为根的子树)序列化后交给进程池，最后合并各个 worker 收集的结果
+# Parallel mode: the state tree is expanded breadth first in this process until
+# there are enough pending states, then every pending state (the subtree rooted
+# at it) is explored by a worker of a process pool and the results are merged.
+def explore_in_parallel(initial_state):
+    workers = global_params.PARALLEL_WORKERS or multiprocessing.cpu_count()
+    frontier = get_strategy("bfs")
+    frontier.push(initial_state)
+    # a few subtrees per worker, so a worker that finishes early picks up another one
+    while frontier and len(frontier) < 4 * workers:
+        frontier.push_all(exec_state(frontier.pop()))
+    if not frontier:
+        return
+
+    tasks = [(task_id, serialize_state(state)) for task_id, state in enumerate(frontier.states)]
+    log.debug("Exploring %d subtrees with %d workers", len(tasks), workers)
+    run_in_pool(explore_subtree, tasks, workers)
+
+# 按函数分片：每个公开函数(选择器)一个任务，从头执行但固定 calldata 的前 4 个字节，
+# 另有一个任务执行不匹配任何选择器的 fallback 函数。每个任务有自己的时间预算
+# Per-function mode: one task per selector found in the dispatcher, each one
+# explores from the start with the selector fixed and under its own time budget.
+# One more task covers the fallback function.
+def explore_functions_in_parallel():
+    global function_timeout
+
+    if not g_src_map:
+        get_start_block_to_func_sig()
+    selectors = sorted(set(int(func_sig, 16) for func_sig in start_block_to_func_sig.values()))
+    shards = selectors + [None]
+    tasks = [(task_id, (selector, selectors)) for task_id, selector in enumerate(shards)]
+    workers = global_params.PARALLEL_WORKERS or multiprocessing.cpu_count()
+    # without FUNCTION_TIMEOUT the global budget is split between the shards, the
+    # workers run min(workers, shards) of them at a time
+    function_timeout = global_params.FUNCTION_TIMEOUT or \
+        max(1, global_params.GLOBAL_TIMEOUT * min(workers, len(tasks)) // len(tasks))
+    log.debug("Exploring %d functions with %d workers, %d seconds each", len(tasks), workers, function_timeout)
+    run_in_pool(explore_function, tasks, workers)
+
+def run_in_pool(worker, tasks, workers):
+    global forked_visited_edges
+    global forked_counters
+
+    # the workers are forked after the CFG is built and inherit it, every task
+    # starts from the loop counts and variable counters the main process had at that point
+    forked_visited_edges = dict(global_visited_edges)
+    forked_counters = (gen.count, gen.countstack, gen.countdata)
+    pool = multiprocessing.get_context("fork").Pool(min(workers, len(tasks)))
+    try:
+        for worker_results in pool.imap_unordered(worker, tasks):
+            merge_path_results(serialization.loads(worker_results))
+    finally:
+        pool.terminate()
+        pool.join()
+
+# 在 worker 进程中执行任务之前重置结果和求解器
+def init_worker(task_id):
+    global solver
+    global test_case_prefix
+    global global_visited_edges
+
+    init_path_results()
+    global_visited_edges = dict(forked_visited_edges)
+    solver = PathSolver(global_params.TIMEOUT, new_query_cache(), new_solver_cache(),
+                        global_params.SOLVER_ASSUMPTIONS, global_params.VAR_CACHE_SIZE)
+    test_case_prefix = "%d_" % task_id
+    # symbolic variables of different tasks must not share a name, a worker that
+    # runs several tasks starts every one of them from the forked counters
+    offset = (task_id + 1) * 10 ** 6
+    count, countstack, countdata = forked_counters
+    gen.count = count + offset
+    gen.countstack = countstack + offset
+    gen.countdata = countdata + offset
+
+def explore_until(state, deadline):
+    # stop a second before the main process gives up, so the results get back in time
+    deadline = min(deadline, g_deadline - 1)
+    try:
+        with Timeout(sec=max(1, int(deadline - time.time()))):
+            explore_sequentially(state)
+    except TimeoutError:
+        log.debug("Timeout in worker")
+    return serialization.dumps(get_path_results())
+
+# 在 worker 进程中执行一棵子树，返回序列化后的结果
+def explore_subtree(task):
+    task_id, serialized_state = task
+    init_worker(task_id)
+    return explore_until(deserialize_state(serialized_state), g_deadline)
+
+# 在 worker 进程中执行一个函数，selector 为 None 时执行 fallback 函数
+def explore_function(task):
+    global fixed_selector
+    global excluded_selectors
+
+    task_id, (selector, selectors) = task
+    init_worker(task_id)
+    state = get_initial_state()
+    fixed_selector = selector
+    excluded_selectors = selectors if selector is None else []
+    if selector is not None:
+        # calldata shorter than a selector goes to the fallback function
+        path_conditions_and_vars = state.params.path_conditions_and_vars
+        data_size = BitVec(gen.gen_data_size(), 256)
+        path_conditions_and_vars[gen.gen_data_size()] = data_size
+        path_conditions_and_vars["path_condition"].append(UGE(data_size, 4))
+    return explore_until(state, time.time() + function_timeout)
+
+def serialize_state(state):
+    fields = dict(state.__dict__)
+    # AST ids mean nothing in another process
+    fields["params"] = dict(state.params.__dict__, safe_obligations={}, memory=state.params.memory.dump())
+    # a z3 model cannot be serialized, the worker finds a new one
+    fields["model"] = None
+    fields["model_checked"] = 0
+    return serialization.dumps(fields)
+
+def deserialize_state(data):
+    fields = serialization.loads(data)
+    fields["params"]["memory"] = PagedMemory.load(fields["params"]["memory"])
+    fields["params"] = Parameter(**fields["params"])
+    return State(**fields)
 
 
 # Symbolically executing a block from the start address
-# 现在实际上已经获得了 block 和边了，但是对于 block 之间连续的逻辑，我们需要做一个深度优先遍历
-# 所以 sys_exec_block 会是一个递归函数
-def sym_exec_block(params, block, pre_block, depth, func_call, current_func_name):
+# 现在实际上已经获得了 block 和边了，sym_exec_block 执行一个 block，
+# 返回需要继续执行的后继状态，由 explore 放入工作表
+def sym_exec_block(state):
     global solver
-    global visited_edges
     global money_flow_all_paths
     global path_conditions
     global global_problematic_pcs
@@ -641,29 +956,16 @@ def sym_exec_block(params, block, pre_block, depth, func_call, current_func_name
     global results
     global g_src_map
 
-    # 对已经访问过的进行标记
-    visited = params.visited
-    # 作为符号化执行的虚拟出来的栈
-    stack = params.stack
-    # gas_memory
-    mem = params.mem
-    # 符号化执行虚拟出来的内存
-    memory = params.memory
-    # 这是在上面定义的一些链的常量(主要是 z3)
-    global_state = params.global_state
-    # ？？？
-    sha3_list = params.sha3_list
-    # 用于填充 block 与 block 之间的中间条件以及变量
-    path_conditions_and_vars = params.path_conditions_and_vars
-    # 代表着分析结果
-    analysis = params.analysis
-    calls = params.calls
-    overflow_pcs = params.overflow_pcs
+    block = state.block
+    depth = state.depth
+    func_call = state.func_call
+    current_func_name = state.current_func_name
+    visited_edges = state.visited_edges
 
-    Edge = namedtuple("Edge", ["v1", "v2"]) # 具名元组 Factory Function for tuples is used as dictionary key
     if block < 0:
         log.debug("UNKNOWN JUMP ADDRESS. TERMINATING THIS PATH")
-        return ["ERROR"]
+        state.discard()
+        return []
 
     log.debug("Reach block address %d \n", block)
 
@@ -672,32 +974,28 @@ def sym_exec_block(params, block, pre_block, depth, func_call, current_func_name
         # 如果是函数块，则得到 current_func_name
         if block in start_block_to_func_sig:
             func_sig = start_block_to_func_sig[block]
-            current_func_name = g_src_map.sig_to_func[func_sig]
-            pattern = r'(\w[\w\d_]*)\((.*)\)$'
-            match = re.match(pattern, current_func_name)
-            if match:
-                current_func_name =  list(match.groups())[0]
-
-    # 构建当前边(前 block 起始 pc, 当前 block 起始 pc)
-    current_edge = Edge(pre_block, block)
-    # 更新当前边的访问次数
-    if current_edge in visited_edges:   
-        updated_count_number = visited_edges[current_edge] + 1
-        visited_edges.update({current_edge: updated_count_number})
-    # 如果当前的 edges 没有被 visited 过，则更新为 1
-    else:
-        visited_edges.update({current_edge: 1})
+            current_func_name = g_src_map.sig_to_func_name[func_sig]
+
+    # 构建当前边(前 block 起始 pc, 当前 block 起始 pc)，并更新该边的访问次数
+    # Edges into a JUMPI block are counted per path (the recursive version undid
+    # them when the branch returned), all other edges are counted over the whole run
+    current_edge = Edge(state.pre_block, block)
+    if jump_type.get(block) != "conditional":
+        visited_edges = global_visited_edges
+    visited_edges[current_edge] = visited_edges.get(current_edge, 0) + 1
 
     # 如果这一个 edges 大于了循环的最高限制
     if visited_edges[current_edge] > global_params.LOOP_LIMIT:
         log.debug("Overcome a number of loop limit. Terminating this path ...")
-        return stack
+        state.discard()
+        return []
 
-    # 计算当前的 gas，如果大于了限制，则返回 stack
-    current_gas_used = analysis["gas"]  # 获取当前已消耗的 gas
+    # 计算当前的 gas，如果大于了限制，则终止这条路径
+    current_gas_used = state.params.analysis["gas"]  # 获取当前已消耗的 gas
     if current_gas_used > global_params.GAS_LIMIT:  # 处理 gas 超过上限的情况
         log.debug("Run out of gas. Terminating this path ... ")
-        return stack
+        state.discard()
+        return []
 
     # Execute every instruction, one at a time
     # 执行每个指令，一次一个
@@ -706,11 +1004,34 @@ def sym_exec_block(params, block, pre_block, depth, func_call, current_func_name
         block_ins = vertices[block].get_instructions()
     except KeyError:
         log.debug("This path results in an exception, possibly an invalid jump address")
-        return ["ERROR"]
+        state.discard()
+        return []
+
+    params = state.take_params()
+    # 对已经访问过的进行标记
+    visited = params.visited
+    # 这是在上面定义的一些链的常量(主要是 z3)
+    global_state = params.global_state
+    # 用于填充 block 与 block 之间的中间条件以及变量
+    path_conditions_and_vars = params.path_conditions_and_vars
+    # 代表着分析结果
+    analysis = params.analysis
+
+    if global_params.LOOP_WIDENING and block in static_cfg.loop_headers and not widen_loop(params, block):
+        log.debug("Loop at %d was widened. Terminating this path ...", block)
+        return []
+
+    solver.load(path_conditions_and_vars["path_condition"])
+    # a block that raised may have left its checks behind
+    del pending_obligations[:]
 
     # 循环执行当前 block 的指令，所有的符号化执行的内容全部都在 sym_exec_ins 函数中
-    for instr in block_ins: # 符号执行块中的每一个指令
-        sym_exec_ins(params, block, instr, func_call, current_func_name)
+    # 块开头的纯指令有摘要时直接套用
+    start = 0
+    if block_summaries.max_size > 0:
+        start = exec_block_prefix(params, block, block_ins, func_call, current_func_name)
+    exec_instructions(params, block, block_ins[start:], func_call, current_func_name)
+    discharge_obligations(params)
 
     # Mark that this basic block in the visited blocks
     # 在已访问的块中标记此基本块
@@ -719,17 +1040,19 @@ def sym_exec_block(params, block, pre_block, depth, func_call, current_func_name
 
     # 块指令执行完后(有块的指令分析结果)，添加 money 分析和时间戳依赖分析结果
     # 把之前添加的一些 bug 结果进行汇总
-    reentrancy_all_paths.append(analysis["reentrancy_bug"])
+    # a successor may keep writing to params, so the results keep copies
+    reentrancy_all_paths.append(list(analysis["reentrancy_bug"]))
     if analysis["money_flow"] not in money_flow_all_paths:
-        global_problematic_pcs["money_concurrency_bug"].append(analysis["money_concurrency_bug"])
-        money_flow_all_paths.append(analysis["money_flow"])
-        path_conditions.append(path_conditions_and_vars["path_condition"])
-        global_problematic_pcs["time_dependency_bug"].append(analysis["time_dependency_bug"])
+        global_problematic_pcs["money_concurrency_bug"].append(list(analysis["money_concurrency_bug"]))
+        money_flow_all_paths.append(list(analysis["money_flow"]))
+        path_conditions.append(list(path_conditions_and_vars["path_condition"]))
+        global_problematic_pcs["time_dependency_bug"].append(dict(analysis["time_dependency_bug"]))
         all_gs.append(copy_global_values(global_state))
 
+    successors = []
     # Go to next Basic Block(s)
     # 然后前往下一个 block
-    # 如果这个 block 的类型是 terminal 或者 递归的深度大于最大深度限制了
+    # 如果这个 block 的类型是 terminal 或者 深度大于最大深度限制了
     if jump_type[block] == "terminal" or depth > global_params.DEPTH_LIMIT:
         global total_no_of_paths
         global no_of_test_cases
@@ -739,9 +1062,10 @@ def sym_exec_block(params, block, pre_block, depth, func_call, current_func_name
         # 如果要求生成测试用例，则..
         if global_params.GENERATE_TEST_CASES:
             try:
+                solver.check()
                 model = solver.model()
                 no_of_test_cases += 1
-                filename = "test%s.otest" % no_of_test_cases
+                filename = "test%s%s.otest" % (test_case_prefix, no_of_test_cases)
                 with open(filename, 'w') as f:
                     for variable in model.decls():
                         f.write(str(variable) + " = " + str(model[variable]) + "\n")
@@ -759,1443 +1083,1784 @@ def sym_exec_block(params, block, pre_block, depth, func_call, current_func_name
 
     # 如果是没有条件语句的跳转
     elif jump_type[block] == "unconditional":  # executing "JUMP"
-        # 继任者 = 当前 block 跳转的目标
+        # 继任者 = 当前 block 跳转的目标，不分叉的边直接沿用当前的参数
         successor = vertices[block].get_jump_target()
-        # 新的参数
-        new_params = params.copy()
-        # 获取新的 program counter
-        new_params.global_state["pc"] = successor
         if g_src_map:
             # 通过 program counter 和之前的 source map 获取源码
-            source_code = g_src_map.get_source_code(global_state['pc'])
-            if source_code in g_src_map.func_call_names:
+            if g_src_map.is_func_call(global_state['pc']):
                 func_call = global_state['pc']
-        sym_exec_block(new_params, successor, block, depth, func_call, current_func_name)
+        successors.append(State(params, successor, block, depth, func_call, current_func_name, state.visited_edges, state.forks,
+                                model=state.model, model_checked=state.model_checked))
     # 如果跳转类型是 fall to，即什么都不做
     elif jump_type[block] == "falls_to":  # just follow to the next basic block
         successor = vertices[block].get_falls_to()
-        new_params = params.copy()
-        new_params.global_state["pc"] = successor
-        sym_exec_block(new_params, successor, block, depth, func_call, current_func_name)
+        successors.append(State(params, successor, block, depth, func_call, current_func_name, state.visited_edges, state.forks,
+                                model=state.model, model_checked=state.model_checked))
     # 如果跳转类型是条件跳转
     elif jump_type[block] == "conditional":  # executing "JUMPI"
 
-        # A choice point, we proceed with depth first search
+        # A choice point, both feasible branches become new states
         # 则先获取分支的表达式
         branch_expression = vertices[block].get_branch_expression()
+        negated_branch_expression = Not(branch_expression)
+        path_condition = path_conditions_and_vars["path_condition"]
+        branch_checked = len(path_condition) + 1
+
+        # 先用路径上一次的 model 判断：model 满足的一边一定可行，不必调用求解器
+        model = state.model
+        if model is not None and not satisfies(model, path_condition[state.model_checked:]):
+            model = None
 
         log.debug("Branch expression: " + str(branch_expression))
-        # 设置 solver 的一个边界
-        solver.push()  # SET A BOUNDARY FOR SOLVER
-        # 给 solver 增加一个边界表达式
-        solver.add(branch_expression)
-        # 下面的这一部分是对 JUMPI 的条件为 true 检查
-        try:
-            # 如果 solver 检测处有不满足的地方
-            if solver.check() == unsat:
-                # 则返回有不可解的路径
-                log.debug("INFEASIBLE PATH DETECTED")
-            else:
-                # 则跳转到下一个目标
-                left_branch = vertices[block].get_jump_target()
-                new_params = params.copy()
-                new_params.global_state["pc"] = left_branch
-                # 在 path_... 的变量中加入这一个分支的 expression
-                new_params.path_conditions_and_vars["path_condition"].append(branch_expression)
-                last_idx = len(new_params.path_conditions_and_vars["path_condition"]) - 1
-                # 定位上一个 inx 发生的 bug 并保存
-                new_params.analysis["time_dependency_bug"][last_idx] = global_state["pc"]
-                # 继续进入下一个 block
-                sym_exec_block(new_params, left_branch, block, depth, func_call, current_func_name)
-        except TimeoutError:
-            raise
-        except Exception as e:
-            if global_params.DEBUG_MODE:
-                traceback.print_exc()
+        left_branch = vertices[block].get_jump_target()
+        if model is not None and satisfies(model, [branch_expression]):
+            successors.append(State(params, left_branch, block, depth, func_call, current_func_name, dict(state.visited_edges), state.forks + 1,
+                                    branch_expression, global_state["pc"], model, branch_checked))
+        else:
+            # 下面的这一部分是对 JUMPI 的条件为 true 检查，分支表达式作为 assumption 交给求解器
+            try:
+                # 如果 solver 检测处有不满足的地方
+                if solver.check(branch_expression) == unsat:
+                    # 则返回有不可解的路径
+                    log.debug("INFEASIBLE PATH DETECTED")
+                else:
+                    # 则跳转到下一个目标，执行时在 path_... 的变量中加入这一个分支的 expression
+                    # 并记录 JUMPI 的 pc (时间戳依赖)
+                    successors.append(State(params, left_branch, block, depth, func_call, current_func_name, dict(state.visited_edges), state.forks + 1,
+                                            branch_expression, global_state["pc"],
+                                            branch_model(model, path_condition, branch_expression), branch_checked))
+            except TimeoutError:
+                raise
+            except Exception as e:
+                if global_params.DEBUG_MODE:
+                    traceback.print_exc()
 
         # 下面的条件是对 JUMPI 为 false 条件的检查
-        solver.pop()  # POP SOLVER CONTEXT
-
-        solver.push()  # SET A BOUNDARY FOR SOLVER
-        negated_branch_expression = Not(branch_expression)
-        solver.add(negated_branch_expression)
-
         log.debug("Negated branch expression: " + str(negated_branch_expression))   # 否定
-
+        right_branch = vertices[block].get_falls_to()
+        if model is not None and satisfies(model, [negated_branch_expression]):
+            successors.append(State(params, right_branch, block, depth, func_call, current_func_name, dict(state.visited_edges), state.forks + 1,
+                                    negated_branch_expression, global_state["pc"], model, branch_checked))
+        else:
+            try:
+                if solver.check(negated_branch_expression) == unsat:
+                    log.debug("INFEASIBLE PATH DETECTED")
+                else:
+                    successors.append(State(params, right_branch, block, depth, func_call, current_func_name, dict(state.visited_edges), state.forks + 1,
+                                            negated_branch_expression, global_state["pc"],
+                                            branch_model(model, path_condition, negated_branch_expression), branch_checked))
+            except TimeoutError:
+                raise
+            except Exception as e:
+                if global_params.DEBUG_MODE:
+                    traceback.print_exc()
+    else:
+        raise Exception('Unknown Jump-Type')
+    return successors
+
+
+# 求解器找到的分支 model 只给出切分后相关变量的值，其余变量沿用路径原来的 model；
+# 合并后的 model 必须满足整条路径条件和分支，否则返回 None
+# The solver's model of a sliced query only assigns the variables of the
+# slice, the other variables keep their values from the model of the path.
+def branch_model(model, path_condition, expression):
+    found = solver.model()
+    if not hasattr(found, "eval"):
+        return None
+    # a cached model may come from another query, its other values mean nothing here
+    names = solver.query_vars()
+    merged = Model()
+    if model is not None:
+        for decl in model.decls():
+            if decl.name() not in names:
+                merged.update_value(decl, model[decl])
+    for decl in found.decls():
+        if decl.name() in names:
+            merged.update_value(decl, found[decl])
+    if satisfies(merged, path_condition) and satisfies(merged, [expression]):
+        return merged
+    return None
+
+# 检测 JUMPI 块的 jump_target 块和 falls_to 块中是否有 REVERT 指令
+# The jump target is the one set by the last execution of the JUMPI, it is
+# only known once the block ran.
+def branch_reverts(block):
+    if jump_type[block] != 'conditional':
+        return False
+    return block_facts[vertices[block].get_jump_target()].has_revert or block_facts[block].falls_to_reverts
+
+# ADD/SUB 的溢出检查先记为待检查的条件，在基本块结束(或遇到 REVERT)时一起检查：
+# 一个块中的条件只用一次查询 Or(...) 检查，通常全部 unsat；在路径上已经证明 unsat 的条件
+# 在更长的路径条件下仍然 unsat，不再检查。
+# Overflow/underflow checks are recorded as obligations and discharged in a
+# batch at the end of the block. The path condition length is recorded too,
+# each obligation is checked against the path condition it was created under.
+def add_obligation(params, kind, pc, expr):
+    if summary_obligations is not None:
+        summary_obligations.append((kind, pc, expr))
+    if expr.get_id() in params.safe_obligations:
+        return
+    for other in pending_obligations:
+        if other[1] == pc and other[2].get_id() == expr.get_id():
+            return
+    path_condition = params.path_conditions_and_vars["path_condition"]
+    pending_obligations.append((kind, pc, expr, len(path_condition)))
+
+def discharge_obligations(params):
+    if not pending_obligations:
+        return
+    obligations = list(pending_obligations)
+    del pending_obligations[:]
+    path_condition = params.path_conditions_and_vars["path_condition"]
+    start = 0
+    while start < len(obligations):
+        length = obligations[start][3]
+        end = start
+        while end < len(obligations) and obligations[end][3] == length:
+            end += 1
+        solver.load(path_condition[:length])
+        check_obligations(params, obligations[start:end])
+        start = end
+    solver.load(path_condition)
+
+def check_obligations(params, obligations):
+    undecided = obligations
+    if len(obligations) > 1:
         try:
-            if solver.check() == unsat:
-                # Note that this check can be optimized. I.e. if the previous check succeeds,
-                # no need to check for the negated condition, but we can immediately go into
-                # the else branch
-                log.debug("INFEASIBLE PATH DETECTED")
-            else:
-                right_branch = vertices[block].get_falls_to()
-                new_params = params.copy()
-                new_params.global_state["pc"] = right_branch
-                new_params.path_conditions_and_vars["path_condition"].append(negated_branch_expression)
-                last_idx = len(new_params.path_conditions_and_vars["path_condition"]) - 1
-                new_params.analysis["time_dependency_bug"][last_idx] = global_state["pc"]
-                sym_exec_block(new_params, right_branch, block, depth, func_call, current_func_name)
+            result = check_sat(solver, Or([expr for _, _, expr, _ in obligations]))
         except TimeoutError:
             raise
-        except Exception as e:
-            if global_params.DEBUG_MODE:
-                traceback.print_exc()
-        solver.pop()  # POP SOLVER CONTEXT
-        updated_count_number = visited_edges[current_edge] - 1
-        visited_edges.update({current_edge: updated_count_number})
-    else:
-        updated_count_number = visited_edges[current_edge] - 1
-        visited_edges.update({current_edge: updated_count_number})
-        raise Exception('Unknown Jump-Type')
+        except Exception:
+            # left to the checks one by one
+            result = None
+        if result == unsat:
+            for _, _, expr, _ in obligations:
+                params.safe_obligations[expr.get_id()] = expr
+            return
+        model = solver.model() if result == sat else None
+        if hasattr(model, "eval"):
+            undecided = []
+            for obligation in obligations:
+                if is_true(model.eval(obligation[2], model_completion=True)):
+                    report_obligation(params, obligation, model)
+                else:
+                    undecided.append(obligation)
+    for obligation in undecided:
+        expr = obligation[2]
+        if check_sat(solver, expr) == sat:
+            report_obligation(params, obligation, solver.model())
+        else:
+            params.safe_obligations[expr.get_id()] = expr
 
+def report_obligation(params, obligation, model):
+    kind, pc = obligation[0], obligation[1]
+    if kind == "integer_overflow":
+        global_problematic_pcs['integer_overflow'].append(Overflow(pc, model))
+        params.overflow_pcs.append(pc)
+    else:
+        global_problematic_pcs['integer_underflow'].append(Underflow(pc, model))
+
+# 按函数分片执行时，calldata 第一个字的高 4 字节是函数选择器。
+# fallback 分片中一条路径只约束第一次读到的字，之后再读 msg.sig 时返回同一个字，
+# 路径条件中不会出现重复的约束
+def constrain_selector(word, path_conditions_and_vars):
+    if fixed_selector is not None:
+        return Concat(BitVecVal(fixed_selector, 32), Extract(223, 0, word))
+    if excluded_selectors:
+        constrained = path_conditions_and_vars.get("Id_selector_word")
+        if constrained is not None:
+            return constrained
+        path_conditions_and_vars["Id_selector_word"] = word
+        selector = Extract(255, 224, word)
+        path_conditions_and_vars["path_condition"].append(And([selector != s for s in excluded_selectors]))
+    return word
 
 # Symbolically executing an instruction
 # 象征性地执行一条指令
-def sym_exec_ins(params, block, instr, func_call, current_func_name):
-    global MSIZE
-    global visited_pcs
-    global solver
-    global vertices
-    global edges
-    global g_src_map
-    global calls_affect_state
-    global data_source
-
+# 操作数都是具体值的指令先走 exec_concrete，不行的再交给 sym_exec_ins
+def exec_instructions(params, block, instructions, func_call, current_func_name):
+    global_state = params.global_state
     stack = params.stack
     mem = params.mem
-    memory = params.memory
+    analysis = params.analysis
+    # the symbolic evm test pushes bitvectors, it always takes sym_exec_ins
+    concrete = global_params.UNIT_TEST != 3
+    for instr in instructions: # 符号执行块中的每一个指令
+        pc = global_state["pc"]
+        if concrete and exec_concrete(instr, stack, mem, global_state, analysis):
+            visited_pcs.add(pc)
+        else:
+            sym_exec_ins(params, block, instr, func_call, current_func_name)
+
+# 执行块开头只操作栈的指令: 以相同的栈输入执行过时套用摘要，否则照常执行并记录摘要。
+# 返回执行了的指令条数
+def exec_block_prefix(params, block, block_ins, func_call, current_func_name):
+    global summary_obligations
+    prefix = block_summaries.prefix(block, block_ins)
+    stack = params.stack
+    if prefix.length < block_summaries.min_length or len(stack) < prefix.depth:
+        return 0
+    reverts = False
+    if prefix.checked:
+        try:
+            reverts = branch_reverts(block)
+        except KeyError:
+            # ADD/SUB raise the same error when they are interpreted
+            return 0
+    base = len(stack) - prefix.depth
+    inputs = stack[base:]
+    key = block_summaries.key(block, inputs, reverts)
+    if key is None:
+        return 0
+
     global_state = params.global_state
-    sha3_list = params.sha3_list
-    path_conditions_and_vars = params.path_conditions_and_vars
     analysis = params.analysis
-    calls = params.calls
-    overflow_pcs = params.overflow_pcs
+    summary = block_summaries.get(key)
+    if summary is None:
+        gas = analysis["gas"] - analysis["gas_mem"]
+        summary_obligations = []
+        try:
+            exec_instructions(params, block, block_ins[:prefix.length], func_call, current_func_name)
+        finally:
+            obligations = summary_obligations
+            summary_obligations = None
+        gas = analysis["gas"] - analysis["gas_mem"] - gas
+        block_summaries.put(key, inputs, BlockSummary(stack[base:], gas, obligations, global_state["pc"]))
+        return prefix.length
+
+    del stack[base:]
+    stack.extend(summary.outputs)
+    visited_pcs.update(prefix.pcs)
+    global_state["pc"] = summary.end_pc
+    charge_gas(analysis, params.mem, summary.gas)
+    for kind, pc, expr in summary.obligations:
+        add_obligation(params, kind, pc, expr)
+    return prefix.length
+
+def sym_exec_ins(params, block, instr, func_call, current_func_name):
+    global_state = params.global_state
 
     visited_pcs.add(global_state["pc"])
 
-    instr_parts = str.split(instr, ' ')
-    opcode = instr_parts[0]
+    handler = opcode_handlers[instr.opcode]
+    if handler is not exec_invalid and handler is not exec_assertfail:
+        # collecting the analysis result by calling this skeletal function
+        # 通过调用这个骨架函数来收集分析结果
+        # this should be done before symbolically executing the instruction,
+        # 这应该在符号执行指令之前完成
+        # since SE will modify the stack and mem
+        # 因为符号执行将修改 stack 和 mem
+        update_analysis(params.analysis, instr.name, params.stack, params.mem, global_state, params.path_conditions_and_vars, solver)
 
-    if opcode == "INVALID":
-        return
-    elif opcode == "ASSERTFAIL":
-        if g_src_map:
-            source_code = g_src_map.get_source_code(global_state['pc'])
-            source_code = source_code.split("(")[0]
-            func_name = source_code.strip()
-            if check_sat(solver, False) != unsat:
-                model = solver.model()
-            if func_name == "assert":
-                global_problematic_pcs["assertion_failure"].append(Assertion(global_state["pc"], model))
-            elif func_call != -1:
-                global_problematic_pcs["assertion_failure"].append(Assertion(func_call, model))
-        return
+        # 如果确认存在重入则将 pc 添加到 global_problematic_pcs["reentrancy_bug"]
+        if instr.name == "CALL" and params.analysis["reentrancy_bug"] and params.analysis["reentrancy_bug"][-1]:
+            global_problematic_pcs["reentrancy_bug"].append(global_state["pc"])
+
+        log.debug("==============================")
+        log.debug("EXECUTING: %s", instr)
 
-    # collecting the analysis result by calling this skeletal function
-    # 通过调用这个骨架函数来收集分析结果
-    # this should be done before symbolically executing the instruction,
-    # 这应该在符号执行指令之前完成
-    # since SE will modify the stack and mem
-    # 因为符号执行将修改 stack 和 mem
-    update_analysis(analysis, opcode, stack, mem, global_state, path_conditions_and_vars, solver)
-
-    # 如果确认存在重入则将 pc 添加到 global_problematic_pcs["reentrancy_bug"]
-    if opcode == "CALL" and analysis["reentrancy_bug"] and analysis["reentrancy_bug"][-1]:
-        global_problematic_pcs["reentrancy_bug"].append(global_state["pc"])
-
-    log.debug("==============================")
-    log.debug("EXECUTING: " + instr)
-
-    #
-    # 以下是指令执行
-    #
-    #  0s: Stop and Arithmetic Operations
-    #
-    if opcode == "STOP":
+    handler(instr, params, block, func_call, current_func_name)
+
+#
+# 以下是指令执行，每条指令一个处理函数，由 sym_exec_ins 按 opcode 查表调用
+#
+def exec_invalid(instr, params, block, func_call, current_func_name):
+    return
+
+def exec_assertfail(instr, params, block, func_call, current_func_name):
+    global_state = params.global_state
+    if g_src_map:
+        source_code = g_src_map.get_source_code(global_state['pc'])
+        source_code = source_code.split("(")[0]
+        func_name = source_code.strip()
+        if check_sat(solver) != unsat:
+            model = solver.model()
+        if func_name == "assert":
+            global_problematic_pcs["assertion_failure"].append(Assertion(global_state["pc"], model))
+        elif func_call != -1:
+            global_problematic_pcs["assertion_failure"].append(Assertion(func_call, model))
+    return
+
+#
+#  0s: Stop and Arithmetic Operations
+#
+def exec_stop(instr, params, block, func_call, current_func_name):
+    global_state = params.global_state
+    global_state["pc"] = global_state["pc"] + 1
+    return
+
+def exec_add(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 1:
         global_state["pc"] = global_state["pc"] + 1
-        return
-    elif opcode == "ADD":
-        if len(stack) > 1:
-            global_state["pc"] = global_state["pc"] + 1
-            first = stack.pop(0)
-            second = stack.pop(0)
-            # Type conversion is needed when they are mismatched
-            if isReal(first) and isSymbolic(second):
-                first = BitVecVal(first, 256)
-                computed = first + second
-            elif isSymbolic(first) and isReal(second):
-                second = BitVecVal(second, 256)
-                computed = first + second
-            else:
-                # both are real and we need to manually modulus with 2 ** 256
-                # if both are symbolic z3 takes care of modulus automatically
-                computed = (first + second) % (2 ** 256)
-            computed = simplify(computed) if is_expr(computed) else computed
-
-            check_revert = False
-            if jump_type[block] == 'conditional':
-                jump_target = vertices[block].get_jump_target()
-                falls_to = vertices[block].get_falls_to()
-                # 检测 jump_target 块的指令和 falls_to 块的指令中是否有 REVERT 指令
-                check_revert = any([True for instruction in vertices[jump_target].get_instructions() if instruction.startswith('REVERT')])
-                if not check_revert:
-                    check_revert = any([True for instruction in vertices[falls_to].get_instructions() if instruction.startswith('REVERT')])
-
-            # integer_overflow 检测，有 REVERT 指令则不需要检测，会撤销，不会导致 integer_overflow
-            if jump_type[block] != 'conditional' or not check_revert:
-                if not isAllReal(computed, first):
-                    solver.push()
-                    solver.add(UGT(first, computed))
-                    # 如果 first > computed 可满足，即两数相加后反而小于第一个数，则出现了 integer_overflow
-                    if check_sat(solver) == sat:
-                        global_problematic_pcs['integer_overflow'].append(Overflow(global_state['pc'] - 1, solver.model()))
-                        overflow_pcs.append(global_state['pc'] - 1)
-                    solver.pop()
-
-            stack.insert(0, computed)
-        else:
-            raise ValueError('STACK underflow')
-    # 难道相乘就不会出现 integer_overflow 么？不严谨吧。。。
-    elif opcode == "MUL":
-        if len(stack) > 1:
-            global_state["pc"] = global_state["pc"] + 1
-            first = stack.pop(0)
-            second = stack.pop(0)
-            if isReal(first) and isSymbolic(second):
-                first = BitVecVal(first, 256)
-            elif isSymbolic(first) and isReal(second):
-                second = BitVecVal(second, 256)
-            computed = first * second & UNSIGNED_BOUND_NUMBER
-            computed = simplify(computed) if is_expr(computed) else computed
-            stack.insert(0, computed)
+        first = stack.pop()
+        second = stack.pop()
+        # Type conversion is needed when they are mismatched
+        if isReal(first) and isSymbolic(second):
+            first = bv_val(first)
+            computed = first + second
+        elif isSymbolic(first) and isReal(second):
+            second = bv_val(second)
+            computed = first + second
         else:
-            raise ValueError('STACK underflow')
+            # both are real and we need to manually modulus with 2 ** 256
+            # if both are symbolic z3 takes care of modulus automatically
+            computed = (first + second) % (2 ** 256)
+        computed = simplifier.simplify(computed)
+
+        # integer_overflow 检测，有 REVERT 指令则不需要检测，会撤销，不会导致 integer_overflow
+        if not branch_reverts(block):
+            if not isAllReal(computed, first):
+                # 如果 first > computed 可满足，即两数相加后反而小于第一个数，则出现了 integer_overflow
+                add_obligation(params, "integer_overflow", global_state['pc'] - 1, UGT(first, computed))
+
+        stack.push(computed)
+    else:
+        raise ValueError('STACK underflow')
 
-    # integer_underflow 检测
-    elif opcode == "SUB":
-        if len(stack) > 1:
-            global_state["pc"] = global_state["pc"] + 1
-            first = stack.pop(0)
-            second = stack.pop(0)
-            if isReal(first) and isSymbolic(second):
-                first = BitVecVal(first, 256)
-                computed = first - second
-            elif isSymbolic(first) and isReal(second):
-                second = BitVecVal(second, 256)
-                computed = first - second
-            else:
-                computed = (first - second) % (2 ** 256)
-            computed = simplify(computed) if is_expr(computed) else computed
-
-            check_revert = False
-            if jump_type[block] == 'conditional':
-                jump_target = vertices[block].get_jump_target()
-                falls_to = vertices[block].get_falls_to()
-                check_revert = any([True for instruction in vertices[jump_target].get_instructions() if instruction.startswith('REVERT')])
-                if not check_revert:
-                    check_revert = any([True for instruction in vertices[falls_to].get_instructions() if instruction.startswith('REVERT')])
-
-            if jump_type[block] != 'conditional' or not check_revert:
-                if not isAllReal(first, second):
-                    solver.push()
-                    solver.add(UGT(second, first))
-                    if check_sat(solver) == sat:
-                        global_problematic_pcs['integer_underflow'].append(Underflow(global_state['pc'] - 1, solver.model()))
-                    solver.pop()
-
-            stack.insert(0, computed)
+# 难道相乘就不会出现 integer_overflow 么？不严谨吧。。。
+def exec_mul(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 1:
+        global_state["pc"] = global_state["pc"] + 1
+        first = stack.pop()
+        second = stack.pop()
+        if isReal(first) and isSymbolic(second):
+            first = bv_val(first)
+        elif isSymbolic(first) and isReal(second):
+            second = bv_val(second)
+        computed = first * second & UNSIGNED_BOUND_NUMBER
+        computed = simplifier.simplify(computed)
+        stack.push(computed)
+    else:
+        raise ValueError('STACK underflow')
+
+# integer_underflow 检测
+def exec_sub(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 1:
+        global_state["pc"] = global_state["pc"] + 1
+        first = stack.pop()
+        second = stack.pop()
+        if isReal(first) and isSymbolic(second):
+            first = bv_val(first)
+            computed = first - second
+        elif isSymbolic(first) and isReal(second):
+            second = bv_val(second)
+            computed = first - second
         else:
-            raise ValueError('STACK underflow')
-    
-    # 除 0 处理
-    elif opcode == "DIV":
-        if len(stack) > 1:
-            global_state["pc"] = global_state["pc"] + 1
-            first = stack.pop(0)
-            second = stack.pop(0)
-            if isAllReal(first, second):
-                if second == 0:
-                    computed = 0
-                else:
-                    first = to_unsigned(first)
-                    second = to_unsigned(second)
-                    computed = first / second
+            computed = (first - second) % (2 ** 256)
+        computed = simplifier.simplify(computed)
+
+        if not branch_reverts(block):
+            if not isAllReal(first, second):
+                add_obligation(params, "integer_underflow", global_state['pc'] - 1, UGT(second, first))
+
+        stack.push(computed)
+    else:
+        raise ValueError('STACK underflow')
+
+# 除 0 处理
+def exec_div(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 1:
+        global_state["pc"] = global_state["pc"] + 1
+        first = stack.pop()
+        second = stack.pop()
+        if isAllReal(first, second):
+            if second == 0:
+                computed = 0
             else:
-                first = to_symbolic(first)
-                second = to_symbolic(second)
-                solver.push()
-                solver.add( Not (second == 0) )
-                if check_sat(solver) == unsat:
-                    computed = 0
-                else:
-                    computed = UDiv(first, second)
-                solver.pop()
-            computed = simplify(computed) if is_expr(computed) else computed
-            stack.insert(0, computed)
+                first = to_unsigned(first)
+                second = to_unsigned(second)
+                computed = first / second
         else:
-            raise ValueError('STACK underflow')
-    elif opcode == "SDIV":
-        if len(stack) > 1:
-            global_state["pc"] = global_state["pc"] + 1
-            first = stack.pop(0)
-            second = stack.pop(0)
-            if isAllReal(first, second):
-                first = to_signed(first)
-                second = to_signed(second)
-                if second == 0:
-                    computed = 0
-                elif first == -2**255 and second == -1:
-                    computed = -2**255
-                else:
-                    sign = -1 if (first / second) < 0 else 1
-                    computed = sign * ( abs(first) / abs(second) )
+            first = to_symbolic(first)
+            second = to_symbolic(second)
+            if check_sat(solver, Not(second == 0)) == unsat:
+                computed = 0
             else:
-                first = to_symbolic(first)
-                second = to_symbolic(second)
-                solver.push()
-                solver.add(Not(second == 0))
-                if check_sat(solver) == unsat:
-                    computed = 0
-                else:
-                    solver.push()
-                    solver.add( Not( And(first == -2**255, second == -1 ) ))
-                    if check_sat(solver) == unsat:
-                        computed = -2**255
-                    else:
-                        solver.push()
-                        solver.add(first / second < 0)
-                        sign = -1 if check_sat(solver) == sat else 1
-                        z3_abs = lambda x: If(x >= 0, x, -x)
-                        first = z3_abs(first)
-                        second = z3_abs(second)
-                        computed = sign * (first / second)
-                        solver.pop()
-                    solver.pop()
-                solver.pop()
-            computed = simplify(computed) if is_expr(computed) else computed
-            stack.insert(0, computed)
-        else:
-            raise ValueError('STACK underflow')
-    elif opcode == "MOD":
-        if len(stack) > 1:
-            global_state["pc"] = global_state["pc"] + 1
-            first = stack.pop(0)
-            second = stack.pop(0)
-            if isAllReal(first, second):
-                if second == 0:
-                    computed = 0
-                else:
-                    first = to_unsigned(first)
-                    second = to_unsigned(second)
-                    computed = first % second & UNSIGNED_BOUND_NUMBER
+                computed = UDiv(first, second)
+        computed = simplifier.simplify(computed)
+        stack.push(computed)
+    else:
+        raise ValueError('STACK underflow')
 
+def exec_sdiv(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 1:
+        global_state["pc"] = global_state["pc"] + 1
+        first = stack.pop()
+        second = stack.pop()
+        if isAllReal(first, second):
+            first = to_signed(first)
+            second = to_signed(second)
+            if second == 0:
+                computed = 0
+            elif first == -2**255 and second == -1:
+                computed = -2**255
             else:
-                first = to_symbolic(first)
-                second = to_symbolic(second)
-
-                solver.push()
-                solver.add(Not(second == 0))
-                if check_sat(solver) == unsat:
-                    # it is provable that second is indeed equal to zero
-                    computed = 0
-                else:
-                    computed = URem(first, second)
-                solver.pop()
-
-            computed = simplify(computed) if is_expr(computed) else computed
-            stack.insert(0, computed)
+                sign = -1 if (first / second) < 0 else 1
+                computed = sign * ( abs(first) / abs(second) )
         else:
-            raise ValueError('STACK underflow')
-    elif opcode == "SMOD":
-        if len(stack) > 1:
-            global_state["pc"] = global_state["pc"] + 1
-            first = stack.pop(0)
-            second = stack.pop(0)
-            if isAllReal(first, second):
-                if second == 0:
-                    computed = 0
-                else:
-                    first = to_signed(first)
-                    second = to_signed(second)
-                    sign = -1 if first < 0 else 1
-                    computed = sign * (abs(first) % abs(second))
+            first = to_symbolic(first)
+            second = to_symbolic(second)
+            nonzero = Not(second == 0)
+            if check_sat(solver, nonzero) == unsat:
+                computed = 0
             else:
-                first = to_symbolic(first)
-                second = to_symbolic(second)
-
-                solver.push()
-                solver.add(Not(second == 0))
-                if check_sat(solver) == unsat:
-                    # it is provable that second is indeed equal to zero
-                    computed = 0
+                no_overflow = Not(And(first == -2**255, second == -1))
+                if check_sat(solver, nonzero, no_overflow) == unsat:
+                    computed = -2**255
                 else:
-
-                    solver.push()
-                    solver.add(first < 0) # check sign of first element
-                    sign = BitVecVal(-1, 256) if check_sat(solver) == sat \
-                        else BitVecVal(1, 256)
-                    solver.pop()
-
+                    sign = -1 if check_sat(solver, nonzero, no_overflow, first / second < 0) == sat else 1
                     z3_abs = lambda x: If(x >= 0, x, -x)
                     first = z3_abs(first)
                     second = z3_abs(second)
+                    computed = sign * (first / second)
+        computed = simplifier.simplify(computed)
+        stack.push(computed)
+    else:
+        raise ValueError('STACK underflow')
 
-                    computed = sign * (first % second)
-                solver.pop()
+def exec_mod(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 1:
+        global_state["pc"] = global_state["pc"] + 1
+        first = stack.pop()
+        second = stack.pop()
+        if isAllReal(first, second):
+            if second == 0:
+                computed = 0
+            else:
+                first = to_unsigned(first)
+                second = to_unsigned(second)
+                computed = first % second & UNSIGNED_BOUND_NUMBER
 
-            computed = simplify(computed) if is_expr(computed) else computed
-            stack.insert(0, computed)
         else:
-            raise ValueError('STACK underflow')
-    # ADDMOD 也有可能出现 ADDMOD 吧？？？
-    elif opcode == "ADDMOD":    # (a + b) % c
-        if len(stack) > 2:
-            global_state["pc"] = global_state["pc"] + 1
-            first = stack.pop(0)
-            second = stack.pop(0)
-            third = stack.pop(0)
+            first = to_symbolic(first)
+            second = to_symbolic(second)
 
-            if isAllReal(first, second, third):
-                if third == 0:
-                    computed = 0
-                else:
-                    computed = (first + second) % third
+            if check_sat(solver, Not(second == 0)) == unsat:
+                # it is provable that second is indeed equal to zero
+                computed = 0
             else:
-                first = to_symbolic(first)
-                second = to_symbolic(second)
-                solver.push()
-                solver.add( Not(third == 0) )
-                if check_sat(solver) == unsat:
-                    computed = 0
-                else:
-                    first = ZeroExt(256, first)
-                    second = ZeroExt(256, second)
-                    third = ZeroExt(256, third)
-                    computed = (first + second) % third
-                    computed = Extract(255, 0, computed)
-                solver.pop()
-            computed = simplify(computed) if is_expr(computed) else computed
-            stack.insert(0, computed)
-        else:
-            raise ValueError('STACK underflow')
-    elif opcode == "MULMOD":
-        if len(stack) > 2:
-            global_state["pc"] = global_state["pc"] + 1
-            first = stack.pop(0)
-            second = stack.pop(0)
-            third = stack.pop(0)
+                computed = URem(first, second)
 
-            if isAllReal(first, second, third):
-                if third == 0:
-                    computed = 0
-                else:
-                    computed = (first * second) % third
-            else:
-                first = to_symbolic(first)
-                second = to_symbolic(second)
-                solver.push()
-                solver.add( Not(third == 0) )
-                if check_sat(solver) == unsat:
-                    computed = 0
-                else:
-                    first = ZeroExt(256, first)
-                    second = ZeroExt(256, second)
-                    third = ZeroExt(256, third)
-                    computed = URem(first * second, third)
-                    computed = Extract(255, 0, computed)
-                solver.pop()
-            computed = simplify(computed) if is_expr(computed) else computed
-            stack.insert(0, computed)
-        else:
-            raise ValueError('STACK underflow')
-    elif opcode == "EXP":
-        if len(stack) > 1:
-            global_state["pc"] = global_state["pc"] + 1
-            base = stack.pop(0)
-            exponent = stack.pop(0)
-            # Type conversion is needed when they are mismatched
-            if isAllReal(base, exponent):
-                computed = pow(base, exponent, 2**256)
+        computed = simplifier.simplify(computed)
+        stack.push(computed)
+    else:
+        raise ValueError('STACK underflow')
+
+def exec_smod(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 1:
+        global_state["pc"] = global_state["pc"] + 1
+        first = stack.pop()
+        second = stack.pop()
+        if isAllReal(first, second):
+            if second == 0:
+                computed = 0
             else:
-                # The computed value is unknown, this is because power is
-                # not supported in bit-vector theory
-                # 不支持幂操作，设为未知数
-                new_var_name = gen.gen_arbitrary_var()  # some_var_*
-                computed = BitVec(new_var_name, 256)
-            computed = simplify(computed) if is_expr(computed) else computed
-            stack.insert(0, computed)
+                first = to_signed(first)
+                second = to_signed(second)
+                sign = -1 if first < 0 else 1
+                computed = sign * (abs(first) % abs(second))
         else:
-            raise ValueError('STACK underflow')
-    elif opcode == "SIGNEXTEND":
-        if len(stack) > 1:
-            global_state["pc"] = global_state["pc"] + 1
-            first = stack.pop(0)
-            second = stack.pop(0)
-            if isAllReal(first, second):
-                if first >= 32 or first < 0:
-                    computed = second
-                else:
-                    signbit_index_from_right = 8 * first + 7
-                    if second & (1 << signbit_index_from_right):
-                        computed = second | (2 ** 256 - (1 << signbit_index_from_right))
-                    else:
-                        computed = second & ((1 << signbit_index_from_right) - 1 )
+            first = to_symbolic(first)
+            second = to_symbolic(second)
+
+            nonzero = Not(second == 0)
+            if check_sat(solver, nonzero) == unsat:
+                # it is provable that second is indeed equal to zero
+                computed = 0
             else:
-                first = to_symbolic(first)
-                second = to_symbolic(second)
-                solver.push()
-                solver.add( Not( Or(first >= 32, first < 0 ) ) )
-                if check_sat(solver) == unsat:
-                    computed = second
-                else:
-                    signbit_index_from_right = 8 * first + 7
-                    solver.push()
-                    solver.add(second & (1 << signbit_index_from_right) == 0)
-                    if check_sat(solver) == unsat:
-                        computed = second | (2 ** 256 - (1 << signbit_index_from_right))
-                    else:
-                        computed = second & ((1 << signbit_index_from_right) - 1)
-                    solver.pop()
-                solver.pop()
-            computed = simplify(computed) if is_expr(computed) else computed
-            stack.insert(0, computed)
+                # check sign of first element
+                sign = bv_val(-1) if check_sat(solver, nonzero, first < 0) == sat \
+                    else BV_ONE
+
+                z3_abs = lambda x: If(x >= 0, x, -x)
+                first = z3_abs(first)
+                second = z3_abs(second)
+
+                computed = sign * (first % second)
+
+        computed = simplifier.simplify(computed)
+        stack.push(computed)
+    else:
+        raise ValueError('STACK underflow')
+
+# ADDMOD 也有可能出现 ADDMOD 吧？？？
+def exec_addmod(instr, params, block, func_call, current_func_name):  # (a + b) % c
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 2:
+        global_state["pc"] = global_state["pc"] + 1
+        first = stack.pop()
+        second = stack.pop()
+        third = stack.pop()
+
+        if isAllReal(first, second, third):
+            if third == 0:
+                computed = 0
+            else:
+                computed = (first + second) % third
         else:
-            raise ValueError('STACK underflow')
-    #
-    #  10s: Comparison and Bitwise Logic Operations
-    #
-    elif opcode == "LT":
-        if len(stack) > 1:
-            global_state["pc"] = global_state["pc"] + 1
-            first = stack.pop(0)
-            second = stack.pop(0)
-            if isAllReal(first, second):
-                first = to_unsigned(first)
-                second = to_unsigned(second)
-                if first < second:
-                    computed = 1
-                else:
-                    computed = 0
+            first = to_symbolic(first)
+            second = to_symbolic(second)
+            if check_sat(solver, Not(third == 0)) == unsat:
+                computed = 0
             else:
-                computed = If(ULT(first, second), BitVecVal(1, 256), BitVecVal(0, 256))
-            computed = simplify(computed) if is_expr(computed) else computed
-            stack.insert(0, computed)
+                first = ZeroExt(256, first)
+                second = ZeroExt(256, second)
+                third = ZeroExt(256, third)
+                computed = (first + second) % third
+                computed = Extract(255, 0, computed)
+        computed = simplifier.simplify(computed)
+        stack.push(computed)
+    else:
+        raise ValueError('STACK underflow')
+
+def exec_mulmod(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 2:
+        global_state["pc"] = global_state["pc"] + 1
+        first = stack.pop()
+        second = stack.pop()
+        third = stack.pop()
+
+        if isAllReal(first, second, third):
+            if third == 0:
+                computed = 0
+            else:
+                computed = (first * second) % third
         else:
-            raise ValueError('STACK underflow')
-    elif opcode == "GT":
-        if len(stack) > 1:
-            global_state["pc"] = global_state["pc"] + 1
-            first = stack.pop(0)
-            second = stack.pop(0)
-            if isAllReal(first, second):
-                first = to_unsigned(first)
-                second = to_unsigned(second)
-                if first > second:
-                    computed = 1
-                else:
-                    computed = 0
+            first = to_symbolic(first)
+            second = to_symbolic(second)
+            if check_sat(solver, Not(third == 0)) == unsat:
+                computed = 0
             else:
-                computed = If(UGT(first, second), BitVecVal(1, 256), BitVecVal(0, 256))
-            computed = simplify(computed) if is_expr(computed) else computed
-            stack.insert(0, computed)
+                first = ZeroExt(256, first)
+                second = ZeroExt(256, second)
+                third = ZeroExt(256, third)
+                computed = URem(first * second, third)
+                computed = Extract(255, 0, computed)
+        computed = simplifier.simplify(computed)
+        stack.push(computed)
+    else:
+        raise ValueError('STACK underflow')
+
+def exec_exp(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 1:
+        global_state["pc"] = global_state["pc"] + 1
+        base = stack.pop()
+        exponent = stack.pop()
+        # Type conversion is needed when they are mismatched
+        if isAllReal(base, exponent):
+            computed = pow(base, exponent, 2**256)
         else:
-            raise ValueError('STACK underflow')
-    elif opcode == "SLT":  # Not fully faithful to signed comparison
-        if len(stack) > 1:
-            global_state["pc"] = global_state["pc"] + 1
-            first = stack.pop(0)
-            second = stack.pop(0)
-            if isAllReal(first, second):
-                first = to_signed(first)
-                second = to_signed(second)
-                if first < second:
-                    computed = 1
-                else:
-                    computed = 0
+            # The computed value is unknown, this is because power is
+            # not supported in bit-vector theory
+            # 不支持幂操作，设为未知数
+            new_var_name = gen.gen_arbitrary_var()  # some_var_*
+            computed = BitVec(new_var_name, 256)
+        computed = simplifier.simplify(computed)
+        stack.push(computed)
+    else:
+        raise ValueError('STACK underflow')
+
+def exec_signextend(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 1:
+        global_state["pc"] = global_state["pc"] + 1
+        first = stack.pop()
+        second = stack.pop()
+        if isAllReal(first, second):
+            if first >= 32 or first < 0:
+                computed = second
             else:
-                computed = If(first < second, BitVecVal(1, 256), BitVecVal(0, 256))
-            computed = simplify(computed) if is_expr(computed) else computed
-            stack.insert(0, computed)
+                signbit_index_from_right = 8 * first + 7
+                if second & (1 << signbit_index_from_right):
+                    computed = second | (2 ** 256 - (1 << signbit_index_from_right))
+                else:
+                    computed = second & ((1 << signbit_index_from_right) - 1 )
         else:
-            raise ValueError('STACK underflow')
-    elif opcode == "SGT":  # Not fully faithful to signed comparison
-        if len(stack) > 1:
-            global_state["pc"] = global_state["pc"] + 1
-            first = stack.pop(0)
-            second = stack.pop(0)
-            if isAllReal(first, second):
-                first = to_signed(first)
-                second = to_signed(second)
-                if first > second:
-                    computed = 1
+            first = to_symbolic(first)
+            second = to_symbolic(second)
+            in_range = Not(Or(first >= 32, first < 0))
+            if check_sat(solver, in_range) == unsat:
+                computed = second
+            else:
+                signbit_index_from_right = 8 * first + 7
+                if check_sat(solver, in_range, second & (1 << signbit_index_from_right) == 0) == unsat:
+                    computed = second | (2 ** 256 - (1 << signbit_index_from_right))
                 else:
-                    computed = 0
+                    computed = second & ((1 << signbit_index_from_right) - 1)
+        computed = simplifier.simplify(computed)
+        stack.push(computed)
+    else:
+        raise ValueError('STACK underflow')
+
+#
+#  10s: Comparison and Bitwise Logic Operations
+#
+def exec_lt(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 1:
+        global_state["pc"] = global_state["pc"] + 1
+        first = stack.pop()
+        second = stack.pop()
+        if isAllReal(first, second):
+            first = to_unsigned(first)
+            second = to_unsigned(second)
+            if first < second:
+                computed = 1
             else:
-                computed = If(first > second, BitVecVal(1, 256), BitVecVal(0, 256))
-            computed = simplify(computed) if is_expr(computed) else computed
-            stack.insert(0, computed)
+                computed = 0
         else:
-            raise ValueError('STACK underflow')
-    elif opcode == "EQ":
-        if len(stack) > 1:
-            global_state["pc"] = global_state["pc"] + 1
-            first = stack.pop(0)
-            second = stack.pop(0)
-            if isAllReal(first, second):
-                if first == second:
-                    computed = 1
-                else:
-                    computed = 0
+            computed = If(ULT(first, second), BV_ONE, BV_ZERO)
+        computed = simplifier.simplify(computed)
+        stack.push(computed)
+    else:
+        raise ValueError('STACK underflow')
+
+def exec_gt(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 1:
+        global_state["pc"] = global_state["pc"] + 1
+        first = stack.pop()
+        second = stack.pop()
+        if isAllReal(first, second):
+            first = to_unsigned(first)
+            second = to_unsigned(second)
+            if first > second:
+                computed = 1
             else:
-                computed = If(first == second, BitVecVal(1, 256), BitVecVal(0, 256))
-            computed = simplify(computed) if is_expr(computed) else computed
-            stack.insert(0, computed)
+                computed = 0
         else:
-            raise ValueError('STACK underflow')
-    elif opcode == "ISZERO":
-        # Tricky: this instruction works on both boolean and integer,
-        # when we have a symbolic expression, type error might occur
-        # Currently handled by try and catch
-        # 棘手：这条指令适用于布尔型和整数型，当我们有一个符号表达式时，可能会发生类型错误目前由 try 和 catch 处理
-        if len(stack) > 0:
-            global_state["pc"] = global_state["pc"] + 1
-            first = stack.pop(0)
-            if isReal(first):
-                if first == 0:
-                    computed = 1
-                else:
-                    computed = 0
+            computed = If(UGT(first, second), BV_ONE, BV_ZERO)
+        computed = simplifier.simplify(computed)
+        stack.push(computed)
+    else:
+        raise ValueError('STACK underflow')
+
+def exec_slt(instr, params, block, func_call, current_func_name):  # Not fully faithful to signed comparison
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 1:
+        global_state["pc"] = global_state["pc"] + 1
+        first = stack.pop()
+        second = stack.pop()
+        if isAllReal(first, second):
+            first = to_signed(first)
+            second = to_signed(second)
+            if first < second:
+                computed = 1
             else:
-                computed = If(first == 0, BitVecVal(1, 256), BitVecVal(0, 256))
-            computed = simplify(computed) if is_expr(computed) else computed
-            stack.insert(0, computed)
+                computed = 0
         else:
-            raise ValueError('STACK underflow')
-    elif opcode == "AND":
-        if len(stack) > 1:
-            global_state["pc"] = global_state["pc"] + 1
-            first = stack.pop(0)
-            second = stack.pop(0)
-            computed = first & second
-            computed = simplify(computed) if is_expr(computed) else computed
-            stack.insert(0, computed)
+            computed = If(first < second, BV_ONE, BV_ZERO)
+        computed = simplifier.simplify(computed)
+        stack.push(computed)
+    else:
+        raise ValueError('STACK underflow')
+
+def exec_sgt(instr, params, block, func_call, current_func_name):  # Not fully faithful to signed comparison
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 1:
+        global_state["pc"] = global_state["pc"] + 1
+        first = stack.pop()
+        second = stack.pop()
+        if isAllReal(first, second):
+            first = to_signed(first)
+            second = to_signed(second)
+            if first > second:
+                computed = 1
+            else:
+                computed = 0
         else:
-            raise ValueError('STACK underflow')
-    elif opcode == "OR":
-        if len(stack) > 1:
-            global_state["pc"] = global_state["pc"] + 1
-            first = stack.pop(0)
-            second = stack.pop(0)
+            computed = If(first > second, BV_ONE, BV_ZERO)
+        computed = simplifier.simplify(computed)
+        stack.push(computed)
+    else:
+        raise ValueError('STACK underflow')
 
-            computed = first | second
-            computed = simplify(computed) if is_expr(computed) else computed
-            stack.insert(0, computed)
+def exec_eq(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 1:
+        global_state["pc"] = global_state["pc"] + 1
+        first = stack.pop()
+        second = stack.pop()
+        if isAllReal(first, second):
+            if first == second:
+                computed = 1
+            else:
+                computed = 0
+        else:
+            computed = If(first == second, BV_ONE, BV_ZERO)
+        computed = simplifier.simplify(computed)
+        stack.push(computed)
+    else:
+        raise ValueError('STACK underflow')
 
+def exec_iszero(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    # Tricky: this instruction works on both boolean and integer,
+    # when we have a symbolic expression, type error might occur
+    # Currently handled by try and catch
+    # 棘手：这条指令适用于布尔型和整数型，当我们有一个符号表达式时，可能会发生类型错误目前由 try 和 catch 处理
+    if len(stack) > 0:
+        global_state["pc"] = global_state["pc"] + 1
+        first = stack.pop()
+        if isReal(first):
+            if first == 0:
+                computed = 1
+            else:
+                computed = 0
         else:
-            raise ValueError('STACK underflow')
-    elif opcode == "XOR":
-        if len(stack) > 1:
-            global_state["pc"] = global_state["pc"] + 1
-            first = stack.pop(0)
-            second = stack.pop(0)
+            computed = If(first == 0, BV_ONE, BV_ZERO)
+        computed = simplifier.simplify(computed)
+        stack.push(computed)
+    else:
+        raise ValueError('STACK underflow')
 
-            computed = first ^ second
-            computed = simplify(computed) if is_expr(computed) else computed
-            stack.insert(0, computed)
+def exec_and(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 1:
+        global_state["pc"] = global_state["pc"] + 1
+        first = stack.pop()
+        second = stack.pop()
+        computed = first & second
+        computed = simplifier.simplify(computed)
+        stack.push(computed)
+    else:
+        raise ValueError('STACK underflow')
 
-        else:
-            raise ValueError('STACK underflow')
-    elif opcode == "NOT":
-        if len(stack) > 0:
-            global_state["pc"] = global_state["pc"] + 1
-            first = stack.pop(0)
-            computed = (~first) & UNSIGNED_BOUND_NUMBER
-            computed = simplify(computed) if is_expr(computed) else computed
-            stack.insert(0, computed)
-        else:
-            raise ValueError('STACK underflow')
-    elif opcode == "BYTE":
-        if len(stack) > 1:
-            global_state["pc"] = global_state["pc"] + 1
-            first = stack.pop(0)
-            byte_index = 32 - first - 1
-            second = stack.pop(0)
+def exec_or(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 1:
+        global_state["pc"] = global_state["pc"] + 1
+        first = stack.pop()
+        second = stack.pop()
 
-            if isAllReal(first, second):
-                if first >= 32 or first < 0:
-                    computed = 0
-                else:
-                    computed = second & (255 << (8 * byte_index))
-                    computed = computed >> (8 * byte_index)
+        computed = first | second
+        computed = simplifier.simplify(computed)
+        stack.push(computed)
+
+    else:
+        raise ValueError('STACK underflow')
+
+def exec_xor(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 1:
+        global_state["pc"] = global_state["pc"] + 1
+        first = stack.pop()
+        second = stack.pop()
+
+        computed = first ^ second
+        computed = simplifier.simplify(computed)
+        stack.push(computed)
+
+    else:
+        raise ValueError('STACK underflow')
+
+def exec_not(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 0:
+        global_state["pc"] = global_state["pc"] + 1
+        first = stack.pop()
+        computed = (~first) & UNSIGNED_BOUND_NUMBER
+        computed = simplifier.simplify(computed)
+        stack.push(computed)
+    else:
+        raise ValueError('STACK underflow')
+
+def exec_byte(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 1:
+        global_state["pc"] = global_state["pc"] + 1
+        first = stack.pop()
+        byte_index = 32 - first - 1
+        second = stack.pop()
+
+        if isAllReal(first, second):
+            if first >= 32 or first < 0:
+                computed = 0
             else:
-                first = to_symbolic(first)
-                second = to_symbolic(second)
-                solver.push()
-                solver.add( Not (Or( first >= 32, first < 0 ) ) )
-                if check_sat(solver) == unsat:
-                    computed = 0
-                else:
-                    computed = second & (255 << (8 * byte_index))
-                    computed = computed >> (8 * byte_index)
-                solver.pop()
-            computed = simplify(computed) if is_expr(computed) else computed
-            stack.insert(0, computed)
+                computed = second & (255 << (8 * byte_index))
+                computed = computed >> (8 * byte_index)
         else:
-            raise ValueError('STACK underflow')
-    #
-    # 20s: SHA3
-    #
-    elif opcode == "SHA3":
-        if len(stack) > 1:
-            global_state["pc"] = global_state["pc"] + 1
-            s0 = stack.pop(0)
-            s1 = stack.pop(0)
-            if isAllReal(s0, s1):
-                # simulate the hashing of sha3
-                data = [str(x) for x in memory[s0: s0 + s1]]
-                position = ''.join(data)
-                position = re.sub('[\s+]', '', position)
-                position = zlib.compress(six.b(position), 9)
-                position = base64.b64encode(position)
-                position = position.decode('utf-8', 'strict')
-                if position in sha3_list:
-                    stack.insert(0, sha3_list[position])
-                else:
-                    new_var_name = gen.gen_arbitrary_var()  # some_var_*
-                    new_var = BitVec(new_var_name, 256)
-                    sha3_list[position] = new_var
-                    stack.insert(0, new_var)
+            first = to_symbolic(first)
+            second = to_symbolic(second)
+            if check_sat(solver, Not(Or(first >= 32, first < 0))) == unsat:
+                computed = 0
+            else:
+                computed = second & (255 << (8 * byte_index))
+                computed = computed >> (8 * byte_index)
+        computed = simplifier.simplify(computed)
+        stack.push(computed)
+    else:
+        raise ValueError('STACK underflow')
+
+#
+# 20s: SHA3
+#
+def exec_sha3(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    memory = params.memory
+    global_state = params.global_state
+    sha3_list = params.sha3_list
+    path_conditions_and_vars = params.path_conditions_and_vars
+    if len(stack) > 1:
+        global_state["pc"] = global_state["pc"] + 1
+        s0 = stack.pop()
+        s1 = stack.pop()
+        data = memory.hash_input(s0, s1) if isAllReal(s0, s1) else None
+        if isinstance(data, bytes):
+            stack.push(keccak256(data))
+        elif data is not None:
+            value, hints = hash_term(data)
+            # the injectivity hints go to the path condition once per path
+            if ("keccak256", value) not in sha3_list:
+                sha3_list[("keccak256", value)] = value
+                path_conditions_and_vars["path_condition"].extend(hints)
+            stack.push(value)
+        elif isAllReal(s0, s1):
+            # some bytes were written by an instruction that is not simulated,
+            # the same input gets the same variable
+            position = memory.key(s0, s1)
+            if position in sha3_list:
+                stack.push(sha3_list[position])
             else:
-                # push into the execution a fresh symbolic variable
                 new_var_name = gen.gen_arbitrary_var()  # some_var_*
                 new_var = BitVec(new_var_name, 256)
-                path_conditions_and_vars[new_var_name] = new_var
-                stack.insert(0, new_var)
+                sha3_list[position] = new_var
+                stack.push(new_var)
         else:
-            raise ValueError('STACK underflow')
-    #
-    # 30s: Environment Information
-    #
-    elif opcode == "ADDRESS":  # get address of currently executing account
+            # push into the execution a fresh symbolic variable
+            new_var_name = gen.gen_arbitrary_var()  # some_var_*
+            new_var = BitVec(new_var_name, 256)
+            path_conditions_and_vars[new_var_name] = new_var
+            stack.push(new_var)
+    else:
+        raise ValueError('STACK underflow')
+
+#
+# 30s: Environment Information
+#
+def exec_address(instr, params, block, func_call, current_func_name):  # get address of currently executing account
+    stack = params.stack
+    global_state = params.global_state
+    path_conditions_and_vars = params.path_conditions_and_vars
+    global_state["pc"] = global_state["pc"] + 1
+    stack.push(path_conditions_and_vars["Ia"])
+
+def exec_balance(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    path_conditions_and_vars = params.path_conditions_and_vars
+    if len(stack) > 0:
         global_state["pc"] = global_state["pc"] + 1
-        stack.insert(0, path_conditions_and_vars["Ia"])
-    elif opcode == "BALANCE":
-        if len(stack) > 0:
-            global_state["pc"] = global_state["pc"] + 1
-            address = stack.pop(0)
-            if isReal(address) and global_params.USE_GLOBAL_BLOCKCHAIN:
-                new_var = data_source.getBalance(address)
-            else:
-                new_var_name = gen.gen_balance_var()    # balance_*
-                if new_var_name in path_conditions_and_vars:
-                    new_var = path_conditions_and_vars[new_var_name]
-                else:
-                    new_var = BitVec(new_var_name, 256)
-                    path_conditions_and_vars[new_var_name] = new_var
-            if isReal(address):
-                hashed_address = "concrete_address_" + str(address)
-            else:
-                hashed_address = str(address)
-            global_state["balance"][hashed_address] = new_var
-            stack.insert(0, new_var)
+        address = stack.pop()
+        if isReal(address) and global_params.USE_GLOBAL_BLOCKCHAIN:
+            new_var = data_source.getBalance(address)
         else:
-            raise ValueError('STACK underflow')
-    elif opcode == "CALLER":  # get caller address
-        # that is directly responsible for this execution
-        global_state["pc"] = global_state["pc"] + 1
-        stack.insert(0, global_state["sender_address"])
-    elif opcode == "ORIGIN":  # get execution origination address
-        global_state["pc"] = global_state["pc"] + 1
-        stack.insert(0, global_state["origin"])
-    elif opcode == "CALLVALUE":  # get value of this transaction
-        global_state["pc"] = global_state["pc"] + 1
-        stack.insert(0, global_state["value"])
-    elif opcode == "CALLDATALOAD":  # from input data from environment
-        if len(stack) > 0:
-            global_state["pc"] = global_state["pc"] + 1
-            position = stack.pop(0)
-            if g_src_map:
-                source_code = g_src_map.get_source_code(global_state['pc'] - 1)
-                if source_code.startswith("function") and isReal(position) and current_func_name in g_src_map.func_name_to_params:
-                    params =  g_src_map.func_name_to_params[current_func_name]
-                    param_idx = (position - 4) // 32
-                    for param in params:
-                        if param_idx == param['position']:
-                            new_var_name = param['name']
-                            g_src_map.var_names.append(new_var_name)
-                else:
-                    new_var_name = gen.gen_data_var(position)   # Id_*
-            else:
-                new_var_name = gen.gen_data_var(position)   # Id_*
+            new_var_name = gen.gen_balance_var()    # balance_*
             if new_var_name in path_conditions_and_vars:
                 new_var = path_conditions_and_vars[new_var_name]
             else:
                 new_var = BitVec(new_var_name, 256)
                 path_conditions_and_vars[new_var_name] = new_var
-            stack.insert(0, new_var)
+        if isReal(address):
+            hashed_address = "concrete_address_" + str(address)
         else:
-            raise ValueError('STACK underflow')
-    elif opcode == "CALLDATASIZE":
+            hashed_address = str(address)
+        global_state["balance"][hashed_address] = new_var
+        stack.push(new_var)
+    else:
+        raise ValueError('STACK underflow')
+
+def exec_caller(instr, params, block, func_call, current_func_name):  # get caller address
+    stack = params.stack
+    global_state = params.global_state
+    # that is directly responsible for this execution
+    global_state["pc"] = global_state["pc"] + 1
+    stack.push(global_state["sender_address"])
+
+def exec_origin(instr, params, block, func_call, current_func_name):  # get execution origination address
+    stack = params.stack
+    global_state = params.global_state
+    global_state["pc"] = global_state["pc"] + 1
+    stack.push(global_state["origin"])
+
+def exec_callvalue(instr, params, block, func_call, current_func_name):  # get value of this transaction
+    stack = params.stack
+    global_state = params.global_state
+    global_state["pc"] = global_state["pc"] + 1
+    stack.push(global_state["value"])
+
+def exec_calldataload(instr, params, block, func_call, current_func_name):  # from input data from environment
+    stack = params.stack
+    global_state = params.global_state
+    path_conditions_and_vars = params.path_conditions_and_vars
+    if len(stack) > 0:
         global_state["pc"] = global_state["pc"] + 1
-        new_var_name = gen.gen_data_size()  # Id_size
+        position = stack.pop()
+        new_var_name = None
+        if g_src_map and isReal(position):
+            new_var_name = g_src_map.get_parameter_name(global_state['pc'] - 1, current_func_name, (position - 4) // 32)
+            if new_var_name:
+                g_src_map.add_var_name(new_var_name)
+        if not new_var_name:
+            new_var_name = gen.gen_data_var(position)   # Id_*
         if new_var_name in path_conditions_and_vars:
             new_var = path_conditions_and_vars[new_var_name]
         else:
             new_var = BitVec(new_var_name, 256)
             path_conditions_and_vars[new_var_name] = new_var
-        stack.insert(0, new_var)
-    elif opcode == "CALLDATACOPY":  # Copy input data to memory
-        #  TODO: Don't know how to simulate this yet
-        if len(stack) > 2:
-            global_state["pc"] = global_state["pc"] + 1
-            stack.pop(0)
-            stack.pop(0)
-            stack.pop(0)
-        else:
-            raise ValueError('STACK underflow')
-    elif opcode == "CODESIZE":
+        if isReal(position) and position == 0:
+            new_var = constrain_selector(new_var, path_conditions_and_vars)
+        stack.push(new_var)
+    else:
+        raise ValueError('STACK underflow')
+
+def exec_calldatasize(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    path_conditions_and_vars = params.path_conditions_and_vars
+    global_state["pc"] = global_state["pc"] + 1
+    new_var_name = gen.gen_data_size()  # Id_size
+    if new_var_name in path_conditions_and_vars:
+        new_var = path_conditions_and_vars[new_var_name]
+    else:
+        new_var = BitVec(new_var_name, 256)
+        path_conditions_and_vars[new_var_name] = new_var
+    stack.push(new_var)
+
+def exec_calldatacopy(instr, params, block, func_call, current_func_name):  # Copy input data to memory
+    stack = params.stack
+    global_state = params.global_state
+    #  TODO: Don't know how to simulate this yet
+    if len(stack) > 2:
         global_state["pc"] = global_state["pc"] + 1
-        if g_disasm_file.endswith('.disasm'):
-            evm_file_name = g_disasm_file[:-7]
-        else:
-            evm_file_name = g_disasm_file
-        with open(evm_file_name, 'r') as evm_file:
-            evm = evm_file.read()[:-1]
-            code_size = len(evm)/2
-            stack.insert(0, code_size)
-    elif opcode == "CODECOPY":
-        if len(stack) > 2:
-            global_state["pc"] = global_state["pc"] + 1
-            mem_location = stack.pop(0)
-            code_from = stack.pop(0)
-            no_bytes = stack.pop(0)
-            current_miu_i = global_state["miu_i"]
-
-            if isAllReal(mem_location, current_miu_i, code_from, no_bytes):
-                if six.PY2:
-                    temp = long(math.ceil((mem_location + no_bytes) / float(32)))
-                else:
-                    temp = int(math.ceil((mem_location + no_bytes) / float(32)))
+        mem_location = stack.pop()
+        stack.pop()
+        no_bytes = stack.pop()
+        params.memory.forget(mem_location, no_bytes)
+    else:
+        raise ValueError('STACK underflow')
 
-                if temp > current_miu_i:
-                    current_miu_i = temp
+def exec_codesize(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    global_state["pc"] = global_state["pc"] + 1
+    stack.push(len(g_bytecode))
 
-                if g_disasm_file.endswith('.disasm'):
-                    evm_file_name = g_disasm_file[:-7]
-                else:
-                    evm_file_name = g_disasm_file
-                with open(evm_file_name, 'r') as evm_file:
-                    evm = evm_file.read()[:-1]
-                    start = code_from * 2
-                    end = start + no_bytes * 2
-                    code = evm[start: end]
-                mem[mem_location] = int(code, 16)
-            else:  
-                new_var_name = gen.gen_code_var("Ia", code_from, no_bytes)  # code_Ia_*_*
-                if new_var_name in path_conditions_and_vars:
-                    new_var = path_conditions_and_vars[new_var_name]
-                else:
-                    new_var = BitVec(new_var_name, 256)
-                    path_conditions_and_vars[new_var_name] = new_var
+def exec_codecopy(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    mem = params.mem
+    global_state = params.global_state
+    path_conditions_and_vars = params.path_conditions_and_vars
+    if len(stack) > 2:
+        global_state["pc"] = global_state["pc"] + 1
+        mem_location = stack.pop()
+        code_from = stack.pop()
+        no_bytes = stack.pop()
+        current_miu_i = global_state["miu_i"]
+
+        if isAllReal(mem_location, current_miu_i, code_from, no_bytes):
+            if six.PY2:
+                temp = long(math.ceil((mem_location + no_bytes) / float(32)))
+            else:
+                temp = int(math.ceil((mem_location + no_bytes) / float(32)))
+
+            if temp > current_miu_i:
+                current_miu_i = temp
+
+            code = g_bytecode[code_from: code_from + no_bytes]
+            mem[mem_location] = int.from_bytes(code, "big")
+            # bytes past the end of the code are zero
+            params.memory.store_bytes(mem_location, code + bytes(no_bytes - len(code)))
+        else:  
+            params.memory.forget(mem_location, no_bytes)
+            new_var_name = gen.gen_code_var("Ia", code_from, no_bytes)  # code_Ia_*_*
+            if new_var_name in path_conditions_and_vars:
+                new_var = path_conditions_and_vars[new_var_name]
+            else:
+                new_var = BitVec(new_var_name, 256)
+                path_conditions_and_vars[new_var_name] = new_var
 
-                temp = ((mem_location + no_bytes) / 32) + 1
-                current_miu_i = to_symbolic(current_miu_i)
-                expression = current_miu_i < temp
-                solver.push()
-                solver.add(expression)
-                if MSIZE:
-                    if check_sat(solver) != unsat:
-                        current_miu_i = If(expression, temp, current_miu_i)
-                solver.pop()
-                mem.clear() # very conservative
-                mem[str(mem_location)] = new_var
-            global_state["miu_i"] = current_miu_i
-        else:
-            raise ValueError('STACK underflow')
-    elif opcode == "RETURNDATACOPY":
-        if len(stack) > 2:
-            global_state["pc"] += 1
-            stack.pop(0)
-            stack.pop(0)
-            stack.pop(0)
-        else:
-            raise ValueError('STACK underflow')
-    elif opcode == "RETURNDATASIZE":
+            temp = ((mem_location + no_bytes) / 32) + 1
+            current_miu_i = to_symbolic(current_miu_i)
+            expression = current_miu_i < temp
+            if MSIZE and check_sat(solver, expression) != unsat:
+                current_miu_i = If(expression, temp, current_miu_i)
+            mem.clear() # very conservative
+            mem[str(mem_location)] = new_var
+        global_state["miu_i"] = current_miu_i
+    else:
+        raise ValueError('STACK underflow')
+
+def exec_returndatacopy(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 2:
         global_state["pc"] += 1
-        new_var_name = gen.gen_arbitrary_var()  # some_var_*
-        new_var = BitVec(new_var_name, 256)
-        stack.insert(0, new_var)
-    elif opcode == "GASPRICE":
+        mem_location = stack.pop()
+        stack.pop()
+        no_bytes = stack.pop()
+        params.memory.forget(mem_location, no_bytes)
+    else:
+        raise ValueError('STACK underflow')
+
+def exec_returndatasize(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    global_state["pc"] += 1
+    new_var_name = gen.gen_arbitrary_var()  # some_var_*
+    new_var = BitVec(new_var_name, 256)
+    stack.push(new_var)
+
+def exec_gasprice(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    global_state["pc"] = global_state["pc"] + 1
+    stack.push(global_state["gas_price"])
+
+def exec_extcodesize(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    path_conditions_and_vars = params.path_conditions_and_vars
+    if len(stack) > 0:
         global_state["pc"] = global_state["pc"] + 1
-        stack.insert(0, global_state["gas_price"])
-    elif opcode == "EXTCODESIZE":
-        if len(stack) > 0:
-            global_state["pc"] = global_state["pc"] + 1
-            address = stack.pop(0)
-            if isReal(address) and global_params.USE_GLOBAL_BLOCKCHAIN:
-                code = data_source.getCode(address)
-                stack.insert(0, len(code)/2)
-            else:
-                #not handled yet
-                new_var_name = gen.gen_code_size_var(address)   # code_size_* address
-                if new_var_name in path_conditions_and_vars:
-                    new_var = path_conditions_and_vars[new_var_name]
-                else:
-                    new_var = BitVec(new_var_name, 256)
-                    path_conditions_and_vars[new_var_name] = new_var
-                stack.insert(0, new_var)
+        address = stack.pop()
+        if isReal(address) and global_params.USE_GLOBAL_BLOCKCHAIN:
+            code = data_source.getCode(address)
+            stack.push(len(code)/2)
         else:
-            raise ValueError('STACK underflow')
-    elif opcode == "EXTCODECOPY":
-        if len(stack) > 3:
-            global_state["pc"] = global_state["pc"] + 1
-            address = stack.pop(0)
-            mem_location = stack.pop(0)
-            code_from = stack.pop(0)
-            no_bytes = stack.pop(0)
-            current_miu_i = global_state["miu_i"]
-
-            if isAllReal(address, mem_location, current_miu_i, code_from, no_bytes) and USE_GLOBAL_BLOCKCHAIN:
-                if six.PY2:
-                    temp = long(math.ceil((mem_location + no_bytes) / float(32)))
-                else:
-                    temp = int(math.ceil((mem_location + no_bytes) / float(32)))
-                if temp > current_miu_i:
-                    current_miu_i = temp
-
-                evm = data_source.getCode(address)
-                start = code_from * 2
-                end = start + no_bytes * 2
-                code = evm[start: end]
-                mem[mem_location] = int(code, 16)
+            #not handled yet
+            new_var_name = gen.gen_code_size_var(address)   # code_size_* address
+            if new_var_name in path_conditions_and_vars:
+                new_var = path_conditions_and_vars[new_var_name]
             else:
-                new_var_name = gen.gen_code_var(address, code_from, no_bytes)   # code_*_*_*
-                if new_var_name in path_conditions_and_vars:
-                    new_var = path_conditions_and_vars[new_var_name]
-                else:
-                    new_var = BitVec(new_var_name, 256)
-                    path_conditions_and_vars[new_var_name] = new_var
+                new_var = BitVec(new_var_name, 256)
+                path_conditions_and_vars[new_var_name] = new_var
+            stack.push(new_var)
+    else:
+        raise ValueError('STACK underflow')
 
-                temp = ((mem_location + no_bytes) / 32) + 1
-                current_miu_i = to_symbolic(current_miu_i)
-                expression = current_miu_i < temp
-                solver.push()
-                solver.add(expression)
-                if MSIZE:
-                    if check_sat(solver) != unsat:
-                        current_miu_i = If(expression, temp, current_miu_i)
-                solver.pop()
-                mem.clear() # very conservative
-                mem[str(mem_location)] = new_var
-            global_state["miu_i"] = current_miu_i
+def exec_extcodecopy(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    mem = params.mem
+    global_state = params.global_state
+    path_conditions_and_vars = params.path_conditions_and_vars
+    if len(stack) > 3:
+        global_state["pc"] = global_state["pc"] + 1
+        address = stack.pop()
+        mem_location = stack.pop()
+        code_from = stack.pop()
+        no_bytes = stack.pop()
+        current_miu_i = global_state["miu_i"]
+
+        if isAllReal(address, mem_location, current_miu_i, code_from, no_bytes) and USE_GLOBAL_BLOCKCHAIN:
+            if six.PY2:
+                temp = long(math.ceil((mem_location + no_bytes) / float(32)))
+            else:
+                temp = int(math.ceil((mem_location + no_bytes) / float(32)))
+            if temp > current_miu_i:
+                current_miu_i = temp
+
+            evm = data_source.getCode(address)
+            start = code_from * 2
+            end = start + no_bytes * 2
+            code = evm[start: end]
+            mem[mem_location] = int(code, 16)
+            params.memory.forget(mem_location, no_bytes)
         else:
-            raise ValueError('STACK underflow')
-    #
-    #  40s: Block Information
-    #
-    elif opcode == "BLOCKHASH":  # information from block header
-        if len(stack) > 0:
-            global_state["pc"] = global_state["pc"] + 1
-            stack.pop(0)
-            new_var_name = "IH_blockhash"
+            params.memory.forget(mem_location, no_bytes)
+            new_var_name = gen.gen_code_var(address, code_from, no_bytes)   # code_*_*_*
             if new_var_name in path_conditions_and_vars:
                 new_var = path_conditions_and_vars[new_var_name]
             else:
                 new_var = BitVec(new_var_name, 256)
                 path_conditions_and_vars[new_var_name] = new_var
-            stack.insert(0, new_var)
-        else:
-            raise ValueError('STACK underflow')
-    elif opcode == "COINBASE":  # information from block header
-        global_state["pc"] = global_state["pc"] + 1
-        stack.insert(0, global_state["currentCoinbase"])
-    elif opcode == "TIMESTAMP":  # information from block header
-        global_state["pc"] = global_state["pc"] + 1
-        stack.insert(0, global_state["currentTimestamp"])
-    elif opcode == "NUMBER":  # information from block header
+
+            temp = ((mem_location + no_bytes) / 32) + 1
+            current_miu_i = to_symbolic(current_miu_i)
+            expression = current_miu_i < temp
+            if MSIZE and check_sat(solver, expression) != unsat:
+                current_miu_i = If(expression, temp, current_miu_i)
+            mem.clear() # very conservative
+            mem[str(mem_location)] = new_var
+        global_state["miu_i"] = current_miu_i
+    else:
+        raise ValueError('STACK underflow')
+
+#
+#  40s: Block Information
+#
+def exec_blockhash(instr, params, block, func_call, current_func_name):  # information from block header
+    stack = params.stack
+    global_state = params.global_state
+    path_conditions_and_vars = params.path_conditions_and_vars
+    if len(stack) > 0:
         global_state["pc"] = global_state["pc"] + 1
-        stack.insert(0, global_state["currentNumber"])
-    elif opcode == "DIFFICULTY":  # information from block header
+        stack.pop()
+        new_var_name = "IH_blockhash"
+        if new_var_name in path_conditions_and_vars:
+            new_var = path_conditions_and_vars[new_var_name]
+        else:
+            new_var = BitVec(new_var_name, 256)
+            path_conditions_and_vars[new_var_name] = new_var
+        stack.push(new_var)
+    else:
+        raise ValueError('STACK underflow')
+
+def exec_coinbase(instr, params, block, func_call, current_func_name):  # information from block header
+    stack = params.stack
+    global_state = params.global_state
+    global_state["pc"] = global_state["pc"] + 1
+    stack.push(global_state["currentCoinbase"])
+
+def exec_timestamp(instr, params, block, func_call, current_func_name):  # information from block header
+    stack = params.stack
+    global_state = params.global_state
+    global_state["pc"] = global_state["pc"] + 1
+    stack.push(global_state["currentTimestamp"])
+
+def exec_number(instr, params, block, func_call, current_func_name):  # information from block header
+    stack = params.stack
+    global_state = params.global_state
+    global_state["pc"] = global_state["pc"] + 1
+    stack.push(global_state["currentNumber"])
+
+def exec_difficulty(instr, params, block, func_call, current_func_name):  # information from block header
+    stack = params.stack
+    global_state = params.global_state
+    global_state["pc"] = global_state["pc"] + 1
+    stack.push(global_state["currentDifficulty"])
+
+def exec_gaslimit(instr, params, block, func_call, current_func_name):  # information from block header
+    stack = params.stack
+    global_state = params.global_state
+    global_state["pc"] = global_state["pc"] + 1
+    stack.push(global_state["currentGasLimit"])
+
+#
+#  50s: Stack, Memory, Storage, and Flow Information
+#
+def exec_pop(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 0:
         global_state["pc"] = global_state["pc"] + 1
-        stack.insert(0, global_state["currentDifficulty"])
-    elif opcode == "GASLIMIT":  # information from block header
+        stack.pop()
+    else:
+        raise ValueError('STACK underflow')
+
+def exec_mload(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    mem = params.mem
+    global_state = params.global_state
+    path_conditions_and_vars = params.path_conditions_and_vars
+    if len(stack) > 0:
         global_state["pc"] = global_state["pc"] + 1
-        stack.insert(0, global_state["currentGasLimit"])
-    #
-    #  50s: Stack, Memory, Storage, and Flow Information
-    #
-    elif opcode == "POP":
-        if len(stack) > 0:
-            global_state["pc"] = global_state["pc"] + 1
-            stack.pop(0)
+        address = stack.pop()
+        current_miu_i = global_state["miu_i"]
+        if isAllReal(address, current_miu_i) and address in mem:
+            if six.PY2:
+                temp = long(math.ceil((address + 32) / float(32)))
+            else:
+                temp = int(math.ceil((address + 32) / float(32)))
+            if temp > current_miu_i:
+                current_miu_i = temp
+            value = mem[address]
+            stack.push(value)
         else:
-            raise ValueError('STACK underflow')
-    elif opcode == "MLOAD":
-        if len(stack) > 0:
-            global_state["pc"] = global_state["pc"] + 1
-            address = stack.pop(0)
-            current_miu_i = global_state["miu_i"]
-            if isAllReal(address, current_miu_i) and address in mem:
-                if six.PY2:
-                    temp = long(math.ceil((address + 32) / float(32)))
-                else:
-                    temp = int(math.ceil((address + 32) / float(32)))
-                if temp > current_miu_i:
-                    current_miu_i = temp
-                value = mem[address]
-                stack.insert(0, value)
+            temp = ((address + 31) / 32) + 1
+            current_miu_i = to_symbolic(current_miu_i)
+            expression = current_miu_i < temp
+            if MSIZE and check_sat(solver, expression) != unsat:
+                # this means that it is possibly that current_miu_i < temp
+                current_miu_i = If(expression, temp, current_miu_i)
+            new_var_name = gen.gen_mem_var(address) # mem_*
+            if new_var_name in path_conditions_and_vars:
+                new_var = path_conditions_and_vars[new_var_name]
             else:
-                temp = ((address + 31) / 32) + 1
-                current_miu_i = to_symbolic(current_miu_i)
-                expression = current_miu_i < temp
-                solver.push()
-                solver.add(expression)
-                if MSIZE:
-                    if check_sat(solver) != unsat:
-                        # this means that it is possibly that current_miu_i < temp
-                        current_miu_i = If(expression,temp,current_miu_i)
-                solver.pop()
-                new_var_name = gen.gen_mem_var(address) # mem_*
-                if new_var_name in path_conditions_and_vars:
-                    new_var = path_conditions_and_vars[new_var_name]
-                else:
-                    new_var = BitVec(new_var_name, 256)
-                    path_conditions_and_vars[new_var_name] = new_var
-                stack.insert(0, new_var)
-                if isReal(address):
-                    mem[address] = new_var
-                else:
-                    mem[str(address)] = new_var
-            global_state["miu_i"] = current_miu_i
+                new_var = BitVec(new_var_name, 256)
+                path_conditions_and_vars[new_var_name] = new_var
+            stack.push(new_var)
+            if isReal(address):
+                mem[address] = new_var
+            else:
+                mem[str(address)] = new_var
+        global_state["miu_i"] = current_miu_i
+    else:
+        raise ValueError('STACK underflow')
+
+def exec_mstore(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    mem = params.mem
+    memory = params.memory
+    global_state = params.global_state
+    if len(stack) > 1:
+        global_state["pc"] = global_state["pc"] + 1
+        stored_address = stack.pop()
+        stored_value = stack.pop()
+        current_miu_i = global_state["miu_i"]
+        if isReal(stored_address):
+            # preparing data for hashing later
+            memory.store_word(stored_address, stored_value)
         else:
-            raise ValueError('STACK underflow')
-    elif opcode == "MSTORE":
-        if len(stack) > 1:
-            global_state["pc"] = global_state["pc"] + 1
-            stored_address = stack.pop(0)
-            stored_value = stack.pop(0)
-            current_miu_i = global_state["miu_i"]
-            if isReal(stored_address):
-                # preparing data for hashing later
-                old_size = len(memory) // 32
-                new_size = ceil32(stored_address + 32) // 32
-                mem_extend = (new_size - old_size) * 32
-                memory.extend([0] * mem_extend)
-                value = stored_value
-                for i in range(31, -1, -1):
-                    memory[stored_address + i] = value % 256
-                    value /= 256
-            if isAllReal(stored_address, current_miu_i):
-                if six.PY2:
-                    temp = long(math.ceil((stored_address + 32) / float(32)))
-                else:
-                    temp = int(math.ceil((stored_address + 32) / float(32)))
-                if temp > current_miu_i:
-                    current_miu_i = temp
-                mem[stored_address] = stored_value  # note that the stored_value could be symbolic
+            memory.forget(stored_address, 32)
+        if isAllReal(stored_address, current_miu_i):
+            if six.PY2:
+                temp = long(math.ceil((stored_address + 32) / float(32)))
             else:
-                temp = ((stored_address + 31) / 32) + 1
-                expression = current_miu_i < temp
-                solver.push()
-                solver.add(expression)
-                if MSIZE:
-                    if check_sat(solver) != unsat:
-                        # this means that it is possibly that current_miu_i < temp
-                        current_miu_i = If(expression,temp,current_miu_i)
-                solver.pop()
-                mem.clear()  # very conservative
-                mem[str(stored_address)] = stored_value
-            global_state["miu_i"] = current_miu_i
+                temp = int(math.ceil((stored_address + 32) / float(32)))
+            if temp > current_miu_i:
+                current_miu_i = temp
+            mem[stored_address] = stored_value  # note that the stored_value could be symbolic
         else:
-            raise ValueError('STACK underflow')
-    elif opcode == "MSTORE8":
-        if len(stack) > 1:
-            global_state["pc"] = global_state["pc"] + 1
-            stored_address = stack.pop(0)
-            temp_value = stack.pop(0)
-            stored_value = temp_value % 256  # get the least byte
-            current_miu_i = global_state["miu_i"]
-            if isAllReal(stored_address, current_miu_i):
-                if six.PY2:
-                    temp = long(math.ceil((stored_address + 1) / float(32)))
-                else:
-                    temp = int(math.ceil((stored_address + 1) / float(32)))
-                if temp > current_miu_i:
-                    current_miu_i = temp
-                mem[stored_address] = stored_value  # note that the stored_value could be symbolic
+            temp = ((stored_address + 31) / 32) + 1
+            expression = current_miu_i < temp
+            if MSIZE and check_sat(solver, expression) != unsat:
+                # this means that it is possibly that current_miu_i < temp
+                current_miu_i = If(expression, temp, current_miu_i)
+            mem.clear()  # very conservative
+            mem[str(stored_address)] = stored_value
+        global_state["miu_i"] = current_miu_i
+    else:
+        raise ValueError('STACK underflow')
+
+def exec_mstore8(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    mem = params.mem
+    global_state = params.global_state
+    if len(stack) > 1:
+        global_state["pc"] = global_state["pc"] + 1
+        stored_address = stack.pop()
+        temp_value = stack.pop()
+        stored_value = temp_value % 256  # get the least byte
+        current_miu_i = global_state["miu_i"]
+        if isAllReal(stored_address, current_miu_i):
+            if six.PY2:
+                temp = long(math.ceil((stored_address + 1) / float(32)))
             else:
-                temp = (stored_address / 32) + 1
-                if isReal(current_miu_i):
-                    current_miu_i = BitVecVal(current_miu_i, 256)
-                expression = current_miu_i < temp
-                solver.push()
-                solver.add(expression)
-                if MSIZE:
-                    if check_sat(solver) != unsat:
-                        # this means that it is possibly that current_miu_i < temp
-                        current_miu_i = If(expression,temp,current_miu_i)
-                solver.pop()
-                mem.clear()  # very conservative
-                mem[str(stored_address)] = stored_value
-            global_state["miu_i"] = current_miu_i
+                temp = int(math.ceil((stored_address + 1) / float(32)))
+            if temp > current_miu_i:
+                current_miu_i = temp
+            mem[stored_address] = stored_value  # note that the stored_value could be symbolic
+            params.memory.store_byte(stored_address, stored_value)
         else:
-            raise ValueError('STACK underflow')
-    elif opcode == "SLOAD":
-        if len(stack) > 0:
-            global_state["pc"] = global_state["pc"] + 1
-            position = stack.pop(0)
-            if isReal(position) and position in global_state["Ia"]:
+            params.memory.forget(stored_address, 1)
+            temp = (stored_address / 32) + 1
+            if isReal(current_miu_i):
+                current_miu_i = bv_val(current_miu_i)
+            expression = current_miu_i < temp
+            if MSIZE and check_sat(solver, expression) != unsat:
+                # this means that it is possibly that current_miu_i < temp
+                current_miu_i = If(expression, temp, current_miu_i)
+            mem.clear()  # very conservative
+            mem[str(stored_address)] = stored_value
+        global_state["miu_i"] = current_miu_i
+    else:
+        raise ValueError('STACK underflow')
+
+def exec_sload(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    path_conditions_and_vars = params.path_conditions_and_vars
+    if len(stack) > 0:
+        global_state["pc"] = global_state["pc"] + 1
+        position = stack.pop()
+        if isReal(position) and position in global_state["Ia"]:
+            value = global_state["Ia"][position]
+            stack.push(value)
+        elif global_params.USE_GLOBAL_STORAGE and isReal(position) and position not in global_state["Ia"]:
+            value = data_source.getStorageAt(position)
+            global_state["Ia"][position] = value
+            stack.push(value)
+        else:
+            if position in global_state["Ia"]:
                 value = global_state["Ia"][position]
-                stack.insert(0, value)
-            elif global_params.USE_GLOBAL_STORAGE and isReal(position) and position not in global_state["Ia"]:
-                value = data_source.getStorageAt(position)
-                global_state["Ia"][position] = value
-                stack.insert(0, value)
+                stack.push(value)
             else:
-                if str(position) in global_state["Ia"]:
-                    value = global_state["Ia"][str(position)]
-                    stack.insert(0, value)
-                else:
-                    if is_expr(position):
-                        position = simplify(position)
-                    if g_src_map:
-                        new_var_name = g_src_map.get_source_code(global_state['pc'] - 1)
-                        operators = '[-+*/%|&^!><=]'
-                        new_var_name = re.compile(operators).split(new_var_name)[0].strip()
-                        new_var_name = g_src_map.get_parameter_or_state_var(new_var_name)
-                        if new_var_name:
-                            new_var_name = gen.gen_owner_store_var(position, new_var_name)  # Ia_store-*-*
-                        else:
-                            new_var_name = gen.gen_owner_store_var(position)    # Ia_store-*-
+                if is_expr(position):
+                    position = simplifier.simplify(position)
+                if g_src_map:
+                    new_var_name = g_src_map.get_storage_var_name(global_state['pc'] - 1)
+                    if new_var_name:
+                        new_var_name = gen.gen_owner_store_var(position, new_var_name)  # Ia_store-*-*
                     else:
                         new_var_name = gen.gen_owner_store_var(position)    # Ia_store-*-
+                else:
+                    new_var_name = gen.gen_owner_store_var(position)    # Ia_store-*-
 
-                    if new_var_name in path_conditions_and_vars:
-                        new_var = path_conditions_and_vars[new_var_name]
-                    else:
-                        new_var = BitVec(new_var_name, 256)
-                        path_conditions_and_vars[new_var_name] = new_var
-                    stack.insert(0, new_var)
-                    if isReal(position):
-                        global_state["Ia"][position] = new_var
-                    else:
-                        global_state["Ia"][str(position)] = new_var
-        else:
-            raise ValueError('STACK underflow')
+                if new_var_name in path_conditions_and_vars:
+                    new_var = path_conditions_and_vars[new_var_name]
+                else:
+                    new_var = BitVec(new_var_name, 256)
+                    path_conditions_and_vars[new_var_name] = new_var
+                stack.push(new_var)
+                global_state["Ia"][position] = new_var
+                global_state["Ia"].add_name(new_var_name, position)
+    else:
+        raise ValueError('STACK underflow')
 
-    elif opcode == "SSTORE":
-        if len(stack) > 1:
-            for call_pc in calls:
-                calls_affect_state[call_pc] = True
-            global_state["pc"] = global_state["pc"] + 1
-            stored_address = stack.pop(0)
-            stored_value = stack.pop(0)
-            if isReal(stored_address):
-                # note that the stored_value could be unknown
-                global_state["Ia"][stored_address] = stored_value
-            else:
-                # note that the stored_value could be unknown
-                global_state["Ia"][str(stored_address)] = stored_value
-        else:
-            raise ValueError('STACK underflow')
-    elif opcode == "JUMP":
-        if len(stack) > 0:
-            target_address = stack.pop(0)
-            if isSymbolic(target_address):
-                try:
-                    target_address = int(str(simplify(target_address)))
-                except:
-                    raise TypeError("Target address must be an integer")
-            vertices[block].set_jump_target(target_address)
-            if target_address not in edges[block]:
-                edges[block].append(target_address)
-        else:
-            raise ValueError('STACK underflow')
-    elif opcode == "JUMPI":
-        # We need to prepare two branches
-        if len(stack) > 1:
-            target_address = stack.pop(0)
-            if isSymbolic(target_address):
-                try:
-                    target_address = int(str(simplify(target_address)))
-                except:
-                    raise TypeError("Target address must be an integer")
-            vertices[block].set_jump_target(target_address)
-            flag = stack.pop(0)
-            branch_expression = (BitVecVal(0, 1) == BitVecVal(1, 1))
-            if isReal(flag):
-                if flag != 0:
-                    branch_expression = True
-            else:
-                branch_expression = (flag != 0)
-            vertices[block].set_branch_expression(branch_expression)
-            if target_address not in edges[block]:
-                edges[block].append(target_address)
-        else:
-            raise ValueError('STACK underflow')
-    elif opcode == "PC":
-        stack.insert(0, global_state["pc"])
-        global_state["pc"] = global_state["pc"] + 1
-    elif opcode == "MSIZE":
-        global_state["pc"] = global_state["pc"] + 1
-        msize = 32 * global_state["miu_i"]
-        stack.insert(0, msize)
-    elif opcode == "GAS":
-        # In general, we do not have this precisely. It depends on both
-        # the initial gas and the amount has been depleted
-        # we need to think about this in the future, in case precise gas
-        # can be tracked
-        # 一般来说，我们并没有准确地做到这一点。 这取决于初始 gas 和消耗的数量，我们需要在未来考虑这一点，以防可以跟踪精确的 gas
-        global_state["pc"] = global_state["pc"] + 1
-        new_var_name = gen.gen_gas_var()       # gas_*
-        new_var = BitVec(new_var_name, 256)
-        path_conditions_and_vars[new_var_name] = new_var
-        stack.insert(0, new_var)
-    elif opcode == "JUMPDEST":
-        # Literally do nothing
-        global_state["pc"] = global_state["pc"] + 1
-    #
-    #  60s & 70s: Push Operations
-    #
-    elif opcode.startswith('PUSH', 0):  # this is a push instruction
-        position = int(opcode[4:], 10)
-        global_state["pc"] = global_state["pc"] + 1 + position  # pc处理
-        pushed_value = int(instr_parts[1], 16)
-        stack.insert(0, pushed_value)
-        if global_params.UNIT_TEST == 3: # test evm symbolic
-            stack[0] = BitVecVal(stack[0], 256)
-    #
-    #  80s: Duplication Operations
-    #
-    elif opcode.startswith("DUP", 0):
+def exec_sstore(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    calls = params.calls
+    if len(stack) > 1:
+        for call_pc in calls:
+            calls_affect_state[call_pc] = True
         global_state["pc"] = global_state["pc"] + 1
-        position = int(opcode[3:], 10) - 1
-        if len(stack) > position:
-            duplicate = stack[position]
-            stack.insert(0, duplicate)
-        else:
-            raise ValueError('STACK underflow')
+        stored_address = stack.pop()
+        stored_value = stack.pop()
+        # note that the stored_value could be unknown
+        global_state["Ia"][stored_address] = stored_value
+    else:
+        raise ValueError('STACK underflow')
 
-    #
-    #  90s: Swap Operations
-    #
-    elif opcode.startswith("SWAP", 0):
-        global_state["pc"] = global_state["pc"] + 1
-        position = int(opcode[4:], 10)
-        if len(stack) > position:
-            temp = stack[position]
-            stack[position] = stack[0]
-            stack[0] = temp
+def exec_jump(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    if len(stack) > 0:
+        target_address = stack.pop()
+        if isSymbolic(target_address):
+            try:
+                target_address = int(str(simplifier.simplify(target_address)))
+            except:
+                raise TypeError("Target address must be an integer")
+        vertices[block].set_jump_target(target_address)
+        if not static_cfg.has_edge(block, target_address) and target_address not in edges[block]:
+            edges[block].append(target_address)
+    else:
+        raise ValueError('STACK underflow')
+
+def exec_jumpi(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    # We need to prepare two branches
+    if len(stack) > 1:
+        target_address = stack.pop()
+        if isSymbolic(target_address):
+            try:
+                target_address = int(str(simplifier.simplify(target_address)))
+            except:
+                raise TypeError("Target address must be an integer")
+        vertices[block].set_jump_target(target_address)
+        flag = stack.pop()
+        branch_expression = (BitVecVal(0, 1) == BitVecVal(1, 1))
+        if isReal(flag):
+            if flag != 0:
+                branch_expression = True
         else:
-            raise ValueError('STACK underflow')
+            branch_expression = (flag != 0)
+        vertices[block].set_branch_expression(branch_expression)
+        if not static_cfg.has_edge(block, target_address) and target_address not in edges[block]:
+            edges[block].append(target_address)
+    else:
+        raise ValueError('STACK underflow')
+
+def exec_pc(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    stack.push(global_state["pc"])
+    global_state["pc"] = global_state["pc"] + 1
+
+def exec_msize(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    global_state["pc"] = global_state["pc"] + 1
+    msize = 32 * global_state["miu_i"]
+    stack.push(msize)
+
+def exec_gas(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    path_conditions_and_vars = params.path_conditions_and_vars
+    # In general, we do not have this precisely. It depends on both
+    # the initial gas and the amount has been depleted
+    # we need to think about this in the future, in case precise gas
+    # can be tracked
+    # 一般来说，我们并没有准确地做到这一点。 这取决于初始 gas 和消耗的数量，我们需要在未来考虑这一点，以防可以跟踪精确的 gas
+    global_state["pc"] = global_state["pc"] + 1
+    new_var_name = gen.gen_gas_var()       # gas_*
+    new_var = BitVec(new_var_name, 256)
+    path_conditions_and_vars[new_var_name] = new_var
+    stack.push(new_var)
+
+def exec_jumpdest(instr, params, block, func_call, current_func_name):
+    global_state = params.global_state
+    # Literally do nothing
+    global_state["pc"] = global_state["pc"] + 1
+
+#
+#  60s & 70s: Push Operations
+#
+def exec_push(instr, params, block, func_call, current_func_name):  # this is a push instruction
+    stack = params.stack
+    global_state = params.global_state
+    global_state["pc"] = global_state["pc"] + instr.size  # pc处理
+    if global_params.UNIT_TEST == 3: # test evm symbolic
+        stack.push(bv_val(instr.arg))
+    else:
+        stack.push(instr.arg)
+
+#
+#  80s: Duplication Operations
+#
+def exec_dup(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    global_state["pc"] = global_state["pc"] + 1
+    position = instr.opcode - 0x7f
+    if len(stack) >= position:
+        stack.dup(position)
+    else:
+        raise ValueError('STACK underflow')
+
+#
+#  90s: Swap Operations
+#
+def exec_swap(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    global_state["pc"] = global_state["pc"] + 1
+    position = instr.opcode - 0x8f
+    if len(stack) > position:
+        stack.swap(position)
+    else:
+        raise ValueError('STACK underflow')
+
+#
+#  a0s: Logging Operations
+#
+def exec_log(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    global_state["pc"] = global_state["pc"] + 1
+    # We do not simulate these log operations
+    num_of_pops = 2 + instr.opcode - 0xa0
+    while num_of_pops > 0:
+        stack.pop()
+        num_of_pops -= 1
+
+#
+#  f0s: System Operations
+#
+def exec_create(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 2:
+        global_state["pc"] += 1
+        stack.pop()
+        stack.pop()
+        stack.pop()
+        new_var_name = gen.gen_arbitrary_var()  # some_var_*
+        new_var = BitVec(new_var_name, 256)
+        stack.push(new_var)
+    else:
+        raise ValueError('STACK underflow')
 
-    #
-    #  a0s: Logging Operations
-    #
-    elif opcode in ("LOG0", "LOG1", "LOG2", "LOG3", "LOG4"):
+def exec_call(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    path_conditions_and_vars = params.path_conditions_and_vars
+    analysis = params.analysis
+    calls = params.calls
+    # TODO: Need to handle miu_i
+    if len(stack) > 6:
+        calls.append(global_state["pc"])
+        for call_pc in calls:
+            if call_pc not in calls_affect_state:
+                calls_affect_state[call_pc] = False
         global_state["pc"] = global_state["pc"] + 1
-        # We do not simulate these log operations
-        num_of_pops = 2 + int(opcode[3:])
-        while num_of_pops > 0:
-            stack.pop(0)
-            num_of_pops -= 1
-
-    #
-    #  f0s: System Operations
-    #
-    elif opcode == "CREATE":
-        if len(stack) > 2:
-            global_state["pc"] += 1
-            stack.pop(0)
-            stack.pop(0)
-            stack.pop(0)
-            new_var_name = gen.gen_arbitrary_var()  # some_var_*
-            new_var = BitVec(new_var_name, 256)
-            stack.insert(0, new_var)
+        outgas = stack.pop()
+        recipient = stack.pop()
+        transfer_amount = stack.pop()
+        start_data_input = stack.pop()
+        size_data_input = stack.pop()
+        start_data_output = stack.pop()
+        size_data_ouput = stack.pop()
+        params.memory.forget(start_data_output, size_data_ouput)
+        # in the paper, it is shaky when the size of data output is
+        # min of stack[6] and the | o |
+
+        if isReal(transfer_amount):
+            if transfer_amount == 0:
+                stack.push(1)   # x = 0
+                return
+
+        # Let us ignore the call depth
+        balance_ia = global_state["balance"]["Ia"]
+        is_enough_fund = (transfer_amount <= balance_ia)
+        if check_sat(solver, is_enough_fund) == unsat:
+            # this means not enough fund, thus the execution will result in exception
+            stack.push(0)   # x = 0
         else:
-            raise ValueError('STACK underflow')
-    elif opcode == "CALL":
-        # TODO: Need to handle miu_i
-        if len(stack) > 6:
-            calls.append(global_state["pc"])
-            for call_pc in calls:
-                if call_pc not in calls_affect_state:
-                    calls_affect_state[call_pc] = False
-            global_state["pc"] = global_state["pc"] + 1
-            outgas = stack.pop(0)
-            recipient = stack.pop(0)
-            transfer_amount = stack.pop(0)
-            start_data_input = stack.pop(0)
-            size_data_input = stack.pop(0)
-            start_data_output = stack.pop(0)
-            size_data_ouput = stack.pop(0)
-            # in the paper, it is shaky when the size of data output is
-            # min of stack[6] and the | o |
-
-            if isReal(transfer_amount):
-                if transfer_amount == 0:
-                    stack.insert(0, 1)   # x = 0
-                    return
-
-            # Let us ignore the call depth
-            balance_ia = global_state["balance"]["Ia"]
-            is_enough_fund = (transfer_amount <= balance_ia)
-            solver.push()
+            # the execution is possibly okay
+            stack.push(1)   # x = 1
             solver.add(is_enough_fund)
-
-            if check_sat(solver) == unsat:
-                # this means not enough fund, thus the execution will result in exception
-                solver.pop()
-                stack.insert(0, 0)   # x = 0
+            path_conditions_and_vars["path_condition"].append(is_enough_fund)
+            last_idx = len(path_conditions_and_vars["path_condition"]) - 1
+            analysis["time_dependency_bug"][last_idx] = global_state["pc"] - 1
+            new_balance_ia = (balance_ia - transfer_amount)
+            global_state["balance"]["Ia"] = new_balance_ia
+            address_is = path_conditions_and_vars["Is"]
+            address_is = (address_is & CONSTANT_ONES_159)
+            boolean_expression = (recipient != address_is)
+            if check_sat(solver, boolean_expression) == unsat:
+                new_balance_is = (global_state["balance"]["Is"] + transfer_amount)
+                global_state["balance"]["Is"] = new_balance_is
             else:
-                # the execution is possibly okay
-                stack.insert(0, 1)   # x = 1
-                solver.pop()
-                solver.add(is_enough_fund)
-                path_conditions_and_vars["path_condition"].append(is_enough_fund)
-                last_idx = len(path_conditions_and_vars["path_condition"]) - 1
-                analysis["time_dependency_bug"][last_idx] = global_state["pc"] - 1
-                new_balance_ia = (balance_ia - transfer_amount)
-                global_state["balance"]["Ia"] = new_balance_ia
-                address_is = path_conditions_and_vars["Is"]
-                address_is = (address_is & CONSTANT_ONES_159)
-                boolean_expression = (recipient != address_is)
-                solver.push()
-                solver.add(boolean_expression)
-                if check_sat(solver) == unsat:
-                    solver.pop()
-                    new_balance_is = (global_state["balance"]["Is"] + transfer_amount)
-                    global_state["balance"]["Is"] = new_balance_is
-                else:
-                    solver.pop()
-                    if isReal(recipient):
-                        new_address_name = "concrete_address_" + str(recipient)
-                    else:
-                        new_address_name = gen.gen_arbitrary_address_var()  # some_address_*
-                    old_balance_name = gen.gen_arbitrary_var()  # some_var_*
-                    old_balance = BitVec(old_balance_name, 256)
-                    path_conditions_and_vars[old_balance_name] = old_balance
-                    constraint = (old_balance >= 0)
-                    solver.add(constraint)
-                    path_conditions_and_vars["path_condition"].append(constraint)
-                    new_balance = (old_balance + transfer_amount)
-                    global_state["balance"][new_address_name] = new_balance
-        else:
-            raise ValueError('STACK underflow')
-    elif opcode == "CALLCODE":
-        # TODO: Need to handle miu_i
-        if len(stack) > 6:
-            calls.append(global_state["pc"])
-            for call_pc in calls:
-                if call_pc not in calls_affect_state:
-                    calls_affect_state[call_pc] = False
-            global_state["pc"] = global_state["pc"] + 1
-            outgas = stack.pop(0)
-            recipient = stack.pop(0) # this is not used as recipient
-            if global_params.USE_GLOBAL_STORAGE:
                 if isReal(recipient):
-                    recipient = hex(recipient)
-                    if recipient[-1] == "L":
-                        recipient = recipient[:-1]
-                    recipients.add(recipient)
+                    new_address_name = "concrete_address_" + str(recipient)
                 else:
-                    recipients.add(None)
-
-            transfer_amount = stack.pop(0)
-            start_data_input = stack.pop(0)
-            size_data_input = stack.pop(0)
-            start_data_output = stack.pop(0)
-            size_data_ouput = stack.pop(0)
-            # in the paper, it is shaky when the size of data output is
-            # min of stack[6] and the | o |
-
-            if isReal(transfer_amount):
-                if transfer_amount == 0:
-                    stack.insert(0, 1)   # x = 0
-                    return
-
-            # Let us ignore the call depth
-            balance_ia = global_state["balance"]["Ia"]
-            is_enough_fund = (transfer_amount <= balance_ia)
-            solver.push()
-            solver.add(is_enough_fund)
+                    new_address_name = gen.gen_arbitrary_address_var()  # some_address_*
+                old_balance_name = gen.gen_arbitrary_var()  # some_var_*
+                old_balance = BitVec(old_balance_name, 256)
+                path_conditions_and_vars[old_balance_name] = old_balance
+                constraint = (old_balance >= 0)
+                solver.add(constraint)
+                path_conditions_and_vars["path_condition"].append(constraint)
+                new_balance = (old_balance + transfer_amount)
+                global_state["balance"][new_address_name] = new_balance
+    else:
+        raise ValueError('STACK underflow')
 
-            if check_sat(solver) == unsat:
-                # this means not enough fund, thus the execution will result in exception
-                solver.pop()
-                stack.insert(0, 0)   # x = 0
+def exec_callcode(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    path_conditions_and_vars = params.path_conditions_and_vars
+    analysis = params.analysis
+    calls = params.calls
+    # TODO: Need to handle miu_i
+    if len(stack) > 6:
+        calls.append(global_state["pc"])
+        for call_pc in calls:
+            if call_pc not in calls_affect_state:
+                calls_affect_state[call_pc] = False
+        global_state["pc"] = global_state["pc"] + 1
+        outgas = stack.pop()
+        recipient = stack.pop() # this is not used as recipient
+        if global_params.USE_GLOBAL_STORAGE:
+            if isReal(recipient):
+                recipient = hex(recipient)
+                if recipient[-1] == "L":
+                    recipient = recipient[:-1]
+                recipients.add(recipient)
             else:
-                # the execution is possibly okay
-                stack.insert(0, 1)   # x = 1
-                solver.pop()
-                solver.add(is_enough_fund)
-                path_conditions_and_vars["path_condition"].append(is_enough_fund)
-                last_idx = len(path_conditions_and_vars["path_condition"]) - 1
-                analysis["time_dependency_bug"][last_idx] = global_state["pc"] - 1
+                recipients.add(None)
+
+        transfer_amount = stack.pop()
+        start_data_input = stack.pop()
+        size_data_input = stack.pop()
+        start_data_output = stack.pop()
+        size_data_ouput = stack.pop()
+        params.memory.forget(start_data_output, size_data_ouput)
+        # in the paper, it is shaky when the size of data output is
+        # min of stack[6] and the | o |
+
+        if isReal(transfer_amount):
+            if transfer_amount == 0:
+                stack.push(1)   # x = 0
+                return
+
+        # Let us ignore the call depth
+        balance_ia = global_state["balance"]["Ia"]
+        is_enough_fund = (transfer_amount <= balance_ia)
+        if check_sat(solver, is_enough_fund) == unsat:
+            # this means not enough fund, thus the execution will result in exception
+            stack.push(0)   # x = 0
         else:
-            raise ValueError('STACK underflow')
-    elif opcode in ("DELEGATECALL", "STATICCALL"):
-        if len(stack) > 5:
-            global_state["pc"] += 1
-            stack.pop(0)
-            recipient = stack.pop(0)
-            if global_params.USE_GLOBAL_STORAGE:
-                if isReal(recipient):
-                    recipient = hex(recipient)
-                    if recipient[-1] == "L":
-                        recipient = recipient[:-1]
-                    recipients.add(recipient)
-                else:
-                    recipients.add(None)
+            # the execution is possibly okay
+            stack.push(1)   # x = 1
+            solver.add(is_enough_fund)
+            path_conditions_and_vars["path_condition"].append(is_enough_fund)
+            last_idx = len(path_conditions_and_vars["path_condition"]) - 1
+            analysis["time_dependency_bug"][last_idx] = global_state["pc"] - 1
+    else:
+        raise ValueError('STACK underflow')
 
-            stack.pop(0)
-            stack.pop(0)
-            stack.pop(0)
-            stack.pop(0)
-            new_var_name = gen.gen_arbitrary_var()  # some_var_*
-            new_var = BitVec(new_var_name, 256)
-            stack.insert(0, new_var)
-        else:
-            raise ValueError('STACK underflow')
-    elif opcode in ("RETURN", "REVERT"):
-        # TODO: Need to handle miu_i
-        if len(stack) > 1:
-            if opcode == "REVERT":
-                revertible_overflow_pcs.update(overflow_pcs)
-                global_state["pc"] = global_state["pc"] + 1
-            stack.pop(0)
-            stack.pop(0)
-            # TODO
-            pass
-        else:
-            raise ValueError('STACK underflow')
-    elif opcode == "SUICIDE":
-        global_state["pc"] = global_state["pc"] + 1
-        recipient = stack.pop(0)
-        transfer_amount = global_state["balance"]["Ia"]
-        global_state["balance"]["Ia"] = 0
-        if isReal(recipient):
-            new_address_name = "concrete_address_" + str(recipient)
-        else:
-            new_address_name = gen.gen_arbitrary_address_var()  # some_address_*
-        old_balance_name = gen.gen_arbitrary_var()  # some_var_*
-        old_balance = BitVec(old_balance_name, 256)
-        path_conditions_and_vars[old_balance_name] = old_balance
-        constraint = (old_balance >= 0)
-        solver.add(constraint)
-        path_conditions_and_vars["path_condition"].append(constraint)
-        new_balance = (old_balance + transfer_amount)
-        global_state["balance"][new_address_name] = new_balance
+def exec_delegatecall(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    if len(stack) > 5:
+        global_state["pc"] += 1
+        stack.pop()
+        recipient = stack.pop()
+        if global_params.USE_GLOBAL_STORAGE:
+            if isReal(recipient):
+                recipient = hex(recipient)
+                if recipient[-1] == "L":
+                    recipient = recipient[:-1]
+                recipients.add(recipient)
+            else:
+                recipients.add(None)
+
+        stack.pop()
+        stack.pop()
+        start_data_output = stack.pop()
+        size_data_output = stack.pop()
+        params.memory.forget(start_data_output, size_data_output)
+        new_var_name = gen.gen_arbitrary_var()  # some_var_*
+        new_var = BitVec(new_var_name, 256)
+        stack.push(new_var)
+    else:
+        raise ValueError('STACK underflow')
+
+def exec_return(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    overflow_pcs = params.overflow_pcs
+    # TODO: Need to handle miu_i
+    if len(stack) > 1:
+        if instr.name == "REVERT":
+            # the overflows found before the REVERT are revertible
+            discharge_obligations(params)
+            revertible_overflow_pcs.update(overflow_pcs)
+            global_state["pc"] = global_state["pc"] + 1
+        stack.pop()
+        stack.pop()
         # TODO
-        return
+        pass
+    else:
+        raise ValueError('STACK underflow')
 
+def exec_suicide(instr, params, block, func_call, current_func_name):
+    stack = params.stack
+    global_state = params.global_state
+    path_conditions_and_vars = params.path_conditions_and_vars
+    global_state["pc"] = global_state["pc"] + 1
+    recipient = stack.pop()
+    transfer_amount = global_state["balance"]["Ia"]
+    global_state["balance"]["Ia"] = 0
+    if isReal(recipient):
+        new_address_name = "concrete_address_" + str(recipient)
     else:
-        log.debug("UNKNOWN INSTRUCTION: " + opcode)
-        if global_params.UNIT_TEST == 2 or global_params.UNIT_TEST == 3:
-            log.critical("Unknown instruction: %s" % opcode)
-            exit(UNKNOWN_INSTRUCTION)
-        raise Exception('UNKNOWN INSTRUCTION: ' + opcode)
+        new_address_name = gen.gen_arbitrary_address_var()  # some_address_*
+    old_balance_name = gen.gen_arbitrary_var()  # some_var_*
+    old_balance = BitVec(old_balance_name, 256)
+    path_conditions_and_vars[old_balance_name] = old_balance
+    constraint = (old_balance >= 0)
+    solver.add(constraint)
+    path_conditions_and_vars["path_condition"].append(constraint)
+    new_balance = (old_balance + transfer_amount)
+    global_state["balance"][new_address_name] = new_balance
+    # TODO
+    return
+
+# 已知但没有实现的指令(例如 SHL、PUSH0)
+def exec_unknown(instr, params, block, func_call, current_func_name):
+    log.debug("UNKNOWN INSTRUCTION: " + instr.name)
+    if global_params.UNIT_TEST == 2 or global_params.UNIT_TEST == 3:
+        log.critical("Unknown instruction: %s" % instr.name)
+        exit(UNKNOWN_INSTRUCTION)
+    raise Exception('UNKNOWN INSTRUCTION: ' + instr.name)
+
+# opcode -> 处理函数。没有定义的字节和 INVALID 什么都不做，
+# 已定义但没有实现的指令报 UNKNOWN INSTRUCTION
+opcode_handlers = [exec_invalid] * (INVALID + 1)
+for op in set(opcode_values.values()):
+    opcode_handlers[op] = exec_unknown
+opcode_handlers[INVALID] = exec_invalid
+opcode_handlers[opcode_values["ASSERTFAIL"]] = exec_assertfail
+opcode_handlers[opcode_values["STOP"]] = exec_stop
+opcode_handlers[opcode_values["ADD"]] = exec_add
+opcode_handlers[opcode_values["MUL"]] = exec_mul
+opcode_handlers[opcode_values["SUB"]] = exec_sub
+opcode_handlers[opcode_values["DIV"]] = exec_div
+opcode_handlers[opcode_values["SDIV"]] = exec_sdiv
+opcode_handlers[opcode_values["MOD"]] = exec_mod
+opcode_handlers[opcode_values["SMOD"]] = exec_smod
+opcode_handlers[opcode_values["ADDMOD"]] = exec_addmod
+opcode_handlers[opcode_values["MULMOD"]] = exec_mulmod
+opcode_handlers[opcode_values["EXP"]] = exec_exp
+opcode_handlers[opcode_values["SIGNEXTEND"]] = exec_signextend
+opcode_handlers[opcode_values["LT"]] = exec_lt
+opcode_handlers[opcode_values["GT"]] = exec_gt
+opcode_handlers[opcode_values["SLT"]] = exec_slt
+opcode_handlers[opcode_values["SGT"]] = exec_sgt
+opcode_handlers[opcode_values["EQ"]] = exec_eq
+opcode_handlers[opcode_values["ISZERO"]] = exec_iszero
+opcode_handlers[opcode_values["AND"]] = exec_and
+opcode_handlers[opcode_values["OR"]] = exec_or
+opcode_handlers[opcode_values["XOR"]] = exec_xor
+opcode_handlers[opcode_values["NOT"]] = exec_not
+opcode_handlers[opcode_values["BYTE"]] = exec_byte
+opcode_handlers[opcode_values["SHA3"]] = exec_sha3
+opcode_handlers[opcode_values["ADDRESS"]] = exec_address
+opcode_handlers[opcode_values["BALANCE"]] = exec_balance
+opcode_handlers[opcode_values["CALLER"]] = exec_caller
+opcode_handlers[opcode_values["ORIGIN"]] = exec_origin
+opcode_handlers[opcode_values["CALLVALUE"]] = exec_callvalue
+opcode_handlers[opcode_values["CALLDATALOAD"]] = exec_calldataload
+opcode_handlers[opcode_values["CALLDATASIZE"]] = exec_calldatasize
+opcode_handlers[opcode_values["CALLDATACOPY"]] = exec_calldatacopy
+opcode_handlers[opcode_values["CODESIZE"]] = exec_codesize
+opcode_handlers[opcode_values["CODECOPY"]] = exec_codecopy
+opcode_handlers[opcode_values["RETURNDATACOPY"]] = exec_returndatacopy
+opcode_handlers[opcode_values["RETURNDATASIZE"]] = exec_returndatasize
+opcode_handlers[opcode_values["GASPRICE"]] = exec_gasprice
+opcode_handlers[opcode_values["EXTCODESIZE"]] = exec_extcodesize
+opcode_handlers[opcode_values["EXTCODECOPY"]] = exec_extcodecopy
+opcode_handlers[opcode_values["BLOCKHASH"]] = exec_blockhash
+opcode_handlers[opcode_values["COINBASE"]] = exec_coinbase
+opcode_handlers[opcode_values["TIMESTAMP"]] = exec_timestamp
+opcode_handlers[opcode_values["NUMBER"]] = exec_number
+opcode_handlers[opcode_values["DIFFICULTY"]] = exec_difficulty
+opcode_handlers[opcode_values["GASLIMIT"]] = exec_gaslimit
+opcode_handlers[opcode_values["POP"]] = exec_pop
+opcode_handlers[opcode_values["MLOAD"]] = exec_mload
+opcode_handlers[opcode_values["MSTORE"]] = exec_mstore
+opcode_handlers[opcode_values["MSTORE8"]] = exec_mstore8
+opcode_handlers[opcode_values["SLOAD"]] = exec_sload
+opcode_handlers[opcode_values["SSTORE"]] = exec_sstore
+opcode_handlers[opcode_values["JUMP"]] = exec_jump
+opcode_handlers[opcode_values["JUMPI"]] = exec_jumpi
+opcode_handlers[opcode_values["PC"]] = exec_pc
+opcode_handlers[opcode_values["MSIZE"]] = exec_msize
+opcode_handlers[opcode_values["GAS"]] = exec_gas
+opcode_handlers[opcode_values["JUMPDEST"]] = exec_jumpdest
+opcode_handlers[opcode_values["CREATE"]] = exec_create
+opcode_handlers[opcode_values["CALL"]] = exec_call
+opcode_handlers[opcode_values["CALLCODE"]] = exec_callcode
+opcode_handlers[opcode_values["DELEGATECALL"]] = exec_delegatecall
+opcode_handlers[opcode_values["STATICCALL"]] = exec_delegatecall
+opcode_handlers[opcode_values["RETURN"]] = exec_return
+opcode_handlers[opcode_values["REVERT"]] = exec_return
+opcode_handlers[opcode_values["SUICIDE"]] = exec_suicide
+for op in range(0x60, 0x80):
+    opcode_handlers[op] = exec_push
+for op in range(0x80, 0x90):
+    opcode_handlers[op] = exec_dup
+for op in range(0x90, 0xa0):
+    opcode_handlers[op] = exec_swap
+for op in range(0xa0, 0xa5):
+    opcode_handlers[op] = exec_log
+
 
 # Detect if a money flow depends on the timestamp
 # 检测资金流向是否取决于时间戳
@@ -2298,7 +2963,7 @@ def detect_parity_multisig_bug_2():
     global results
     global parity_multisig_bug_2
 
-    parity_multisig_bug_2 = ParityMultisigBug2(g_src_map)
+    parity_multisig_bug_2 = ParityMultisigBug2(g_src_map, g_contracts)
 
     results['vulnerabilities']['parity_multisig_bug_2'] = parity_multisig_bug_2.get_warnings()
     s = "\t  Parity Multisig Bug 2: \t\t %s" % parity_multisig_bug_2.is_vulnerable()
@@ -2342,9 +3007,9 @@ def detect_callstack_attack():
     global calls_affect_state
     global callstack
 
-    disasm_data = open(g_disasm_file).read()
-    instr_pattern = r"([\d]+) ([A-Z]+)([\d]+)?(?: => 0x)?(\S+)?"
-    instr = re.findall(instr_pattern, disasm_data)
+    # (pc, 名字, 编号)，例如 ('12', 'SWAP', '2')
+    instr_pattern = r"([A-Z]+)([\d]+)?"
+    instr = [(str(pc),) + re.match(instr_pattern, instructions[pc].name).groups("") for pc in sorted(instructions)]
     pcs = check_callstack_attack(instr)
 
     callstack = CallStack(g_src_map, pcs, calls_affect_state)
@@ -2417,6 +3082,9 @@ def detect_vulnerabilities():
         evm_code_coverage = float(len(visited_pcs)) / len(instructions.keys()) * 100
         log.info("\t  EVM Code Coverage: \t\t\t %s%%", round(evm_code_coverage, 1))
         results["evm_code_coverage"] = str(round(evm_code_coverage, 1))
+        if static_cfg.entry_stacks:
+            log.debug("Coverage of the statically reachable code: %d/%d", len(visited_pcs),
+                      static_cfg.reachable_instructions())
 
         if g_src_map:
             detect_integer_underflow()
@@ -2535,12 +3203,25 @@ class Timeout:
 def do_nothing():
     pass
 
+# 运行时字节码转换成 bytes，disasm_file 是 <合约>.evm.disasm，字节码在 <合约>.evm 中
+def load_bytecode(disasm_file, bytecode=None):
+    if bytecode is None:
+        if disasm_file.endswith('.disasm'):
+            evm_file_name = disasm_file[:-7]
+        else:
+            evm_file_name = disasm_file
+        with open(evm_file_name, 'r') as evm_file:
+            bytecode = evm_file.read()
+    return to_bytes(bytecode)
+
 # 构建 cfg 并分析
 def run_build_cfg_and_analyze(timeout_cb=do_nothing):
     # 初始化全局变量
     initGlobalVars()
     global g_timeout
+    global g_deadline
 
+    g_deadline = time.time() + global_params.GLOBAL_TIMEOUT
     try:
         with Timeout(sec=global_params.GLOBAL_TIMEOUT):
             build_cfg_and_analyze()
@@ -2548,6 +3229,13 @@ def run_build_cfg_and_analyze(timeout_cb=do_nothing):
     except TimeoutError:
         g_timeout = True
         timeout_cb()
+    if solver.cache is not None:
+        log.debug("Query cache: %s", solver.cache.stats)
+    log.debug("Simplify cache: %s", simplifier.stats)
+    log.debug("Block summaries: %s", block_summaries.stats)
+    if solver.disk_cache is not None:
+        log.debug("Solver cache: %s", solver.disk_cache.stats)
+        solver.disk_cache.close()
 
 def get_recipients(disasm_file, contract_address):
     global recipients
@@ -2555,10 +3243,14 @@ def get_recipients(disasm_file, contract_address):
     global g_src_map
     global g_disasm_file
     global g_source_file
+    global g_bytecode
+    global g_contracts
 
     g_src_map = None
     g_disasm_file = disasm_file
     g_source_file = None
+    g_bytecode = load_bytecode(disasm_file)
+    g_contracts = {}
     data_source = EthereumData(contract_address)
     recipients = set()
 
@@ -2592,15 +3284,21 @@ def analyze():
 # oyente.py 调用此函数来获取结果
 # 这个函数获取了生成的汇编文件的位置，源文件的位置和 SourceMap 的对象。
 # 然后 run 函数调用了 analyze()
-def run(disasm_file=None, source_file=None, source_map=None):
+# bytecode 是要分析的运行时字节码，没有给出时从 disasm_file 对应的 .evm 文件读取；
+# contracts 是同一次编译得到的所有合约的字节码，检测 Parity Multisig Bug 2 时使用
+def run(disasm_file=None, source_file=None, source_map=None, bytecode=None, contracts=None):
     global g_disasm_file
     global g_source_file
     global g_src_map
+    global g_bytecode
+    global g_contracts
     global results
 
     g_disasm_file = disasm_file
     g_source_file = source_file
     g_src_map = source_map
+    g_bytecode = load_bytecode(disasm_file, bytecode)
+    g_contracts = contracts or {}
 
     if is_testing_evm():
         test()
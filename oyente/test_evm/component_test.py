@@ -0,0 +1,435 @@
+# 不需要 evm 和 solc 的部件测试: Keccak-256、反汇编器、写时复制的内存、求解器的约束切分和缓存等。
+# Known-answer and isolation checks of the self-contained components.
+# Run from the oyente directory: python -m unittest test_evm.component_test
+
+import hashlib
+import itertools
+import random
+import unittest
+from types import SimpleNamespace
+
+from z3 import Bool, BitVec, BoolVal, Extract, Not, Solver, ULT, UGE, ULE, UGT, is_or, is_true, sat, simplify, unsat
+
+from concrete_exec import exec_concrete, handlers
+from disassembler import disassemble
+from evm_stack import Stack
+from instruction import INVALID, Instruction, opcode_values
+from keccak import RATE, hash_term, keccak256, sponge256
+from loop_widening import LoopWidener
+from paged_memory import PAGE_SIZE, PagedMemory
+from path_solver import VarCache, slice_constraints
+from query_cache import QueryCache, satisfies
+from search_strategy import DepthFirstSearch
+from state_merging import MergingWorklist
+import symExec
+
+
+class KeccakTest(unittest.TestCase):
+    def test_known_answers(self):
+        self.assertEqual(keccak256(b""), 0xc5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470)
+        self.assertEqual(keccak256(b"abc"), 0x4e03657aea45a94fc7d47ba826c8d667c0d1e6e33a64a036ec44f58fa12d6c45)
+
+    # NIST 的 SHA3-256 与 Keccak-256 只有填充的第一个字节不同，用 hashlib 检查置换和多块吸收
+    def test_rate_boundary(self):
+        for length in (RATE - 1, RATE, RATE + 1, 2 * RATE):
+            data = bytes(range(256))[:length] if length <= 256 else bytes(length)
+            self.assertEqual(sponge256(data, 0x06), hashlib.sha3_256(data).digest(), length)
+        self.assertNotEqual(keccak256(bytes(RATE)), keccak256(bytes(RATE - 1)))
+
+
+class DisassemblerTest(unittest.TestCase):
+    def test_push_and_hex_input(self):
+        instrs = disassemble("0x6080604052\n")
+        self.assertEqual([(i.pc, i.name, i.arg) for i in instrs],
+                         [(0, "PUSH1", 0x80), (2, "PUSH1", 0x40), (4, "MSTORE", None)])
+
+    def test_truncated_push_is_dropped(self):
+        # PUSH2 with a single byte of argument
+        instrs = disassemble(bytes([0x00, 0x61, 0x01]))
+        self.assertEqual([(i.pc, i.name) for i in instrs], [(0, "STOP")])
+
+    def test_unknown_byte(self):
+        instrs = disassemble(bytes([0x0c, 0x01]))
+        self.assertEqual([(i.pc, i.name) for i in instrs], [(0, "INVALID"), (1, "ADD")])
+        self.assertEqual(instrs[0].opcode, INVALID)
+
+
+class PagedMemoryTest(unittest.TestCase):
+    def test_fork_isolation(self):
+        memory = PagedMemory()
+        memory.store_word(0, 1)
+        fork = memory.copy()
+        fork.store_word(0, 2)
+        memory.store_word(32, 3)
+        self.assertEqual(memory.read(0, 64), (1).to_bytes(32, "big") + (3).to_bytes(32, "big"))
+        self.assertEqual(fork.read(0, 64), (2).to_bytes(32, "big") + bytes(32))
+        self.assertEqual(len(fork), 32)
+        self.assertNotEqual(memory, fork)
+
+    def test_write_across_pages(self):
+        memory = PagedMemory()
+        fork = memory.copy()
+        memory.store_word(PAGE_SIZE - 16, 2 ** 256 - 1)
+        self.assertEqual(memory.read(PAGE_SIZE - 16, 32), b"\xff" * 32)
+        self.assertEqual(fork.read(PAGE_SIZE - 16, 32), bytes(32))
+        self.assertEqual(fork, PagedMemory())
+
+    def test_hash_input(self):
+        memory = PagedMemory()
+        memory.store_word(0, 7)
+        self.assertEqual(memory.hash_input(0, 32), (7).to_bytes(32, "big"))
+        x = BitVec("x", 256)
+        fork = memory.copy()
+        fork.store_word(32, x)
+        words = fork.hash_input(0, 64)
+        self.assertEqual(len(words), 2)
+        self.assertTrue(words[1].eq(x))
+        self.assertIsInstance(memory.hash_input(0, 32), bytes)
+        fork.forget(0, 32)
+        self.assertIsNone(fork.hash_input(0, 64))
+        self.assertIsNotNone(memory.hash_input(0, 32))
+
+
+class SliceConstraintsTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = VarCache(1024)
+
+    def test_transitive_component(self):
+        x, y, z, w = [BitVec(name, 256) for name in "xyzw"]
+        constraints = [ULT(x, y), ULT(y, z), UGT(w, 5)]
+        self.assertEqual(slice_constraints(constraints, [z == 3], self.cache), constraints[:2])
+        self.assertEqual(slice_constraints(constraints, [w == 6], self.cache), constraints[2:])
+
+    def test_constraints_without_variables_are_kept(self):
+        x, y = BitVec("x", 256), BitVec("y", 256)
+        constraints = [BoolVal(False), ULT(x, 2), True]
+        self.assertEqual(slice_constraints(constraints, [y == 1], self.cache), [constraints[0], True])
+
+    # 只通过 SHA3 的未解释函数相关的约束也在同一个分量中
+    def test_uninterpreted_function_connects(self):
+        x, y, v = BitVec("x", 256), BitVec("y", 256), BitVec("v", 256)
+        hash_x, hints = hash_term([x])
+        hash_y, _ = hash_term([y])
+        constraints = [hash_x == v] + hints + [ULT(v, 10)]
+        sliced = slice_constraints(constraints, [hash_y == 7], self.cache)
+        self.assertEqual([c.get_id() for c in sliced], [c.get_id() for c in constraints])
+
+    def test_cache_is_bounded(self):
+        cache = VarCache(8)
+        for i in range(20):
+            cache.vars(ULT(BitVec("a%d" % i, 256), BitVec("b%d" % i, 256)))
+        self.assertLessEqual(len(cache.entries), 8)
+        self.assertEqual(cache.vars(ULT(BitVec("a0", 256), 1)), frozenset(["a0"]))
+
+
+def model_of(*constraints):
+    solver = Solver()
+    solver.add(*constraints)
+    assert solver.check() == sat
+    return solver.model()
+
+
+class QueryCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.a, self.b, self.c, self.d = [Bool(name) for name in "abcd"]
+
+    def test_superset_of_unsat(self):
+        cache = QueryCache(16)
+        cache.store([self.a, Not(self.a)], unsat)
+        self.assertEqual(cache.lookup([self.b, self.a, Not(self.a)]), (unsat, None))
+        self.assertEqual(cache.stats["unsat_subset"], 1)
+
+    def test_subset_of_sat(self):
+        cache = QueryCache(16)
+        constraints = [self.a, self.b, self.c]
+        model = model_of(*constraints)
+        cache.store(constraints, sat, model)
+        result, found = cache.lookup([self.c, self.a])
+        self.assertEqual(result, sat)
+        self.assertIs(found, model)
+        self.assertEqual(cache.stats["sat_superset"], 1)
+
+    def test_miss(self):
+        cache = QueryCache(16)
+        cache.store([self.a, Not(self.a)], unsat)
+        cache.store([self.b], sat, model_of(self.b))
+        # b = True does not satisfy Not(b), a is not in an unsat set
+        self.assertIsNone(cache.lookup([self.a, Not(self.b)]))
+        self.assertEqual(cache.stats["miss"], 1)
+
+    def test_model_reuse(self):
+        cache = QueryCache(16)
+        x = BitVec("x", 256)
+        cache.store([UGT(x, 5), ULT(x, 7)], sat, model_of(UGT(x, 5), ULT(x, 7)))
+        result, model = cache.lookup([UGT(x, 3)])
+        self.assertEqual(result, sat)
+        self.assertTrue(satisfies(model, [UGT(x, 3)]))
+        self.assertEqual(cache.stats["model_reuse"], 1)
+        # x = 6 does not satisfy x < 2
+        self.assertIsNone(cache.lookup([ULT(x, 2)]))
+
+    def test_eviction_drops_index_entries(self):
+        cache = QueryCache(2)
+        cache.store([self.a, Not(self.a)], unsat)
+        cache.store([self.b], sat, model_of(self.b))
+        cache.store([self.c], sat, model_of(self.c))
+        self.assertEqual(len(cache.entries), 2)
+        self.assertEqual(cache.unsat_index, {})
+        self.assertIsNone(cache.lookup([self.a, Not(self.a), Not(self.b), Not(self.c)]))
+        cache.store([self.d], sat, model_of(self.d))
+        self.assertNotIn(self.b.get_id(), cache.sat_index)
+        self.assertEqual(sum(len(keys) for keys in cache.sat_index.values()), 2)
+
+
+class FakeState(object):
+    def __init__(self, block, depth):
+        self.block = block
+        self.depth = depth
+
+
+class MergingWorklistTest(unittest.TestCase):
+    def setUp(self):
+        symExec.g_src_map = None
+        symExec.initGlobalVars()
+
+    # 一个 JUMPI 的两个后继，栈顶分别是 1 和 2，都到达块 10
+    def fork(self):
+        params = symExec.get_initial_state().take_params()
+        other = params.copy()
+        x = BitVec("x", 256)
+        params.stack.append(1)
+        other.stack.append(2)
+        return (symExec.State(params, 10, 1, 1, branch=x == 0, branch_pc=5),
+                symExec.State(other, 10, 2, 1, branch=Not(x == 0), branch_pc=5))
+
+    def test_diamond_merges(self):
+        worklist = MergingWorklist(DepthFirstSearch(), symExec.merge_states, 8)
+        worklist.push(FakeState(0, 0))
+        worklist.pop()
+        worklist.push_all(list(self.fork()))
+        self.assertEqual(len(worklist), 1)
+        merged = worklist.pop()
+        self.assertEqual(worklist.stats["merged"], 1)
+        path_condition = merged.params.path_conditions_and_vars["path_condition"]
+        self.assertTrue(is_or(path_condition[-1]))
+        self.assertEqual(len(merged.params.stack), 1)
+        self.assertEqual(str(merged.params.stack[0]), "If(x == 0, 1, 2)")
+
+    def test_cannot_merge_pushes_both(self):
+        a, b = self.fork()
+        # stacks of different depth cannot be merged
+        b.params.stack.append(3)
+        worklist = MergingWorklist(DepthFirstSearch(), symExec.merge_states, 8)
+        worklist.push(FakeState(0, 0))
+        worklist.pop()
+        worklist.push_all([a, b])
+        self.assertEqual(worklist.stats["failed"], 1)
+        self.assertEqual(set([worklist.pop(), worklist.pop()]), set([a, b]))
+        self.assertEqual(len(worklist), 0)
+
+    def test_terminated_sibling_releases_parked(self):
+        worklist = MergingWorklist(DepthFirstSearch(), lambda a, b: None, 8)
+        worklist.push(FakeState(0, 0))
+        worklist.pop()
+        a, b = FakeState(10, 1), FakeState(20, 1)
+        worklist.push_all([a, b])
+        # both wait, the one at the lower block runs first
+        self.assertIs(worklist.pop(), a)
+        self.assertEqual(len(worklist), 1)
+        worklist.push_all([])
+        self.assertIs(worklist.pop(), b)
+        self.assertEqual(len(worklist), 0)
+
+    # 随机的分叉、结束和合并: 每个状态恰好执行一次或者被合并一次
+    def test_no_state_is_lost(self):
+        for seed in range(50):
+            rng = random.Random(seed)
+            created = []
+            merged_away = []
+
+            def new_state(block, depth):
+                state = FakeState(block, depth)
+                created.append(state)
+                return state
+
+            def merge(a, b):
+                if rng.random() < 0.3:
+                    return None
+                merged_away.extend([a, b])
+                return new_state(a.block, max(a.depth, b.depth))
+
+            worklist = MergingWorklist(DepthFirstSearch(), merge, 3)
+            worklist.push(new_state(0, 0))
+            popped = []
+            while worklist:
+                state = worklist.pop()
+                popped.append(state)
+                choice = rng.random()
+                if state.depth >= 8 or choice < 0.2:
+                    successors = []
+                elif choice < 0.5:
+                    successors = [new_state(rng.randrange(4), state.depth + 1)]
+                else:
+                    successors = [new_state(rng.randrange(4), state.depth + 1) for _ in range(2)]
+                worklist.push_all(successors)
+            self.assertEqual(sorted(map(id, popped + merged_away)), sorted(map(id, created)), seed)
+
+
+class LoopWideningTest(unittest.TestCase):
+    def setUp(self):
+        names = ("fresh_%d" % i for i in range(100))
+        self.widener = LoopWidener(lambda: next(names), 1000)
+
+    def test_constant_step(self):
+        x = BitVec("x", 256)
+        # an int counter and a symbolic one, both step by 2
+        counter = self.widener.widen_value([0, 2, 4])
+        symbolic = self.widener.widen_value([x, x + 2, x + 4])
+        trip_count = self.widener.trip_count
+        self.assertIsNotNone(trip_count)
+        self.assertTrue(is_true(simplify(counter - 2 * trip_count == 0)))
+        self.assertTrue(is_true(simplify(symbolic - x - 2 * trip_count == 0)))
+        self.assertEqual([str(c) for c in self.widener.constraints],
+                         [str(UGE(trip_count, 2)), str(ULE(trip_count, 1000))])
+        # one trip count for the whole loop
+        self.assertEqual(len(self.widener.variables), 1)
+
+    def test_non_affine_value_is_fresh(self):
+        value = self.widener.widen_value([1, 2, 4])
+        self.assertEqual(str(value), "fresh_0")
+        self.assertIsNone(self.widener.trip_count)
+
+    def test_unchanged_value_is_kept(self):
+        self.assertEqual(self.widener.widen_value([5, 5, 5]), 5)
+
+    def test_stack_depth_change(self):
+        snapshots = [((1,), {}, {}), ((1, 2), {}, {}), ((1, 2, 3), {}, {})]
+        self.assertIsNone(self.widener.widen(snapshots))
+
+    def test_keys_first_written_in_loop_keep_value(self):
+        snapshots = [((0,), {0: 0}, {}), ((1,), {0: 1, 32: 7}, {5: 1})]
+        stack, mem, storage = self.widener.widen(snapshots)
+        self.assertEqual(mem[32], 7)
+        self.assertEqual(storage[5], 1)
+
+
+# 边界操作数: 0、最大值、BYTE 的下标 >= 32、符号位为 1 的值(SLT/SGT)
+OPERANDS = [0, 1, 2, 31, 32, 100, 2 ** 255 - 1, 2 ** 255, 2 ** 255 + 1, 2 ** 256 - 1, 0x1234567890abcdef << 64]
+
+
+class ConcreteExecTest(unittest.TestCase):
+    def setUp(self):
+        symExec.g_src_map = None
+        symExec.initGlobalVars()
+        symExec.jump_type[0] = "terminal"
+
+    def run_instruction(self, concrete, name, stack, arg=None, size=1):
+        params = symExec.get_initial_state().take_params()
+        params.stack = Stack(stack)
+        params.mem = {0: 5, 32: 6}
+        params.global_state["pc"] = 7
+        instr = Instruction(7, opcode_values[name], name, arg, size)
+        if concrete:
+            self.assertTrue(exec_concrete(instr, params.stack, params.mem, params.global_state, params.analysis), name)
+        else:
+            symExec.sym_exec_ins(params, 0, instr, -1, "fallback")
+        return ([(type(value), value) for value in params.stack], params.global_state["pc"],
+                params.analysis["gas"], params.analysis["gas_mem"])
+
+    # 每条有快速路径的指令与 sym_exec_ins 的结果相同
+    def test_same_as_sym_exec_ins(self):
+        for name in sorted(handlers):
+            if name.startswith("PUSH"):
+                size = int(name[4:]) + 1
+                cases = [([1], 2 ** (8 * size - 8) - 1, size)]
+            elif name.startswith("DUP") or name.startswith("SWAP"):
+                cases = [(list(range(100, 118)), None, 1)]
+            else:
+                cases = [(list(operands), None, 1) for operands in itertools.product(OPERANDS, repeat=2)]
+            for stack, arg, size in cases:
+                self.assertEqual(self.run_instruction(True, name, list(stack), arg, size),
+                                 self.run_instruction(False, name, list(stack), arg, size), (name, stack))
+
+
+def assemble(*items):
+    instrs = []
+    pc = 0
+    for name, arg in items:
+        size = 2 if arg is not None else 1
+        instrs.append(Instruction(pc, opcode_values[name], name, arg, size))
+        pc += size
+    return instrs
+
+
+# 块 0 的纯指令前缀: 栈顶 x 变为 x + 1 和 2 - x，后面的 SSTORE 不在前缀中
+PREFIX_BLOCK = assemble(("DUP1", None), ("PUSH1", 1), ("ADD", None), ("SWAP1", None),
+                        ("PUSH1", 2), ("SUB", None), ("SSTORE", None))
+
+
+class BlockSummaryTest(unittest.TestCase):
+    def setUp(self):
+        symExec.g_src_map = None
+        symExec.initGlobalVars()
+        # block 0 ends with a JUMPI to 20, whether 20 reverts is set by each test
+        symExec.jump_type[0] = "conditional"
+        symExec.vertices[0] = SimpleNamespace(get_jump_target=lambda: 20)
+        symExec.block_facts = {0: SimpleNamespace(falls_to_reverts=False),
+                               20: SimpleNamespace(has_revert=False)}
+        self.x = BitVec("x", 256)
+
+    def execute(self, summarize):
+        params = symExec.get_initial_state().take_params()
+        params.stack = Stack([7, self.x])
+        params.global_state["pc"] = 0
+        del symExec.pending_obligations[:]
+        if summarize:
+            length = symExec.exec_block_prefix(params, 0, PREFIX_BLOCK, -1, "fallback")
+            self.assertEqual(length, len(PREFIX_BLOCK) - 1)
+        else:
+            symExec.exec_instructions(params, 0, PREFIX_BLOCK[:-1], -1, "fallback")
+        return ([str(value) for value in params.stack], params.global_state["pc"], params.analysis["gas"],
+                [(kind, pc, str(expr)) for kind, pc, expr, _ in symExec.pending_obligations])
+
+    def test_replay_matches_interpretation(self):
+        interpreted = self.execute(False)
+        self.assertEqual(len(interpreted[3]), 2)
+        self.assertEqual(self.execute(True), interpreted)
+        self.assertEqual(symExec.block_summaries.stats, {"hit": 0, "miss": 1})
+        self.assertEqual(self.execute(True), interpreted)
+        self.assertEqual(symExec.block_summaries.stats, {"hit": 1, "miss": 1})
+
+    # 跳转目标有 REVERT 时不检查溢出，两次访问的摘要不能共用
+    def test_reverts_is_part_of_the_key(self):
+        checked = self.execute(True)
+        symExec.block_facts[20].has_revert = True
+        unchecked = self.execute(True)
+        self.assertEqual(symExec.block_summaries.stats, {"hit": 0, "miss": 2})
+        self.assertEqual(unchecked[3], [])
+        self.assertEqual(unchecked[:3], checked[:3])
+        self.assertEqual(self.execute(False), unchecked)
+        symExec.block_facts[20].has_revert = False
+        self.assertEqual(self.execute(True), checked)
+        self.assertEqual(symExec.block_summaries.stats, {"hit": 1, "miss": 2})
+
+
+class SelectorShardTest(unittest.TestCase):
+    def setUp(self):
+        symExec.g_src_map = None
+        symExec.initGlobalVars()
+
+    def test_fallback_constrains_selector_once(self):
+        symExec.excluded_selectors = [0xa9059cbb, 0x70a08231]
+        variables = {"path_condition": []}
+        first = symExec.constrain_selector(BitVec("Id_1", 256), variables)
+        second = symExec.constrain_selector(BitVec("Id_2", 256), variables)
+        self.assertIs(second, first)
+        self.assertEqual(len(variables["path_condition"]), 1)
+
+    def test_fixed_selector(self):
+        symExec.fixed_selector = 0xa9059cbb
+        word = symExec.constrain_selector(BitVec("Id_1", 256), {"path_condition": []})
+        self.assertEqual(simplify(Extract(255, 224, word)).as_long(), 0xa9059cbb)
+
+
+if __name__ == "__main__":
+    unittest.main()
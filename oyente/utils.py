@@ -15,6 +15,7 @@ import difflib  # 用于比较序列，例如文件差异
 import six  # Python 2/3 兼容性库
 from z3 import *  # Z3定理证明器库，用于符号执行和约束求解
 from z3.z3util import get_vars  # 从Z3表达式中提取变量
+from expr_cache import bv_val  # 共享的 256 位常量
 
 def ceil32(x):
     """
@@ -67,8 +68,8 @@ def to_symbolic(number):
     :return: 对应的Z3 BitVecVal（256位）或原始符号变量。
     """
     if isReal(number):
-        # 创建一个256位的Z3位向量值
-        return BitVecVal(number, 256)
+        # 256位的Z3位向量值，常用的值共享同一个对象
+        return bv_val(number)
     return number
 
 def to_unsigned(number):
@@ -99,26 +100,20 @@ def to_signed(number):
     else:
         return number
 
-def check_sat(solver, pop_if_exception=True):
+def check_sat(solver, *assumptions):
     """
     安全地检查Z3求解器的可满足性。
     处理可能的未知状态和异常。
 
-    :param solver: Z3 Solver对象。
-    :param pop_if_exception: 如果发生异常，是否自动调用solver.pop()回滚状态。
+    :param solver: Z3 Solver对象或 PathSolver。
+    :param assumptions: 只对这一次检查生效的约束，不必 push()/pop()。
     :return: Z3求解器的检查结果 (sat, unsat)。
     :raises Z3Exception: 如果求解结果是unknown或发生其他Z3异常。
     """
-    try:
-        ret = solver.check()
-        if ret == unknown:
-            # 如果结果未知，抛出包含原因的异常
-            raise Z3Exception(solver.reason_unknown())
-    except Exception as e:
-        if pop_if_exception:
-            # 发生异常时，根据参数决定是否回滚求解器状态
-            solver.pop()
-        raise e  # 重新抛出异常
+    ret = solver.check(*assumptions)
+    if ret == unknown:
+        # 如果结果未知，抛出包含原因的异常
+        raise Z3Exception(solver.reason_unknown())
     return ret
 
 def custom_deepcopy(input_dict):
@@ -133,8 +128,11 @@ def custom_deepcopy(input_dict):
     for key in input_dict:
         value = input_dict[key]
         if isinstance(value, list):
-            # 拷贝列表
-            output[key] = list(value)
+            # 拷贝列表，保留 Stack 这样的子类型
+            output[key] = type(value)(value)
+        elif isinstance(value, dict) and type(value) is not dict:
+            # StorageMap 这样的字典子类型用自己的 copy()，保留它的属性
+            output[key] = value.copy()
         elif isinstance(value, dict):
             # 递归拷贝字典
             output[key] = custom_deepcopy(value)
@@ -166,7 +164,7 @@ def copy_global_values(global_state):
     :return: 一个只包含合约存储状态的新字典。
     """
     # 'Ia' 键通常存储合约的存储状态 (地址 -> 值/表达式)
-    return global_state['Ia']
+    return global_state['Ia'].copy()
 
 def is_in_expr(var, expr):
     """
@@ -242,7 +240,7 @@ def rename_vars(pcs, global_states):
     只重命名被修改过的存储变量或非存储变量。
 
     :param pcs: 旧路径的路径条件列表 (Z3表达式)。
-    :param global_states: 旧路径修改过的全局存储状态 (地址 -> Z3表达式)。
+    :param global_states: 旧路径修改过的全局存储状态 (StorageMap，地址 -> Z3表达式)。
     :return: 一个元组，包含重命名后的路径条件列表和全局状态字典。
     """
     ret_pcs = []  # 存储重命名后的路径条件
@@ -261,7 +259,7 @@ def rename_vars(pcs, global_states):
                 var_name = var.decl().name()
                 # 检查是否是存储变量
                 if is_storage_var(var):
-                    pos = get_storage_position(var)
+                    pos = global_states.slot(var)
                     # 如果存储变量未在 global_states 中被修改，则不重命名
                     if pos not in global_states:
                         continue
@@ -291,7 +289,7 @@ def rename_vars(pcs, global_states):
                 var_name = var.decl().name()
                 # 检查是否是存储变量
                 if is_storage_var(var):
-                    pos = get_storage_position(var)
+                    pos = global_states.slot(var)
                     # 如果存储变量未在 global_states 中被修改，则不重命名
                     # 注意：这里的逻辑与上面路径条件部分相同，确保一致性
                     if pos not in global_states:
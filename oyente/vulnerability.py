@@ -1,5 +1,7 @@
 import re
 
+from disassembler import disassemble
+
 class Vulnerability:
     def __init__(self, source_map, pcs):
         self.source_map = source_map
@@ -190,8 +192,9 @@ class IntegerOverflow(AssertionFailure):
     pass
 
 class ParityMultisigBug2(Vulnerability):
-    def __init__(self, source_map):
+    def __init__(self, source_map, contracts):
         self.source_map = source_map
+        self.contracts = contracts
         self.pairs = self._get_contracts_containing_selfdestruct_opcode()
         self.warnings = self._warnings()
 
@@ -221,9 +224,9 @@ class ParityMultisigBug2(Vulnerability):
     def _get_contracts_containing_selfdestruct_opcode(self):
         ret = []
         for pair in self.source_map.callee_src_pairs:
-            disasm_data = open(pair[0] + ".evm.disasm").read()
-            regex = re.compile("SELFDESTRUCT|SUICIDE")
-            if regex.search(disasm_data):
+            if pair[0] not in self.contracts:
+                continue
+            if any(instr.name == "SUICIDE" for instr in disassemble(self.contracts[pair[0]])):
                 ret.append(pair)
         return ret
 